@@ -0,0 +1,377 @@
+# offline replay of the one_best_trade pipeline over recorded market history
+
+import ast
+import csv
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from agents.application.prompts import Prompter
+
+
+class MarketHistory:
+    """
+    Daily YES prices for many markets as a (dates x markets) matrix, forward
+    filled, along with the Gamma market records they belong to. A market is
+    tradeable from its first recorded price to its last one; resolved markets
+    are marked at their payout (1 or 0) after that.
+    """
+
+    def __init__(
+        self, markets: "list[dict]", dates: np.ndarray, prices: np.ndarray
+    ) -> None:
+        self.markets = markets
+        self.market_ids = [str(m["id"]) for m in markets]
+        self.dates = dates
+
+        observed = ~np.isnan(prices)
+        rows = np.arange(len(dates))[:, None]
+        first = np.where(observed.any(axis=0), observed.argmax(axis=0), len(dates))
+        last = len(dates) - 1 - observed[::-1].argmax(axis=0)
+        self.tradeable = (rows >= first) & (rows <= last) & observed.any(axis=0)
+
+        # forward fill, then settle resolved markets at their payout
+        filled = np.where(observed, rows, 0)
+        np.maximum.accumulate(filled, axis=0, out=filled)
+        prices = np.take_along_axis(prices, filled, axis=0)
+        self.resolution = np.array([_resolution(m) for m in markets])
+        settled = (rows > last) & ~np.isnan(self.resolution)
+        self.prices = np.where(settled, self.resolution, prices)
+
+    @classmethod
+    def from_files(cls, markets_path: str, prices_path: str) -> "MarketHistory":
+        """
+        `markets_path` is a JSON array of Gamma market records, `prices_path` a
+        CSV with a `date,market_id,price` header holding the YES price per day.
+        """
+        with open(markets_path) as f:
+            markets = json.load(f)
+        with open(prices_path) as f:
+            reader = csv.reader(f)
+            next(reader)
+            dates, ids, values = zip(*reader)
+        return cls.from_records(markets, dates, ids, np.array(values, dtype=float))
+
+    @classmethod
+    def from_records(cls, markets: "list[dict]", dates, market_ids, values):
+        index = {str(m["id"]): i for i, m in enumerate(markets)}
+        columns = np.array([index.get(str(i), -1) for i in market_ids])
+        known = columns >= 0
+        unique_dates, rows = np.unique(np.asarray(dates), return_inverse=True)
+        prices = np.full((len(unique_dates), len(markets)), np.nan)
+        prices[rows[known], columns[known]] = np.asarray(values)[known]
+        return cls(markets, unique_dates, prices)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+
+class StubResponse(NamedTuple):
+    content: str
+    response_metadata: dict = {}
+
+
+class StubLLM:
+    """
+    Offline stand-in for ChatOpenAI: `invoke(messages)` returns an object with
+    `.content`. By default it makes up a stable likelihood per question and
+    answers the trade prompt by buying whichever side that likelihood favours,
+    which exercises the whole prompt and parsing path without any service.
+    """
+
+    model_name = "stub"
+
+    def __init__(self, respond=None, size: float = 0.1) -> None:
+        self.respond = respond or self.default_response
+        self.size = size
+        self.calls = 0
+
+    def invoke(self, messages) -> StubResponse:
+        self.calls += 1
+        return StubResponse(self.respond(_prompt_text(messages)))
+
+    def default_response(self, prompt: str) -> str:
+        prediction = re.search(r"likelihood `?([0-9.]+)", prompt)
+        if prediction is None:
+            question = re.search(r"question=`(.*?)`", prompt)
+            seed = question.group(1) if question else prompt
+            likelihood = _stable_unit(seed)
+            return (
+                f"I believe {seed} has a likelihood `{likelihood:.2f}` "
+                "for outcome of `Yes`."
+            )
+        likelihood = float(prediction.group(1))
+        yes_price = float(re.search(r"prices are: \$\[?'?([0-9.]+)", prompt).group(1))
+        side = "BUY" if likelihood > yes_price else "SELL"
+        return f"price:{likelihood:.2f},\nsize:{self.size},\nside:{side},"
+
+
+class HashEmbeddings:
+    """
+    Deterministic bag-of-words embeddings (feature hashing), a drop-in for
+    OpenAIEmbeddings when replaying offline.
+    """
+
+    def __init__(self, dimensions: int = 256) -> None:
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> "list[float]":
+        return self.embed([text])[0].tolist()
+
+    def embed(self, texts: "list[str]") -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+                vectors[i, int.from_bytes(digest, "little") % self.dimensions] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+class BacktestResult(NamedTuple):
+    dates: np.ndarray
+    equity: np.ndarray  # end of day, one per date
+    returns: np.ndarray  # daily
+    trades: dict  # one array per field, one entry per filled trade
+    stats: dict
+
+
+class Backtester:
+    """
+    Replays one_best_trade over a MarketHistory: each day the RAG filter ranks
+    the tradeable markets, the LLM forecasts the best `trades_per_day` of them
+    and proposes a limit price, size and side, and marketable proposals fill at
+    the day's price plus `slippage`. Trades are held `holding_days` (or to the
+    end) and every position is marked to market daily.
+
+    Like format_trade_prompt_for_execution sizes live trades from the USDC
+    balance, each trade spends its proposed fraction of the cash on hand, and
+    positions are fully funded, so equity never goes below zero. The prompts do
+    not depend on the portfolio and run concurrently up front; only cash and
+    positions are stepped day by day. Repeated prompts (the forecast does not
+    depend on the price) are answered from a cache.
+    """
+
+    def __init__(
+        self,
+        history: MarketHistory,
+        llm=None,
+        embeddings=None,
+        capital: float = 1000.0,
+        filter_top: int = 4,
+        trades_per_day: int = 1,
+        holding_days: int = None,
+        slippage: float = 0.0,
+        fee_rate_bps: float = 0.0,
+        max_workers: int = 8,
+    ) -> None:
+        self.history = history
+        self.llm = llm or StubLLM()
+        self.embeddings = embeddings or HashEmbeddings()
+        self.prompter = Prompter()
+        self.capital = capital
+        self.filter_top = filter_top
+        self.trades_per_day = trades_per_day
+        self.holding_days = holding_days
+        self.slippage = slippage
+        self.fee_rate_bps = fee_rate_bps
+        self.max_workers = max_workers
+        self._responses = {}
+
+    def filter_markets(self) -> np.ndarray:
+        """Indices of the `filter_top` best scoring tradeable markets, per day."""
+        documents = [m.get("description") or "" for m in self.history.markets]
+        matrix = np.asarray(self.embeddings.embed_documents(documents))
+        query = np.asarray(self.embeddings.embed_query(self.prompter.filter_markets()))
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = np.divide(
+            matrix @ query, norms, out=np.zeros(len(matrix)), where=norms > 0
+        )
+
+        ranked = np.where(self.history.tradeable, scores, -np.inf)
+        top = min(self.filter_top, ranked.shape[1])
+        picks = np.argpartition(-ranked, top - 1, axis=1)[:, :top]
+        order = np.argsort(-np.take_along_axis(ranked, picks, axis=1), axis=1)
+        picks = np.take_along_axis(picks, order, axis=1)
+        return np.where(np.take_along_axis(ranked, picks, axis=1) > -np.inf, picks, -1)
+
+    def invoke(self, prompt) -> str:
+        key = _prompt_text(prompt)
+        if key not in self._responses:
+            self._responses[key] = self.llm.invoke(prompt).content
+        return self._responses[key]
+
+    def propose(self, day: int, market_index: int) -> "tuple[float, float, str]":
+        """The forecast and trade prompts of Executor.source_best_trade."""
+        market = self.history.markets[market_index]
+        outcomes = _literal(market.get("outcomes"), ["Yes", "No"])
+        yes_price = self.history.prices[day, market_index]
+        outcome_prices = [f"{yes_price:.4f}", f"{1 - yes_price:.4f}"]
+
+        prediction = self.invoke(
+            self.prompter.superforecaster(
+                market.get("question"), market.get("description"), outcomes
+            )
+        )
+        trade = self.invoke(
+            self.prompter.one_best_trade(prediction, outcomes, outcome_prices)
+        )
+        return parse_trade(trade)
+
+    def run(self) -> BacktestResult:
+        history = self.history
+        n_days = history.prices.shape[0]
+        picks = self.filter_markets()[:, : self.trades_per_day]
+        days, slots = np.nonzero(picks >= 0)
+        markets = picks[days, slots]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            proposals = list(pool.map(self.propose, days, markets))
+        limit = np.array([p[0] for p in proposals]).reshape(-1)
+        size = np.array([p[1] for p in proposals]).reshape(-1)
+        direction = np.array([1.0 if p[2] == "BUY" else -1.0 for p in proposals])
+
+        # BUY takes YES at or below the limit, SELL is the same on the NO side
+        mark = history.prices[days, markets]
+        token_price = np.where(direction > 0, mark, 1 - mark)
+        entry = np.minimum(token_price + self.slippage, 1.0)
+        token_limit = np.where(direction > 0, limit, 1 - limit)
+        filled = (entry <= token_limit) & (size > 0) & (entry > 0)
+
+        days, markets, direction = days[filled], markets[filled], direction[filled]
+        entry, fraction = entry[filled], size[filled]
+        close = np.full(days.shape, n_days - 1)
+        if self.holding_days is not None:
+            close = np.minimum(days + max(self.holding_days, 1), n_days - 1)
+        shares, fees, equity = self.simulate(
+            days, markets, direction, entry, fraction, close
+        )
+
+        pnl = np.diff(np.concatenate([[self.capital], equity]))
+        previous = np.concatenate([[self.capital], equity[:-1]])
+        returns = np.divide(pnl, previous, out=np.zeros(n_days), where=previous > 0)
+
+        placed = shares > 0
+        days, markets, direction = days[placed], markets[placed], direction[placed]
+        entry, close = entry[placed], close[placed]
+        shares, fees = shares[placed], fees[placed]
+        exit_price = history.prices[close, markets]
+        exit_price = np.where(direction > 0, exit_price, 1 - exit_price)
+        trade_pnl = shares * (exit_price - entry) - fees
+        trades = {
+            "day": days,
+            "market_index": markets,
+            "side": np.where(direction > 0, "BUY", "SELL"),
+            "entry": entry,
+            "exit": exit_price,
+            "shares": shares,
+            "pnl": trade_pnl,
+            "close_day": close,
+        }
+        return BacktestResult(
+            history.dates, equity, returns, trades, self.stats(equity, returns, trades)
+        )
+
+    def simulate(self, days, markets, direction, entry, fraction, close) -> tuple:
+        """
+        Step cash and positions through the history for fills sorted by day.
+        Returns shares and fees per fill (zero if no cash was left for it) and
+        the end of day equity: cash plus positions marked at the day's price.
+        """
+        n_days, n_markets = self.history.prices.shape
+        prices = np.nan_to_num(self.history.prices)
+        fee_rate = self.fee_rate_bps / 10000
+        side = (direction < 0).astype(int)  # 0 holds YES tokens, 1 holds NO
+        shares = np.zeros(len(days))
+        fees = np.zeros(len(days))
+        equity = np.zeros(n_days)
+        positions = np.zeros((2, n_markets))
+
+        opens = np.searchsorted(days, np.arange(n_days + 1))
+        by_close = np.argsort(close, kind="stable")
+        closes = np.searchsorted(close[by_close], np.arange(n_days + 1))
+        cash = self.capital
+        for day in range(n_days):
+            token_prices = np.stack([prices[day], 1 - prices[day]])
+            # exits first, so their proceeds can fund the day's entries
+            for i in by_close[closes[day] : closes[day + 1]]:
+                if days[i] < day:
+                    positions[side[i], markets[i]] -= shares[i]
+                    cash += shares[i] * token_prices[side[i], markets[i]]
+            for i in range(opens[day], opens[day + 1]):
+                notional = min(fraction[i] * cash, cash / (1 + fee_rate))
+                if notional <= 0:
+                    continue
+                shares[i] = notional / entry[i]
+                fees[i] = notional * fee_rate
+                cash -= notional + fees[i]
+                positions[side[i], markets[i]] += shares[i]
+            equity[day] = cash + (positions * token_prices).sum()
+            if equity[day] <= 0:
+                # nothing left to trade with, the run is over
+                equity[day:] = 0.0
+                break
+        return shares, fees, equity
+
+    def stats(self, equity: np.ndarray, returns: np.ndarray, trades: dict) -> dict:
+        peak = np.maximum.accumulate(np.concatenate([[self.capital], equity]))
+        drawdown = 1 - np.concatenate([[self.capital], equity]) / peak
+        volatility = returns.std()
+        return {
+            "days": len(returns),
+            "trades": len(trades["pnl"]),
+            "total_return": (
+                float(equity[-1] / self.capital - 1) if len(equity) else 0.0
+            ),
+            "sharpe": (
+                float(returns.mean() / volatility * np.sqrt(365)) if volatility else 0.0
+            ),
+            "max_drawdown": float(drawdown.max()),
+            "hit_rate": (
+                float((trades["pnl"] > 0).mean()) if len(trades["pnl"]) else 0.0
+            ),
+            "llm_calls": len(self._responses),
+        }
+
+
+def parse_trade(content: str) -> "tuple[float, float, str]":
+    """(price, size, side) from a one_best_trade response, zero size if unreadable."""
+    price = re.search(r"price:\s*'?([0-9]*\.?[0-9]+)", content)
+    size = re.search(r"size:\s*'?([0-9]*\.?[0-9]+)", content)
+    side = re.search(r"side:\s*'?(BUY|SELL)", content, re.IGNORECASE)
+    if not (price and size and side):
+        return 0.0, 0.0, "BUY"
+    return float(price.group(1)), float(size.group(1)), side.group(1).upper()
+
+
+def _prompt_text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(getattr(m, "content", str(m)) for m in messages)
+
+
+def _literal(value, default):
+    if isinstance(value, str):
+        return ast.literal_eval(value)
+    return value if value is not None else default
+
+
+def _resolution(market: dict) -> float:
+    if not market.get("closed"):
+        return np.nan
+    prices = _literal(market.get("outcomePrices"), [])
+    if prices and float(prices[0]) in (0.0, 1.0):
+        return float(prices[0])
+    return np.nan
+
+
+def _stable_unit(text: str) -> float:
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") / 2**64
@@ -1,6 +1,7 @@
 from agents.application.executor import Executor as Agent
 from agents.polymarket.gamma import GammaMarketClient as Gamma
 from agents.polymarket.polymarket import Polymarket
+from agents.polymarket.positions import PositionLedger
 
 
 class Creator:
@@ -42,8 +43,13 @@ class Creator:
             print(f"Error {e} \n \n Retrying")
             self.one_best_market()
 
-    def maintain_positions(self):
-        pass
+    def maintain_positions(self) -> dict:
+        ledger = PositionLedger.load()
+        new_trades = self.polymarket.sync_positions(ledger)
+        summary = self.polymarket.mark_positions(ledger)
+        ledger.save()
+        print(f"{new_trades} new trades, {summary}")
+        return summary
 
     def incentive_farm(self):
         pass
@@ -15,6 +15,7 @@ from agents.connectors.chroma import PolymarketRAG as Chroma
 from agents.utils.objects import SimpleEvent, SimpleMarket
 from agents.application.prompts import Prompter
 from agents.polymarket.polymarket import Polymarket
+from agents.utils.tracing import get_tracer
 
 def retain_keys(data, keys_to_retain):
     if isinstance(data, dict):
@@ -43,11 +44,22 @@ class Executor:
         self.chroma = Chroma()
         self.polymarket = Polymarket()
 
+    def invoke_llm(self, messages):
+        tracer = get_tracer()
+        with tracer.span("openai chat", model=self.llm.model_name) as span:
+            result = self.llm.invoke(messages)
+            usage = result.response_metadata.get("token_usage") or {}
+            span["prompt_tokens"] = usage.get("prompt_tokens")
+            span["completion_tokens"] = usage.get("completion_tokens")
+        tracer.count("openai.requests")
+        tracer.count("openai.tokens", usage.get("total_tokens") or 0)
+        return result
+
     def get_llm_response(self, user_input: str) -> str:
         system_message = SystemMessage(content=str(self.prompter.market_analyst()))
         human_message = HumanMessage(content=user_input)
         messages = [system_message, human_message]
-        result = self.llm.invoke(messages)
+        result = self.invoke_llm(messages)
         return result.content
 
     def get_superforecast(
@@ -56,7 +68,7 @@ class Executor:
         messages = self.prompter.superforecaster(
             description=event_title, question=market_question, outcome=outcome
         )
-        result = self.llm.invoke(messages)
+        result = self.invoke_llm(messages)
         return result.content
 
 
@@ -70,7 +82,7 @@ class Executor:
         )
         human_message = HumanMessage(content=user_input)
         messages = [system_message, human_message]
-        result = self.llm.invoke(messages)
+        result = self.invoke_llm(messages)
         return result.content
 
 
@@ -124,7 +136,7 @@ class Executor:
             return combined_result
     def filter_events(self, events: "list[SimpleEvent]") -> str:
         prompt = self.prompter.filter_events(events)
-        result = self.llm.invoke(prompt)
+        result = self.invoke_llm(prompt)
         return result.content
 
     def filter_events_with_rag(self, events: "list[SimpleEvent]") -> str:
@@ -137,15 +149,13 @@ class Executor:
     def map_filtered_events_to_markets(
         self, filtered_events: "list[SimpleEvent]"
     ) -> "list[SimpleMarket]":
-        markets = []
+        market_ids = []
         for e in filtered_events:
             data = json.loads(e[0].json())
-            market_ids = data["metadata"]["markets"].split(",")
-            for market_id in market_ids:
-                market_data = self.gamma.get_market(market_id)
-                formatted_market_data = self.polymarket.map_api_to_market(market_data)
-                markets.append(formatted_market_data)
-        return markets
+            market_ids.extend(data["metadata"]["markets"].split(","))
+        # one bulk, de-duplicated hydration instead of a request per market id
+        markets_data = self.gamma.get_markets_by_ids(market_ids)
+        return [self.polymarket.map_api_to_market(m) for m in markets_data]
 
     def filter_markets(self, markets) -> "list[tuple]":
         prompt = self.prompter.filter_markets()
@@ -166,7 +176,7 @@ class Executor:
         print()
         print("... prompting ... ", prompt)
         print()
-        result = self.llm.invoke(prompt)
+        result = self.invoke_llm(prompt)
         content = result.content
 
         print("result: ", content)
@@ -174,18 +184,22 @@ class Executor:
         prompt = self.prompter.one_best_trade(content, outcomes, outcome_prices)
         print("... prompting ... ", prompt)
         print()
-        result = self.llm.invoke(prompt)
+        result = self.invoke_llm(prompt)
         content = result.content
 
         print("result: ", content)
         print()
         return content
 
-    def format_trade_prompt_for_execution(self, best_trade: str) -> float:
+    def format_trade_prompt_for_execution(
+        self, best_trade: str, usdc_balance: float = None
+    ) -> float:
+        # sized from the wallet balance unless a (e.g. paper) balance is passed
         data = best_trade.split(",")
         # price = re.findall("\d+\.\d+", data[0])[0]
         size = re.findall("\d+\.\d+", data[1])[0]
-        usdc_balance = self.polymarket.get_usdc_balance()
+        if usdc_balance is None:
+            usdc_balance = self.polymarket.get_usdc_balance()
         return float(size) * usdc_balance
 
     def source_best_market_to_create(self, filtered_markets) -> str:
@@ -193,6 +207,6 @@ class Executor:
         print()
         print("... prompting ... ", prompt)
         print()
-        result = self.llm.invoke(prompt)
+        result = self.invoke_llm(prompt)
         content = result.content
         return content
@@ -1,28 +1,29 @@
 from agents.application.executor import Executor as Agent
 from agents.polymarket.gamma import GammaMarketClient as Gamma
+from agents.polymarket.paper import PaperPolymarket
 from agents.polymarket.polymarket import Polymarket
+from agents.polymarket.positions import PositionLedger
+from agents.utils.tracing import get_tracer
 
-import shutil
+import os
 
 
 class Trader:
-    def __init__(self):
+    def __init__(self, paper: bool = None):
         self.polymarket = Polymarket()
         self.gamma = Gamma()
         self.agent = Agent()
+        self.tracer = get_tracer()
+        # orders go to an in-process matching simulator instead of the CLOB
+        if paper is None:
+            paper = os.getenv("PAPER_TRADING", "").lower() in ("1", "true", "yes")
+        self.paper = paper
+        self.exchange = PaperPolymarket(self.polymarket) if paper else self.polymarket
 
     def pre_trade_logic(self) -> None:
-        self.clear_local_dbs()
-
-    def clear_local_dbs(self) -> None:
-        try:
-            shutil.rmtree("local_db_events")
-        except:
-            pass
-        try:
-            shutil.rmtree("local_db_markets")
-        except:
-            pass
+        # nothing to clear: with RAG_BACKEND=chroma the event and market indexes
+        # are updated in place by PolymarketRAG, so they are kept between runs
+        pass
 
     def one_best_trade(self) -> None:
         """
@@ -34,38 +35,73 @@ class Trader:
         then executes that trade without any human intervention
 
         """
+        tracer = self.tracer
         try:
             self.pre_trade_logic()
 
-            events = self.polymarket.get_all_tradeable_events()
+            with tracer.span("stage fetch_events"):
+                events = self.polymarket.get_all_tradeable_events()
             print(f"1. FOUND {len(events)} EVENTS")
 
-            filtered_events = self.agent.filter_events_with_rag(events)
+            with tracer.span("stage filter_events_rag", events=len(events)):
+                filtered_events = self.agent.filter_events_with_rag(events)
             print(f"2. FILTERED {len(filtered_events)} EVENTS")
 
-            markets = self.agent.map_filtered_events_to_markets(filtered_events)
+            with tracer.span("stage hydrate_markets"):
+                markets = self.agent.map_filtered_events_to_markets(filtered_events)
             print()
             print(f"3. FOUND {len(markets)} MARKETS")
 
             print()
-            filtered_markets = self.agent.filter_markets(markets)
+            with tracer.span("stage filter_markets_rag", markets=len(markets)):
+                filtered_markets = self.agent.filter_markets(markets)
             print(f"4. FILTERED {len(filtered_markets)} MARKETS")
 
             market = filtered_markets[0]
-            best_trade = self.agent.source_best_trade(market)
+            with tracer.span("stage forecast"):
+                best_trade = self.agent.source_best_trade(market)
             print(f"5. CALCULATED TRADE {best_trade}")
 
-            amount = self.agent.format_trade_prompt_for_execution(best_trade)
+            with tracer.span("stage size_trade"):
+                # paper trades are sized from the paper balance, not the wallet
+                amount = self.agent.format_trade_prompt_for_execution(
+                    best_trade, self.exchange.get_usdc_balance()
+                )
+            if self.paper:
+                with tracer.span("stage paper_execute"):
+                    trade = self.exchange.execute_market_order(market, amount)
+                print(f"6. PAPER TRADED {trade}")
             # Please refer to TOS before uncommenting: polymarket.com/tos
             # trade = self.polymarket.execute_market_order(market, amount)
             # print(f"6. TRADED {trade}")
+            self.print_trace_summary()
 
         except Exception as e:
+            self.print_trace_summary()
             print(f"Error {e} \n \n Retrying")
             self.one_best_trade()
 
-    def maintain_positions(self):
-        pass
+    def print_trace_summary(self) -> None:
+        # one table per run, the JSON-lines trace file (TRACE_FILE) keeps it all
+        print()
+        self.tracer.print_summary()
+        self.tracer.reset()
+
+    def maintain_positions(self) -> dict:
+        # paper fills only live in this process, so their ledger is never saved
+        ledger = PositionLedger() if self.paper else PositionLedger.load()
+        with self.tracer.span("stage sync_positions") as span:
+            span["trades"] = self.exchange.sync_positions(ledger)
+        summary = self.exchange.mark_positions(ledger)
+        if not self.paper:
+            ledger.save()
+        print(
+            f"{summary['positions']} open positions, exposure "
+            f"{summary['exposure']:.2f} USDC, realized PnL "
+            f"{summary['realized_pnl']:.2f}, unrealized PnL "
+            f"{summary['unrealized_pnl']:.2f}"
+        )
+        return summary
 
     def incentive_farm(self):
         pass
@@ -1,20 +1,156 @@
+import hashlib
 import json
 import os
 import time
 
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.document_loaders import JSONLoader
 from langchain_community.vectorstores.chroma import Chroma
-
+from langchain_core.documents import Document
+
+from agents.connectors.embeddings import (
+    BatchEmbedder,
+    CachedEmbeddings,
+    async_embed_documents,
+)
+from agents.connectors.vectorstore import NumpyVectorStore
 from agents.polymarket.gamma import GammaMarketClient
 from agents.utils.objects import SimpleEvent, SimpleMarket
+from agents.utils.tracing import get_tracer
+
+
+class TracedEmbeddings:
+    """Wraps langchain embeddings and times every embedding request."""
+
+    def __init__(self, embeddings) -> None:
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        tracer = get_tracer()
+        with tracer.span("openai embeddings", texts=len(texts)):
+            vectors = self.embeddings.embed_documents(texts)
+        tracer.count("openai.embedded_texts", len(texts))
+        return vectors
+
+    async def aembed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        tracer = get_tracer()
+        with tracer.span("openai embeddings", texts=len(texts)):
+            vectors = await async_embed_documents(self.embeddings, texts)
+        tracer.count("openai.embedded_texts", len(texts))
+        return vectors
+
+    def embed_query(self, text: str) -> "list[float]":
+        tracer = get_tracer()
+        with tracer.span("openai embeddings", texts=1):
+            vector = self.embeddings.embed_query(text)
+        tracer.count("openai.embedded_texts")
+        return vector
+
+
+def content_hash(doc: Document) -> str:
+    # loader bookkeeping (file path, position in the file) is not content
+    metadata = {
+        key: value
+        for key, value in doc.metadata.items()
+        if key not in ("source", "seq_num", "content_hash")
+    }
+    payload = json.dumps([doc.page_content, metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
 
 
 class PolymarketRAG:
-    def __init__(self, local_db_directory=None, embedding_function=None) -> None:
+    def __init__(
+        self,
+        local_db_directory=None,
+        embedding_function=None,
+        backend: str = None,
+        k: int = None,
+    ) -> None:
         self.gamma_client = GammaMarketClient()
         self.local_db_directory = local_db_directory
         self.embedding_function = embedding_function
+        # index behind events() and markets(): "numpy" (the default) keeps it in
+        # memory for the run; "chroma" is opt-in and persists it, updating it
+        # incrementally between runs. Closed entries are only deleted from it when
+        # a snapshot store (SNAPSHOT_DB_PATH) says which ones are closed.
+        self.backend = backend or os.getenv("RAG_BACKEND", "numpy")
+        self.k = k or int(os.getenv("RAG_TOP_K", 4))
+
+    def get_embedding_function(self) -> CachedEmbeddings:
+        # cached texts never reach the traced (paid) embedding requests, and
+        # misses are embedded in concurrent, token-bounded batches
+        return CachedEmbeddings(
+            TracedEmbeddings(
+                self.embedding_function or BatchEmbedder(model="text-embedding-3-small")
+            )
+        )
+
+    def update_index(
+        self, docs: "list[Document]", vector_db_directory: str, kind: str
+    ) -> Chroma:
+        """
+        Bring the persistent index in `vector_db_directory` up to date with
+        `docs`, keyed by their `id` metadata: only new or changed documents (by
+        content hash) are embedded and upserted, so an unchanged universe costs
+        no embeddings. Entries missing from `docs` are kept, since a call only
+        passes a subset of `kind`, unless the snapshot store has them as closed
+        (or archived, or inactive), in which case they are deleted.
+        """
+        local_db = Chroma(
+            persist_directory=vector_db_directory,
+            embedding_function=self.get_embedding_function(),
+        )
+        indexed = local_db.get(include=["metadatas"])
+        indexed_hashes = {
+            doc_id: (metadata or {}).get("content_hash")
+            for doc_id, metadata in zip(indexed["ids"], indexed["metadatas"])
+        }
+
+        current = {}
+        for doc in docs:
+            doc.metadata["content_hash"] = content_hash(doc)
+            current[str(doc.metadata["id"])] = doc
+        changed = {
+            doc_id: doc
+            for doc_id, doc in current.items()
+            if indexed_hashes.get(doc_id) != doc.metadata["content_hash"]
+        }
+        removed = []
+        snapshot_store = self.gamma_client.snapshot_store
+        if snapshot_store is not None:
+            removed = snapshot_store.retired_ids(
+                kind, [doc_id for doc_id in indexed_hashes if doc_id not in current]
+            )
+
+        with get_tracer().span(
+            "chroma upsert",
+            documents=len(current),
+            changed=len(changed),
+            removed=len(removed),
+        ):
+            if removed:
+                local_db.delete(ids=removed)
+            if changed:
+                local_db.add_documents(list(changed.values()), ids=list(changed))
+        return local_db
+
+    def search(
+        self, docs: "list[Document]", query: str, vector_db_directory: str, kind: str
+    ) -> "list[tuple[Document, float]]":
+        """Index `docs` with the configured backend, return the top k for `query`."""
+        if self.backend == "chroma":
+            local_db = self.update_index(docs, vector_db_directory, kind)
+            # the index also holds documents from earlier calls
+            ids = [doc.metadata["id"] for doc in docs]
+            with get_tracer().span("chroma query"):
+                return local_db.similarity_search_with_score(
+                    query=query, k=self.k, filter={"id": {"$in": ids}}
+                )
+        with get_tracer().span("numpy index", documents=len(docs)):
+            local_db = NumpyVectorStore.from_documents(
+                docs, self.get_embedding_function()
+            )
+        with get_tracer().span("numpy query"):
+            return local_db.similarity_search_with_score(query=query, k=self.k)
 
     def load_json_from_local(
         self, json_file_path=None, vector_db_directory="./local_db"
@@ -24,10 +160,11 @@ class PolymarketRAG:
         )
         loaded_docs = loader.load()
 
-        embedding_function = OpenAIEmbeddings(model="text-embedding-3-small")
-        Chroma.from_documents(
-            loaded_docs, embedding_function, persist_directory=vector_db_directory
-        )
+        embedding_function = self.get_embedding_function()
+        with get_tracer().span("chroma index", documents=len(loaded_docs)):
+            Chroma.from_documents(
+                loaded_docs, embedding_function, persist_directory=vector_db_directory
+            )
 
     def create_local_markets_rag(self, local_directory="./local_db") -> None:
         all_markets = self.gamma_client.get_all_current_markets()
@@ -47,11 +184,12 @@ class PolymarketRAG:
     def query_local_markets_rag(
         self, local_directory=None, query=None
     ) -> "list[tuple]":
-        embedding_function = OpenAIEmbeddings(model="text-embedding-3-small")
+        embedding_function = self.get_embedding_function()
         local_db = Chroma(
             persist_directory=local_directory, embedding_function=embedding_function
         )
-        response_docs = local_db.similarity_search_with_score(query=query)
+        with get_tracer().span("chroma query"):
+            response_docs = local_db.similarity_search_with_score(query=query)
         return response_docs
 
     def events(self, events: "list[SimpleEvent]", prompt: str) -> "list[tuple]":
@@ -80,15 +218,10 @@ class PolymarketRAG:
             metadata_func=metadata_func,
         )
         loaded_docs = loader.load()
-        embedding_function = OpenAIEmbeddings(model="text-embedding-3-small")
-        vector_db_directory = f"{local_events_directory}/chroma"
-        local_db = Chroma.from_documents(
-            loaded_docs, embedding_function, persist_directory=vector_db_directory
+        return self.search(
+            loaded_docs, prompt, f"{local_events_directory}/chroma", "events"
         )
 
-        # query
-        return local_db.similarity_search_with_score(query=prompt)
-
     def markets(self, markets: "list[SimpleMarket]", prompt: str) -> "list[tuple]":
         # create local json file
         local_events_directory: str = "./local_db_markets"
@@ -117,11 +250,6 @@ class PolymarketRAG:
             metadata_func=metadata_func,
         )
         loaded_docs = loader.load()
-        embedding_function = OpenAIEmbeddings(model="text-embedding-3-small")
-        vector_db_directory = f"{local_events_directory}/chroma"
-        local_db = Chroma.from_documents(
-            loaded_docs, embedding_function, persist_directory=vector_db_directory
+        return self.search(
+            loaded_docs, prompt, f"{local_events_directory}/chroma", "markets"
         )
-
-        # query
-        return local_db.similarity_search_with_score(query=prompt)
@@ -0,0 +1,438 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import httpx
+import numpy as np
+import tiktoken
+from dotenv import load_dotenv
+
+from agents.utils.tracing import get_tracer
+from agents.utils.transport import get_transport
+
+load_dotenv()
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def model_name(embeddings) -> str:
+    for attribute in ("model", "model_name"):
+        name = getattr(embeddings, attribute, None)
+        if isinstance(name, str):
+            return name
+    inner = getattr(embeddings, "embeddings", None)
+    if inner is not None:
+        return model_name(inner)
+    return type(embeddings).__name__
+
+
+class EmbeddingCache:
+    """
+    Embedding vectors on disk in SQLite, keyed by model and the hash of the
+    normalized text, stored as raw float32. Once the stored vectors exceed
+    `max_bytes` the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        path="./local_db_embeddings/cache.sqlite",
+        max_bytes: int = 512 * 2**20,
+    ) -> None:
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS vectors (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB,
+                    last_used REAL
+                )
+                """
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS vectors_last_used ON vectors (last_used)"
+            )
+        (self.size,) = self.connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM vectors"
+        ).fetchone()
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        return cls(
+            path=os.getenv(
+                "EMBEDDING_CACHE_PATH", "./local_db_embeddings/cache.sqlite"
+            ),
+            max_bytes=int(float(os.getenv("EMBEDDING_CACHE_MB", 512)) * 2**20),
+        )
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+        return f"{model}:{digest}"
+
+    def get_many(self, keys: "list[str]") -> "dict[str, list[float]]":
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # stay well below SQLite's bound parameter limit
+            for i in range(0, len(unique), 500):
+                chunk = unique[i : i + 500]
+                rows = self.connection.execute(
+                    "SELECT key, vector FROM vectors WHERE key IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update(
+                    (key, np.frombuffer(blob, dtype=np.float32).tolist())
+                    for key, blob in rows
+                )
+            if found:
+                now = time.time()
+                with self.connection:
+                    self.connection.executemany(
+                        "UPDATE vectors SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found],
+                    )
+            self.hits += sum(key in found for key in keys)
+            self.misses += sum(key not in found for key in keys)
+        return found
+
+    def put_many(self, vectors: "dict[str, list[float]]") -> None:
+        now = time.time()
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in vectors.items()
+        ]
+        with self._lock, self.connection:
+            replaced = self._stored_bytes([key for key, _, _ in rows])
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO vectors VALUES (?, ?, ?)", rows
+            )
+            self.size += sum(len(blob) for _, blob, _ in rows) - replaced
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _stored_bytes(self, keys: "list[str]") -> int:
+        total = 0
+        for i in range(0, len(keys), 500):
+            chunk = keys[i : i + 500]
+            total += self.connection.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM vectors WHERE key IN "
+                f"({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchone()[0]
+        return total
+
+    def _evict(self) -> None:
+        # down to 90% of the limit, so eviction does not run on every insert
+        target = self.max_bytes * 0.9
+        victims, freed = [], 0
+        for key, size in self.connection.execute(
+            "SELECT key, LENGTH(vector) FROM vectors ORDER BY last_used"
+        ):
+            if self.size - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        self.connection.executemany("DELETE FROM vectors WHERE key = ?", victims)
+        self.size -= freed
+        self.evicted += len(victims)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evicted": self.evicted,
+            "bytes": self.size,
+        }
+
+
+class CachedEmbeddings:
+    """
+    Wraps any LangChain embedding function with the shared EmbeddingCache, so a
+    text is only embedded once per model. Cache hits and the embedding requests
+    they saved are counted on the tracer (`embeddings.cache.*`).
+    """
+
+    def __init__(self, embeddings, cache: EmbeddingCache = None) -> None:
+        self.embeddings = embeddings
+        self.cache = cache or get_embedding_cache()
+        self.model = model_name(embeddings)
+        self.saved_calls = 0
+
+    def embed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        keys, vectors, missing = self._lookup(texts)
+        if missing:
+            embedded = self.embeddings.embed_documents(list(missing.values()))
+            self._store(vectors, dict(zip(missing, embedded)))
+        return [vectors[key] for key in keys]
+
+    async def aembed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        keys, vectors, missing = self._lookup(texts)
+        if missing:
+            embedded = await async_embed_documents(
+                self.embeddings, list(missing.values())
+            )
+            self._store(vectors, dict(zip(missing, embedded)))
+        return [vectors[key] for key in keys]
+
+    def _lookup(self, texts: "list[str]") -> tuple:
+        """Cache keys, the cached vectors and the missing texts by key."""
+        keys = [EmbeddingCache.key(self.model, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, normalize_text(text))
+
+        tracer = get_tracer()
+        tracer.count("embeddings.cache.hits", len(texts) - len(missing))
+        tracer.count("embeddings.cache.misses", len(missing))
+        if texts and not missing:
+            self.saved_calls += 1
+            tracer.count("embeddings.cache.saved_calls")
+        return keys, vectors, missing
+
+    def _store(self, vectors: dict, new_vectors: "dict[str, list[float]]") -> None:
+        self.cache.put_many(new_vectors)
+        vectors.update(new_vectors)
+
+    def embed_query(self, text: str) -> "list[float]":
+        key = EmbeddingCache.key(self.model, text)
+        vector = self.cache.get_many([key]).get(key)
+        tracer = get_tracer()
+        if vector is not None:
+            self.saved_calls += 1
+            tracer.count("embeddings.cache.hits")
+            tracer.count("embeddings.cache.saved_calls")
+            return vector
+        tracer.count("embeddings.cache.misses")
+        vector = self.embeddings.embed_query(normalize_text(text))
+        self.cache.put_many({key: vector})
+        return vector
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "saved_calls": self.saved_calls}
+
+
+class BatchEmbedder:
+    """
+    Embeds large document sets through an OpenAI-compatible /embeddings endpoint.
+    Documents are packed, in order, into batches of at most `max_batch_tokens`
+    (estimated) tokens and `max_batch_size` inputs, and at most
+    `max_concurrency` batches are in flight. 429/5xx responses are already
+    retried by the transport's scheduler, so a batch is only retried here, on
+    its own, after a transport error; results always come back in input order.
+    Like OpenAIEmbeddings, texts over the model's `max_input_tokens` are split
+    into chunks whose vectors are averaged, weighted by length.
+    """
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        base_url: str = None,
+        api_key: str = None,
+        max_batch_tokens: int = 8000,
+        max_batch_size: int = 512,
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        max_input_tokens: int = 8191,
+        timeout: float = None,
+        transport=None,
+    ) -> None:
+        self.model = model
+        self.base_url = base_url or os.getenv(
+            "OPENAI_BASE_URL", "https://api.openai.com/v1"
+        )
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.max_input_tokens = max_input_tokens
+        # large batches take far longer than the transport's default timeout
+        self.timeout = timeout or float(os.getenv("EMBEDDING_TIMEOUT", 60))
+        self.transport = transport or get_transport()
+        self.last_run = {}
+        self._encoding = None
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        # same rough estimate as Executor.estimate_tokens, ~4 characters a token
+        return len(text) // 4 + 1
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        if self._encoding is None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        return self._encoding
+
+    def split(self, texts: "list[str]") -> "tuple[list[str], list[list[int]]]":
+        """
+        Split texts over `max_input_tokens` into chunks. Returns the chunks and,
+        per text, the token count of each of its chunks, in order.
+        """
+        chunks, lengths = [], []
+        for text in texts:
+            # a token is at least one byte, so short texts need no tokenizing
+            if len(text.encode()) <= self.max_input_tokens:
+                chunks.append(text)
+                lengths.append([1])
+                continue
+            tokens = self.encoding.encode(text, disallowed_special=())
+            pieces = [
+                tokens[i : i + self.max_input_tokens]
+                for i in range(0, len(tokens), self.max_input_tokens)
+            ]
+            chunks.extend(self.encoding.decode(piece) for piece in pieces)
+            lengths.append([len(piece) for piece in pieces])
+        return chunks, lengths
+
+    def batches(self, texts: "list[str]") -> "list[tuple[int, int]]":
+        """(start, end) slices of `texts`, in order, within the batch limits."""
+        batches, start, tokens = [], 0, 0
+        for i, text in enumerate(texts):
+            cost = self.estimate_tokens(text)
+            full = i - start >= self.max_batch_size
+            if i > start and (full or tokens + cost > self.max_batch_tokens):
+                batches.append((start, i))
+                start, tokens = i, 0
+            tokens += cost
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+
+    async def aembed(self, texts: "list[str]") -> "list[list[float]]":
+        chunks, lengths = self.split(texts)
+        vectors = [None] * len(chunks)
+        batches = self.batches(chunks)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        retries = 0
+        tracer = get_tracer()
+
+        async def embed_batch(start: int, end: int) -> None:
+            nonlocal retries
+            async with semaphore:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        with tracer.span("embeddings batch", documents=end - start):
+                            data = await self._post(chunks[start:end])
+                        break
+                    except httpx.TransportError as e:
+                        if attempt == self.max_retries:
+                            raise
+                        retries += 1
+                        tracer.count("embeddings.batch_retries")
+                        print(f"Embedding batch {start}:{end} failed ({e}), retrying")
+                        await asyncio.sleep(0.5 * 2**attempt)
+            for item in data:
+                vectors[start + item["index"]] = item["embedding"]
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*(embed_batch(start, end) for start, end in batches))
+        elapsed = time.perf_counter() - start_time
+
+        self.last_run = {
+            "documents": len(texts),
+            "batches": len(batches),
+            "retries": retries,
+            "seconds": elapsed,
+            "docs_per_second": len(texts) / elapsed if elapsed else 0.0,
+        }
+        tracer.count("embeddings.documents", len(texts))
+        tracer.count("embeddings.batches", len(batches))
+        if len(batches) > 1:
+            print(
+                f"Embedded {len(texts)} documents in {len(batches)} batches, "
+                f"{elapsed:.2f}s ({self.last_run['docs_per_second']:.0f} docs/s)"
+            )
+        if len(chunks) == len(texts):
+            return vectors
+        return _combine(vectors, lengths)
+
+    async def _post(self, texts: "list[str]") -> "list[dict]":
+        response = await self.transport.apost(
+            self.base_url + "/embeddings",
+            json={"model": self.model, "input": texts},
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            print(f"Error response returned from api: HTTP {response.status_code}")
+            raise httpx.HTTPStatusError(
+                f"HTTP {response.status_code}",
+                request=response.request,
+                response=response,
+            )
+        data = response.json()["data"]
+        if len(data) != len(texts):
+            raise Exception(f"{len(data)} embeddings returned for {len(texts)} inputs")
+        return data
+
+    def embed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        if not texts:
+            return []
+        return self.transport.run(self.aembed(texts))
+
+    async def aembed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        # the batches run on the transport's resident loop and client, whichever
+        # loop awaits them
+        if not texts:
+            return []
+        return await self.transport.arun(self.aembed(texts))
+
+    def embed_query(self, text: str) -> "list[float]":
+        return self.embed_documents([text])[0]
+
+
+async def async_embed_documents(embeddings, texts: "list[str]") -> list:
+    """Await `embeddings.aembed_documents`, or embed_documents on a thread."""
+    if hasattr(embeddings, "aembed_documents"):
+        return await embeddings.aembed_documents(texts)
+    return await asyncio.to_thread(embeddings.embed_documents, texts)
+
+
+def _combine(
+    vectors: "list[list[float]]", lengths: "list[list[int]]"
+) -> "list[list[float]]":
+    # the token-weighted mean of each text's chunk vectors, normalized again
+    combined, start = [], 0
+    for counts in lengths:
+        chunk_vectors = vectors[start : start + len(counts)]
+        start += len(counts)
+        if len(counts) == 1:
+            combined.append(chunk_vectors[0])
+            continue
+        mean = np.average(np.asarray(chunk_vectors), axis=0, weights=counts)
+        combined.append((mean / np.linalg.norm(mean)).tolist())
+    return combined
+
+
+_shared_cache = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = EmbeddingCache.from_env()
+    return _shared_cache
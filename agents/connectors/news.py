@@ -2,12 +2,21 @@ from datetime import datetime
 import os
 
 from newsapi import NewsApiClient
+from newsapi.newsapi_exception import NewsAPIException
 
 from agents.utils.objects import Article
+from agents.utils.ratelimit import RequestScheduler, get_scheduler
+
+
+def is_retryable(exception: Exception) -> bool:
+    return isinstance(exception, NewsAPIException) and exception.get_code() in (
+        "rateLimited",
+        "unexpectedError",
+    )
 
 
 class News:
-    def __init__(self) -> None:
+    def __init__(self, scheduler: RequestScheduler = None) -> None:
         self.configs = {
             "language": "en",
             "country": "us",
@@ -26,6 +35,11 @@ class News:
         }
 
         self.API = NewsApiClient(os.getenv("NEWSAPI_API_KEY"))
+        self.scheduler = scheduler or get_scheduler()
+        self.host = "newsapi.org"
+
+    def _call(self, func, **kwargs) -> dict:
+        return self.scheduler.call(self.host, func, retry_on=is_retryable, **kwargs)
 
     def get_articles_for_cli_keywords(self, keywords) -> "list[Article]":
         query_words = keywords.split(",")
@@ -37,8 +51,11 @@ class News:
         return article_objects
 
     def get_top_articles_for_market(self, market_object: dict) -> "list[Article]":
-        return self.API.get_top_headlines(
-            language="en", country="usa", q=market_object["description"]
+        return self._call(
+            self.API.get_top_headlines,
+            language="en",
+            country="usa",
+            q=market_object["description"],
         )
 
     def get_articles_for_options(
@@ -52,7 +69,8 @@ class News:
         # Default to top articles if no start and end dates are given for search
         if not date_start and not date_end:
             for option in market_options:
-                response_dict = self.API.get_top_headlines(
+                response_dict = self._call(
+                    self.API.get_top_headlines,
                     q=option.strip(),
                     language=self.configs["language"],
                     country=self.configs["country"],
@@ -61,7 +79,8 @@ class News:
                 all_articles[option] = articles
         else:
             for option in market_options:
-                response_dict = self.API.get_everything(
+                response_dict = self._call(
+                    self.API.get_everything,
                     q=option.strip(),
                     language=self.configs["language"],
                     country=self.configs["country"],
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+import numpy as np
+from dotenv import load_dotenv
+
+from agents.connectors.embeddings import async_embed_documents
+from agents.connectors.vectorstore import NumpyVectorStore
+from agents.utils.tracing import get_tracer
+
+load_dotenv()
+
+
+class RAGQueryService:
+    """
+    Resident similarity search over one index. The index and the embedding
+    client are loaded once; queries that arrive together (up to
+    `max_batch_size`, waiting at most `max_wait` seconds for company) are
+    embedded in one call and searched with one matrix product. `stats()`
+    reports p50/p99 latency over the last `window` queries.
+    """
+
+    def __init__(
+        self,
+        store: NumpyVectorStore,
+        k: int = 4,
+        max_batch_size: int = 64,
+        max_wait: float = 0.002,
+        window: int = 10000,
+    ) -> None:
+        self.store = store
+        self.k = k
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.latencies = deque(maxlen=window)
+        self.queries = 0
+        self.batches = 0
+        self._queue = None
+        self._worker = None
+
+    @classmethod
+    def from_chroma(
+        cls, vector_db_directory: str, embedding_function=None, **kwargs
+    ) -> "RAGQueryService":
+        """Load a persisted Chroma index, vectors included, into memory once."""
+        from langchain_community.vectorstores.chroma import Chroma
+        from langchain_core.documents import Document
+
+        from agents.connectors.chroma import PolymarketRAG
+
+        embedding_function = (
+            embedding_function
+            or PolymarketRAG(embedding_function=None).get_embedding_function()
+        )
+        data = Chroma(
+            persist_directory=vector_db_directory,
+            embedding_function=embedding_function,
+        ).get(include=["embeddings", "documents", "metadatas"])
+        documents = [
+            Document(page_content=text or "", metadata=metadata or {})
+            for text, metadata in zip(data["documents"], data["metadatas"])
+        ]
+        store = NumpyVectorStore(embedding_function, documents, data["embeddings"])
+        print(f"Loaded {len(store)} documents from {vector_db_directory}")
+        return cls(store, **kwargs)
+
+    @classmethod
+    def from_env(cls) -> "RAGQueryService":
+        return cls.from_chroma(
+            os.getenv("RAG_DB_DIRECTORY", "./local_db"),
+            k=int(os.getenv("RAG_TOP_K", 4)),
+            max_batch_size=int(os.getenv("RAG_MAX_BATCH", 64)),
+            max_wait=float(os.getenv("RAG_MAX_WAIT_MS", 2)) / 1000,
+        )
+
+    async def query(self, text: str, k: int = None) -> list:
+        """(Document, score) tuples for `text`, best first."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((text, k or self.k, time.perf_counter(), future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                results = await self._search(batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            now = time.perf_counter()
+            for (_, _, started, future), result in zip(batch, results):
+                self.latencies.append(now - started)
+                if not future.done():
+                    future.set_result(result)
+
+    async def _search(self, batch: list) -> list:
+        tracer = get_tracer()
+        with tracer.span("rag query batch", queries=len(batch)):
+            texts = [text for text, *_ in batch]
+            # awaited, so the embedding request never holds up a thread
+            vectors = await async_embed_documents(self.store.embedding_function, texts)
+            k = max(k for _, k, _, _ in batch)
+            results = await asyncio.to_thread(
+                self.store.similarity_search_by_vectors_with_score, vectors, k
+            )
+        self.queries += len(batch)
+        self.batches += 1
+        tracer.count("rag.queries", len(batch))
+        tracer.count("rag.batches")
+        return [result[:k] for (_, k, _, _), result in zip(batch, results)]
+
+    def stats(self) -> dict:
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "documents": len(self.store),
+            "queries": self.queries,
+            "batches": self.batches,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        }
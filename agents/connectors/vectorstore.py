@@ -0,0 +1,83 @@
+import numpy as np
+from langchain_core.documents import Document
+
+
+class NumpyVectorStore:
+    """
+    In-memory vector search for indexes that only live for one run: the
+    document vectors are one contiguous float32 matrix with unit rows, and a
+    query is a single matrix-vector product plus an argpartition for the exact
+    top k. Scores are squared L2 distances between the normalized vectors, like
+    Chroma's default, so lower is closer.
+    """
+
+    def __init__(self, embedding_function, documents=None, vectors=None) -> None:
+        self.embedding_function = embedding_function
+        self.documents: "list[Document]" = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        if documents:
+            self.add_vectors(documents, vectors)
+
+    @classmethod
+    def from_documents(
+        cls, documents: "list[Document]", embedding
+    ) -> "NumpyVectorStore":
+        vectors = embedding.embed_documents([doc.page_content for doc in documents])
+        return cls(embedding, documents, vectors)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add_documents(self, documents: "list[Document]") -> None:
+        vectors = self.embedding_function.embed_documents(
+            [doc.page_content for doc in documents]
+        )
+        self.add_vectors(documents, vectors)
+
+    def add_vectors(self, documents: "list[Document]", vectors) -> None:
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        if len(self.documents):
+            vectors = np.vstack([self.matrix, vectors])
+        self.matrix = np.ascontiguousarray(vectors)
+        self.documents.extend(documents)
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4
+    ) -> "list[tuple[Document, float]]":
+        vector = self.embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_score(vector, k)
+
+    def similarity_search_by_vector_with_score(
+        self, vector, k: int = 4
+    ) -> "list[tuple[Document, float]]":
+        return self.similarity_search_by_vectors_with_score([vector], k)[0]
+
+    def similarity_search_by_vectors_with_score(
+        self, vectors, k: int = 4
+    ) -> "list[list[tuple[Document, float]]]":
+        """Top k for many queries at once, with one matrix product for all of them."""
+        if not self.documents or k <= 0:
+            return [[] for _ in vectors]
+        queries = _normalize(np.asarray(vectors, dtype=np.float32))
+        similarity = queries @ self.matrix.T
+        k = min(k, similarity.shape[1])
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        order = np.argsort(
+            -np.take_along_axis(similarity, top, axis=1), axis=1, kind="stable"
+        )
+        top = np.take_along_axis(top, order, axis=1)
+        distances = np.maximum(
+            2.0 - 2.0 * np.take_along_axis(similarity, top, axis=1), 0.0
+        )
+        return [
+            [(self.documents[i], float(d)) for i, d in zip(row, row_distances)]
+            for row, row_distances in zip(top, distances)
+        ]
+
+    def similarity_search(self, query: str, k: int = 4) -> "list[Document]":
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
@@ -0,0 +1,150 @@
+# pre-trade fill estimates for market orders, over many books at once
+
+from typing import NamedTuple
+
+import numpy as np
+from py_clob_client.clob_types import OrderBookSummary
+from py_clob_client.order_builder.constants import BUY
+
+from agents.polymarket.orderbook import L2Book
+
+
+class FillEstimate(NamedTuple):
+    # one entry per book
+    size: np.ndarray  # shares filled
+    cost: np.ndarray  # usdc paid (BUY) or received (SELL)
+    vwap: np.ndarray  # cost / size, nan when nothing fills
+    worst_price: np.ndarray  # last level touched
+    slippage: np.ndarray  # vwap vs the best price, in price units, >= 0
+    complete: np.ndarray  # the whole amount fits in the book
+
+
+class BookDepth:
+    """
+    The side of many order books that a market order of `side` would take from
+    (asks for BUY, bids for SELL), as padded (books x levels) arrays ordered best
+    level first, with cumulative shares and cost per level. Built once, every
+    estimate below is a handful of array operations whatever the basket size.
+    """
+
+    def __init__(
+        self, books: "list[OrderBookSummary | L2Book]", side: str = BUY
+    ) -> None:
+        self.side = side
+        self.token_ids = [book.asset_id for book in books]
+        sides = [self._levels(book) for book in books]
+
+        self.levels = np.array([len(prices) for prices, _ in sides], dtype=np.int64)
+        n, width = len(sides), max(self.levels, default=0)
+        total = int(self.levels.sum())
+        flat_prices = np.fromiter(
+            (p for prices, _ in sides for p in prices), np.float64, count=total
+        )
+        flat_sizes = np.fromiter(
+            (s for _, sizes in sides for s in sizes), np.float64, count=total
+        )
+        rows = np.repeat(np.arange(n), self.levels)
+        cols = np.arange(total) - np.repeat(
+            np.cumsum(self.levels) - self.levels, self.levels
+        )
+
+        # sort each row best first, padding sorts last
+        sign = 1.0 if side == BUY else -1.0
+        keys = np.full((n, max(width, 1)), np.inf)
+        keys[rows, cols] = sign * flat_prices
+        order = np.argsort(keys, axis=1, kind="stable")
+        sizes = np.zeros_like(keys)
+        sizes[rows, cols] = flat_sizes
+        keys = np.take_along_axis(keys, order, axis=1)
+
+        self.prices = np.where(np.isinf(keys), 0.0, sign * keys)
+        self.sizes = np.take_along_axis(sizes, order, axis=1)
+        self.cum_sizes = np.cumsum(self.sizes, axis=1)
+        self.cum_costs = np.cumsum(self.prices * self.sizes, axis=1)
+
+    def _levels(self, book) -> "tuple[list[float], list[float]]":
+        if isinstance(book, L2Book):
+            levels = book.asks if self.side == BUY else book.bids
+            return levels.prices, levels.sizes
+        levels = (book.asks if self.side == BUY else book.bids) or []
+        levels = [(float(l.price), float(l.size)) for l in levels]
+        return [p for p, s in levels if s > 0], [s for _, s in levels if s > 0]
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def best_price(self) -> np.ndarray:
+        return np.where(self.levels > 0, self.prices[:, 0], np.nan)
+
+    def total_size(self) -> np.ndarray:
+        return self.cum_sizes[:, -1]
+
+    def total_cost(self) -> np.ndarray:
+        return self.cum_costs[:, -1]
+
+    def fill(self, amounts, in_usdc: bool = None) -> FillEstimate:
+        """
+        Walk each book for `amounts` (a scalar or one value per book). Amounts are
+        read the way MarketOrderArgs reads them: usdc to spend for BUY, shares to
+        sell for SELL, unless `in_usdc` says otherwise.
+        """
+        if in_usdc is None:
+            in_usdc = self.side == BUY
+        cumulative = self.cum_costs if in_usdc else self.cum_sizes
+        amounts = np.broadcast_to(np.asarray(amounts, dtype=np.float64), len(self))
+        target = np.minimum(amounts, cumulative[:, -1])
+
+        # levels fully consumed, then the partial fill on the next one
+        k = np.minimum(
+            (cumulative < target[:, None]).sum(axis=1), self.prices.shape[1] - 1
+        )
+        rows = np.arange(len(self))
+        before = np.where(k > 0, cumulative[rows, k - 1], 0.0)
+        price = self.prices[rows, k]
+        remaining = target - before
+        if in_usdc:
+            cost = target
+            partial = np.divide(
+                remaining, price, out=np.zeros_like(remaining), where=price > 0
+            )
+            size = np.where(k > 0, self.cum_sizes[rows, k - 1], 0.0) + partial
+        else:
+            size = target
+            cost = np.where(k > 0, self.cum_costs[rows, k - 1], 0.0) + remaining * price
+
+        filled = size > 0
+        vwap = np.divide(cost, size, out=np.full_like(cost, np.nan), where=filled)
+        slippage = (vwap - self.best_price()) * (1.0 if self.side == BUY else -1.0)
+        return FillEstimate(
+            size=size,
+            cost=cost,
+            vwap=vwap,
+            worst_price=np.where(filled, price, np.nan),
+            slippage=slippage,
+            complete=amounts <= cumulative[:, -1],
+        )
+
+    def size_within(self, limit_price) -> "tuple[np.ndarray, np.ndarray]":
+        """
+        Largest order each book takes without trading through `limit_price` (a
+        scalar or one per book): (shares, usdc cost) at or better than the limit.
+        """
+        limit = np.broadcast_to(np.asarray(limit_price, dtype=np.float64), len(self))
+        if self.side == BUY:
+            inside = self.prices <= limit[:, None]
+        else:
+            inside = self.prices >= limit[:, None]
+        inside &= self.sizes > 0
+        # levels are sorted, so the levels inside the limit are a prefix
+        k = inside.sum(axis=1)
+        rows = np.arange(len(self))
+        shares = np.where(k > 0, self.cum_sizes[rows, k - 1], 0.0)
+        cost = np.where(k > 0, self.cum_costs[rows, k - 1], 0.0)
+        return shares, cost
+
+    def size_within_slippage(self, max_slippage) -> "tuple[np.ndarray, np.ndarray]":
+        """Same as size_within, with the limit set `max_slippage` off the best price."""
+        offset = np.asarray(max_slippage, dtype=np.float64)
+        if self.side == BUY:
+            return self.size_within(self.best_price() + offset)
+        return self.size_within(self.best_price() - offset)
@@ -0,0 +1,152 @@
+# batched on-chain reads through Multicall3
+# https://github.com/mds1/multicall
+
+import threading
+import time
+
+from eth_abi import decode
+from eth_utils.abi import collapse_if_tuple
+from web3 import Web3
+from web3.contract.contract import ContractFunction
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+
+# deployed at the same address on Polygon and most other chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    }
+]
+
+
+class ChainStateReader:
+    """
+    Reads view functions in one Multicall3 `aggregate3` round trip, pinned to a
+    block, and caches the results until the chain moves to a new block. The block
+    number itself is polled at most every `block_time` seconds, so repeated reads
+    within a block cost no RPC at all. Chains without Multicall3 (e.g. a fresh
+    local node), or an aggregate3 call that fails, fall back to one eth_call per
+    read.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        multicall_address: str = MULTICALL3_ADDRESS,
+        block_time: float = 2.0,  # Polygon
+    ) -> None:
+        self.web3 = web3
+        self.multicall = web3.eth.contract(
+            address=Web3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI
+        )
+        self.block_time = block_time
+        self.calls = 0
+        self.hits = 0
+
+        self._lock = threading.Lock()
+        self._block = None
+        self._block_checked = 0.0
+        self._cache = {}
+        self._has_multicall = None
+
+    def block_number(self) -> int:
+        now = time.monotonic()
+        if self._block is None or now - self._block_checked >= self.block_time:
+            block = self.web3.eth.block_number
+            with self._lock:
+                if block != self._block:
+                    self._cache.clear()
+                self._block, self._block_checked = block, now
+        return self._block
+
+    def invalidate(self) -> None:
+        """Drop cached reads, e.g. after sending a transaction that changes them."""
+        with self._lock:
+            self._cache.clear()
+            self._block = None
+
+    def read(self, functions: "list[ContractFunction]") -> list:
+        """
+        Call every view function and return the decoded results in order (a
+        single return value is unwrapped). Reads that revert come back as None;
+        RPC and network errors are raised, and nothing is cached for them.
+        """
+        block = self.block_number()
+        keys = [(f.address, f._encode_transaction_data()) for f in functions]
+        with self._lock:
+            cached = {key: self._cache[key] for key in keys if key in self._cache}
+        self.hits += len(cached)
+
+        missing = {key: f for key, f in zip(keys, functions) if key not in cached}
+        if missing:
+            raw = self._call(list(missing), block)
+            results = {
+                key: _decode(f, data) for (key, f), data in zip(missing.items(), raw)
+            }
+            with self._lock:
+                if block == self._block:
+                    self._cache.update(results)
+            cached.update(results)
+        return [cached[key] for key in keys]
+
+    def _call(self, keys: "list[tuple[str, str]]", block: int) -> "list[bytes]":
+        self.calls += 1
+        if self._has_multicall is None:
+            self._has_multicall = (
+                len(self.web3.eth.get_code(self.multicall.address)) > 0
+            )
+        if len(keys) > 1 and self._has_multicall:
+            try:
+                results = self.multicall.functions.aggregate3(
+                    [(target, True, data) for target, data in keys]
+                ).call(block_identifier=block)
+                return [data if success else None for success, data in results]
+            except (ContractLogicError, BadFunctionCallOutput) as e:
+                print(f"aggregate3 failed ({e}), reading {len(keys)} calls one by one")
+
+        raw = []
+        for target, data in keys:
+            try:
+                raw.append(
+                    self.web3.eth.call(
+                        {"to": target, "data": data}, block_identifier=block
+                    )
+                )
+            except ContractLogicError as e:
+                print(f"eth_call to {target} reverted: {e}")
+                raw.append(None)
+        return raw
+
+
+def _decode(function: ContractFunction, data: bytes):
+    if not data:
+        return None
+    types = [collapse_if_tuple(output) for output in function.abi["outputs"]]
+    values = decode(types, data)
+    return values[0] if len(values) == 1 else values
@@ -1,15 +1,61 @@
-import httpx
+import asyncio
 import json
+from typing import Iterator
 
-from agents.polymarket.polymarket import Polymarket
+from pydantic import TypeAdapter, ValidationError
+
+from agents.polymarket.snapshot import SnapshotStore
 from agents.utils.objects import Market, PolymarketEvent, ClobReward, Tag
+from agents.utils.stream import iter_json_array
+from agents.utils.transport import HttpTransport, get_transport
+
+_model_defaults = {}
+_list_adapters = {}
+
+
+def construct_trusted(model, values: dict):
+    """
+    Build a pydantic model without validation. Same result as model_construct for
+    our all-optional models, but without its per-field python loop.
+    """
+    if model not in _model_defaults:
+        _model_defaults[model] = (
+            {
+                name: field.get_default(call_default_factory=True)
+                for name, field in model.model_fields.items()
+            },
+            # private attributes (e.g. `_sync`) start at their defaults, as in
+            # model_construct; ours are all None, so a shallow copy will do
+            {
+                name: attribute.get_default()
+                for name, attribute in model.__private_attributes__.items()
+            },
+        )
+    defaults, private = _model_defaults[model]
+    fields = {key: value for key, value in values.items() if key in defaults}
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", {**defaults, **fields})
+    object.__setattr__(instance, "__pydantic_fields_set__", set(fields))
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", dict(private) or None)
+    return instance
 
 
 class GammaMarketClient:
-    def __init__(self):
-        self.gamma_url = "https://gamma-api.polymarket.com"
+    def __init__(
+        self,
+        gamma_url="https://gamma-api.polymarket.com",
+        concurrency=8,
+        transport: HttpTransport = None,
+        snapshot_store: SnapshotStore = None,
+    ):
+        self.gamma_url = gamma_url
         self.gamma_markets_endpoint = self.gamma_url + "/markets"
         self.gamma_events_endpoint = self.gamma_url + "/events"
+        # max number of /markets pages requested at once by the async fetchers
+        self.concurrency = concurrency
+        self.transport = transport or get_transport()
+        self.snapshot_store = snapshot_store or SnapshotStore.from_env()
 
     def parse_pydantic_market(self, market_object: dict) -> Market:
         try:
@@ -42,10 +88,8 @@ class GammaMarketClient:
 
     # Event parser for events nested under a markets api response
     def parse_nested_event(self, event_object: dict()) -> PolymarketEvent:
-        print("[parse_nested_event] called with:", event_object)
         try:
             if "tags" in event_object:
-                print("tags here", event_object["tags"])
                 tags: list[Tag] = []
                 for tag in event_object["tags"]:
                     tags.append(Tag(**tag))
@@ -59,7 +103,6 @@ class GammaMarketClient:
     def parse_pydantic_event(self, event_object: dict) -> PolymarketEvent:
         try:
             if "tags" in event_object:
-                print("tags here", event_object["tags"])
                 tags: list[Tag] = []
                 for tag in event_object["tags"]:
                     tags.append(Tag(**tag))
@@ -68,6 +111,76 @@ class GammaMarketClient:
         except Exception as err:
             print(f"[parse_event] Caught exception: {err}")
 
+    def parse_pydantic_markets(
+        self, market_objects: "list[dict]", trusted=False
+    ) -> "list[Market]":
+        """
+        Bulk version of parse_pydantic_market. Invalid objects are skipped and
+        reported in a single line. With `trusted=True` validation is skipped
+        entirely, which is only safe for known-good payloads such as snapshots
+        written from model_dump(): apart from the id and the stringified lists,
+        values are stored as they are.
+        """
+        market_objects = [self._decode_market_fields(m) for m in market_objects]
+        if trusted:
+            return [self._construct_market(m) for m in market_objects]
+        return self._validate_batch(Market, market_objects)
+
+    def parse_pydantic_events(
+        self, event_objects: "list[dict]", trusted=False
+    ) -> "list[PolymarketEvent]":
+        if trusted:
+            return [self._construct_event(e) for e in event_objects]
+        return self._validate_batch(PolymarketEvent, event_objects)
+
+    def _validate_batch(self, model, objects: "list[dict]"):
+        # the whole list in one call into pydantic-core, and only if some object
+        # is invalid, one call per object to skip just the bad ones
+        adapter = _list_adapters.get(model)
+        if adapter is None:
+            adapter = _list_adapters[model] = TypeAdapter(list[model])
+        try:
+            return adapter.validate_python(objects)
+        except ValidationError:
+            pass
+        parsed, failed = [], 0
+        for obj in objects:
+            try:
+                parsed.append(model.model_validate(obj))
+            except ValidationError:
+                failed += 1
+        if failed:
+            print(f"[parse_batch] skipped {failed} invalid {model.__name__} objects")
+        return parsed
+
+    def _decode_market_fields(self, market_object: dict) -> dict:
+        # same stringified-list fields as in parse_pydantic_market, without mutating
+        market_object = dict(market_object)
+        for key in ("outcomePrices", "clobTokenIds"):
+            if isinstance(market_object.get(key), str):
+                market_object[key] = json.loads(market_object[key])
+        return market_object
+
+    def _construct_market(self, market_object: dict) -> Market:
+        market_object["id"] = int(market_object["id"])
+        if market_object.get("clobRewards"):
+            market_object["clobRewards"] = [
+                construct_trusted(ClobReward, r) for r in market_object["clobRewards"]
+            ]
+        if market_object.get("events"):
+            market_object["events"] = [
+                self._construct_event(e) for e in market_object["events"]
+            ]
+        return construct_trusted(Market, market_object)
+
+    def _construct_event(self, event_object: dict) -> PolymarketEvent:
+        event_object = dict(event_object)
+        if event_object.get("tags"):
+            event_object["tags"] = [
+                construct_trusted(Tag, t) for t in event_object["tags"]
+            ]
+        return construct_trusted(PolymarketEvent, event_object)
+
     def get_markets(
         self, querystring_params={}, parse_pydantic=False, local_file_path=None
     ) -> "list[Market]":
@@ -76,7 +189,9 @@ class GammaMarketClient:
                 'Cannot use "parse_pydantic" and "local_file" params simultaneously.'
             )
 
-        response = httpx.get(self.gamma_markets_endpoint, params=querystring_params)
+        response = self.transport.get(
+            self.gamma_markets_endpoint, params=querystring_params
+        )
         if response.status_code == 200:
             data = response.json()
             if local_file_path is not None:
@@ -85,14 +200,38 @@ class GammaMarketClient:
             elif not parse_pydantic:
                 return data
             else:
-                markets: list[Market] = []
-                for market_object in data:
-                    markets.append(self.parse_pydantic_market(market_object))
-                return markets
+                return self.parse_pydantic_markets(data)
         else:
             print(f"Error response returned from api: HTTP {response.status_code}")
             raise Exception()
 
+    def iter_markets(
+        self, querystring_params={}, parse_pydantic=False, page_size=100
+    ) -> "Iterator[Market]":
+        """
+        Lazily walk /markets page by page, yielding each market as soon as it has
+        been read off the response stream instead of loading whole pages first.
+        """
+        offset = querystring_params.get("offset", 0)
+        while True:
+            params = {**querystring_params, "limit": page_size, "offset": offset}
+            count = 0
+            with self.transport.stream(self.gamma_markets_endpoint, params) as response:
+                if response.status_code != 200:
+                    print(
+                        f"Error response returned from api: HTTP {response.status_code}"
+                    )
+                    raise Exception()
+                for market_object in iter_json_array(response.iter_text()):
+                    count += 1
+                    if parse_pydantic:
+                        yield self.parse_pydantic_market(market_object)
+                    else:
+                        yield market_object
+            if count < page_size:
+                return
+            offset += page_size
+
     def get_events(
         self, querystring_params={}, parse_pydantic=False, local_file_path=None
     ) -> "list[PolymarketEvent]":
@@ -101,7 +240,9 @@ class GammaMarketClient:
                 'Cannot use "parse_pydantic" and "local_file" params simultaneously.'
             )
 
-        response = httpx.get(self.gamma_events_endpoint, params=querystring_params)
+        response = self.transport.get(
+            self.gamma_events_endpoint, params=querystring_params
+        )
         if response.status_code == 200:
             data = response.json()
             if local_file_path is not None:
@@ -110,10 +251,7 @@ class GammaMarketClient:
             elif not parse_pydantic:
                 return data
             else:
-                events: list[PolymarketEvent] = []
-                for market_event_obj in data:
-                    events.append(self.parse_event(market_event_obj))
-                return events
+                return self.parse_pydantic_events(data)
         else:
             raise Exception()
 
@@ -133,26 +271,157 @@ class GammaMarketClient:
             }
         )
 
-    def get_all_current_markets(self, limit=100) -> "list[Market]":
-        offset = 0
+    def get_all_current_markets(self, limit=100, concurrency=None) -> "list[Market]":
+        def fetch_all() -> "list[Market]":
+            return self.transport.run(
+                self.get_all_current_markets_async(limit=limit, concurrency=concurrency)
+            )
+
+        if self.snapshot_store is None:
+            return fetch_all()
+
+        self.snapshot_store.refresh(
+            "markets",
+            fetch_page=lambda params: self.get_markets(querystring_params=params),
+            full_fetch=fetch_all,
+            page_size=limit,
+        )
+        return self.snapshot_store.load("markets")
+
+    async def get_all_current_markets_async(
+        self, limit=100, concurrency=None
+    ) -> "list[Market]":
+        """
+        Fetch every active market by probing the size of the universe first and then
+        requesting all of the offset windows concurrently, at most `concurrency` at a
+        time. Pages are reassembled in offset order, so the result matches the one of
+        a serial walk over /markets.
+        """
+        params = {"active": True, "closed": False, "archived": False}
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def fetch_page(offset: int, page_limit: int) -> "list[dict]":
+            async with semaphore:
+                response = await self.transport.aget(
+                    self.gamma_markets_endpoint,
+                    params={**params, "limit": page_limit, "offset": offset},
+                )
+            if response.status_code != 200:
+                print(f"Error response returned from api: HTTP {response.status_code}")
+                raise Exception()
+            return response.json()
+
+        page_count = await self._probe_page_count(
+            fetch_page, limit, concurrency or self.concurrency
+        )
+        offsets = range(0, page_count * limit, limit)
+        pages = await asyncio.gather(*[fetch_page(offset, limit) for offset in offsets])
+
         all_markets = []
-        while True:
-            params = {
-                "active": True,
-                "closed": False,
-                "archived": False,
-                "limit": limit,
-                "offset": offset,
-            }
-            market_batch = self.get_markets(querystring_params=params)
-            all_markets.extend(market_batch)
+        for page in pages:
+            all_markets.extend(page)
 
-            if len(market_batch) < limit:
-                break
+        # markets listed between the probe and the fetch: keep walking serially
+        offset = len(offsets) * limit
+        while pages and len(pages[-1]) == limit:
+            pages = [await fetch_page(offset, limit)]
+            all_markets.extend(pages[-1])
             offset += limit
 
         return all_markets
 
+    async def _probe_page_count(self, fetch_page, limit: int, fanout: int) -> int:
+        # Gamma does not return a total count, so look for the first empty page with
+        # single-item requests, `fanout` of them per round trip: gallop over page
+        # indexes 0, 1, 3, 7, ... until one comes back empty, then narrow the bracket.
+        async def probe(pages: "list[int]") -> "list[bool]":
+            results = await asyncio.gather(*[fetch_page(p * limit, 1) for p in pages])
+            return [bool(result) for result in results]
+
+        # invariant: page `low` holds markets (or low == -1), page `high` is empty
+        low, high, exponent = -1, None, 0
+        while high is None:
+            pages = [2**e - 1 for e in range(exponent, exponent + fanout)]
+            found = await probe(pages)
+            if all(found):
+                low, exponent = pages[-1], exponent + fanout
+            else:
+                first_empty = found.index(False)
+                high = pages[first_empty]
+                if first_empty > 0:
+                    low = pages[first_empty - 1]
+
+        while high - low > 1:
+            step = (high - low) / (fanout + 1)
+            pages = sorted({low + max(1, int(step * i)) for i in range(1, fanout + 1)})
+            pages = [p for p in pages if p < high]
+            for page, has_markets in zip(pages, await probe(pages)):
+                if has_markets:
+                    low = page
+                else:
+                    high = page
+                    break
+        return high
+
+    def get_markets_by_ids(
+        self, market_ids: "list[str]", chunk_size=50, concurrency=None
+    ) -> "list[dict]":
+        return self.transport.run(
+            self.get_markets_by_ids_async(
+                market_ids, chunk_size=chunk_size, concurrency=concurrency
+            )
+        )
+
+    async def get_markets_by_ids_async(
+        self, market_ids: "list[str]", chunk_size=50, concurrency=None
+    ) -> "list[dict]":
+        """
+        Hydrate many markets at once: ids are de-duplicated and requested `chunk_size`
+        at a time with multi-id /markets queries, `concurrency` queries in flight.
+        Markets come back in the order their id was first seen.
+        """
+        unique_ids = list(dict.fromkeys(str(market_id) for market_id in market_ids))
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def fetch_chunk(chunk: "list[str]") -> "list[dict]":
+            params = [("id", market_id) for market_id in chunk]
+            params.append(("limit", len(chunk)))
+            async with semaphore:
+                response = await self.transport.aget(
+                    self.gamma_markets_endpoint, params=params
+                )
+            if response.status_code != 200:
+                print(f"Error response returned from api: HTTP {response.status_code}")
+                raise Exception()
+            return response.json()
+
+        async def fetch_one(market_id: str) -> dict:
+            async with semaphore:
+                response = await self.transport.aget(
+                    self.gamma_markets_endpoint + "/" + market_id
+                )
+            return response.json() if response.status_code == 200 else None
+
+        chunks = [
+            unique_ids[i : i + chunk_size]
+            for i in range(0, len(unique_ids), chunk_size)
+        ]
+        markets_by_id = {}
+        for page in await asyncio.gather(*[fetch_chunk(chunk) for chunk in chunks]):
+            for market in page:
+                markets_by_id[str(market["id"])] = market
+
+        # the list endpoint may leave some ids out, look those up one by one
+        missing_ids = [i for i in unique_ids if i not in markets_by_id]
+        for market_id, market in zip(
+            missing_ids,
+            await asyncio.gather(*[fetch_one(market_id) for market_id in missing_ids]),
+        ):
+            if market is not None:
+                markets_by_id[market_id] = market
+
+        return [markets_by_id[i] for i in unique_ids if i in markets_by_id]
+
     def get_current_events(self, limit=4) -> "list[PolymarketEvent]":
         return self.get_events(
             querystring_params={
@@ -177,11 +446,13 @@ class GammaMarketClient:
     def get_market(self, market_id: int) -> dict():
         url = self.gamma_markets_endpoint + "/" + str(market_id)
         print(url)
-        response = httpx.get(url)
+        response = self.transport.get(url)
         return response.json()
 
 
 if __name__ == "__main__":
+    from agents.polymarket.polymarket import Polymarket
+
     gamma = GammaMarketClient()
     market = gamma.get_market("253123")
     poly = Polymarket()
@@ -0,0 +1,234 @@
+# local L2 order books maintained from the CLOB market channel
+# https://docs.polymarket.com/#market-channel
+
+import json
+from array import array
+from bisect import bisect_left
+
+from py_clob_client.clob_types import OrderBookSummary, OrderSummary
+
+BUY = "BUY"
+SELL = "SELL"
+
+market_channel_url = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+
+
+class PriceLevels:
+    """
+    One side of a book as two parallel arrays (prices ascending, sizes). Lookups
+    are a binary search, the best level is an index away.
+    """
+
+    def __init__(self) -> None:
+        self.prices = array("d")
+        self.sizes = array("d")
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def set(self, price: float, size: float) -> None:
+        i = bisect_left(self.prices, price)
+        found = i < len(self.prices) and self.prices[i] == price
+        if size <= 0:
+            if found:
+                del self.prices[i]
+                del self.sizes[i]
+        elif found:
+            self.sizes[i] = size
+        else:
+            self.prices.insert(i, price)
+            self.sizes.insert(i, size)
+
+    def size_at(self, price: float) -> float:
+        i = bisect_left(self.prices, price)
+        if i < len(self.prices) and self.prices[i] == price:
+            return self.sizes[i]
+        return 0.0
+
+    def replace(self, levels: "list[tuple[float, float]]") -> None:
+        levels = sorted((p, s) for p, s in levels if s > 0)
+        self.prices = array("d", [p for p, _ in levels])
+        self.sizes = array("d", [s for _, s in levels])
+
+
+class L2Book:
+    def __init__(self, asset_id: str, market: str = None) -> None:
+        self.asset_id = asset_id
+        self.market = market
+        self.hash = None
+        self.bids = PriceLevels()
+        self.asks = PriceLevels()
+
+    def apply_snapshot(self, bids, asks, hash: str = None) -> None:
+        self.bids.replace([_level(level) for level in bids])
+        self.asks.replace([_level(level) for level in asks])
+        self.hash = hash
+
+    def apply_change(self, side: str, price, size) -> None:
+        levels = self.bids if side == BUY else self.asks
+        levels.set(float(price), float(size))
+
+    def best_bid(self) -> "tuple[float, float]":
+        if not self.bids:
+            return None
+        return self.bids.prices[-1], self.bids.sizes[-1]
+
+    def best_ask(self) -> "tuple[float, float]":
+        if not self.asks:
+            return None
+        return self.asks.prices[0], self.asks.sizes[0]
+
+    def mid(self) -> float:
+        if not self.bids or not self.asks:
+            return None
+        return (self.bids.prices[-1] + self.asks.prices[0]) / 2
+
+    def spread(self) -> float:
+        if not self.bids or not self.asks:
+            return None
+        return self.asks.prices[0] - self.bids.prices[-1]
+
+    def depth(self, side: str, levels: int = 10) -> "list[tuple[float, float]]":
+        """The best `levels` levels of one side, best first."""
+        if side == BUY:
+            start = max(0, len(self.bids) - levels)
+            return list(zip(self.bids.prices[start:], self.bids.sizes[start:]))[::-1]
+        return list(zip(self.asks.prices[:levels], self.asks.sizes[:levels]))
+
+    @classmethod
+    def from_summary(cls, summary: OrderBookSummary) -> "L2Book":
+        book = cls(summary.asset_id, summary.market)
+        book.apply_snapshot(summary.bids or [], summary.asks or [], summary.hash)
+        return book
+
+    def to_summary(self) -> OrderBookSummary:
+        # same level order as the CLOB returns: bids and asks both worst to best
+        return OrderBookSummary(
+            market=self.market,
+            asset_id=self.asset_id,
+            bids=[
+                OrderSummary(price=_format(p), size=_format(s))
+                for p, s in zip(self.bids.prices, self.bids.sizes)
+            ],
+            asks=[
+                OrderSummary(price=_format(p), size=_format(s))
+                for p, s in zip(self.asks.prices[::-1], self.asks.sizes[::-1])
+            ],
+            hash=self.hash,
+        )
+
+    def matches(self, bids, asks) -> bool:
+        """True if this book holds exactly the given snapshot levels."""
+        expected = L2Book(self.asset_id)
+        expected.apply_snapshot(bids, asks)
+        return (
+            self.bids.prices == expected.bids.prices
+            and self.bids.sizes == expected.bids.sizes
+            and self.asks.prices == expected.asks.prices
+            and self.asks.sizes == expected.asks.sizes
+        )
+
+
+def _level(level) -> "tuple[float, float]":
+    if isinstance(level, dict):
+        return float(level["price"]), float(level["size"])
+    if isinstance(level, OrderSummary):
+        return float(level.price), float(level.size)
+    return float(level[0]), float(level[1])
+
+
+def _format(value: float) -> str:
+    return f"{value:g}"
+
+
+class OrderBookEngine:
+    """
+    Keeps an L2Book per token up to date from market channel messages, either
+    live or replayed from a JSON-lines feed file.
+    """
+
+    def __init__(self) -> None:
+        self.books: "dict[str, L2Book]" = {}
+        self.mismatches: "list[dict]" = []
+
+    def book(self, asset_id: str) -> L2Book:
+        if asset_id not in self.books:
+            self.books[asset_id] = L2Book(asset_id)
+        return self.books[asset_id]
+
+    def seed(self, summaries: "list[OrderBookSummary]") -> None:
+        for summary in summaries:
+            self.books[summary.asset_id] = L2Book.from_summary(summary)
+
+    def apply(self, message, check_snapshots: bool = False) -> None:
+        """
+        Apply one market channel message (or a list of them). With
+        `check_snapshots`, every `book` message for a token that is already tracked
+        is first compared with the locally maintained state and any difference is
+        recorded in `mismatches`.
+        """
+        if isinstance(message, list):
+            for event in message:
+                self.apply(event, check_snapshots)
+            return
+
+        event_type = message.get("event_type")
+        if event_type == "book":
+            asset_id = message["asset_id"]
+            bids = message.get("bids", message.get("buys", []))
+            asks = message.get("asks", message.get("sells", []))
+            if check_snapshots and asset_id in self.books:
+                if not self.books[asset_id].matches(bids, asks):
+                    self.mismatches.append(
+                        {"asset_id": asset_id, "timestamp": message.get("timestamp")}
+                    )
+            book = self.book(asset_id)
+            book.market = message.get("market", book.market)
+            book.apply_snapshot(bids, asks, message.get("hash"))
+        elif event_type == "price_change":
+            # older messages carry one asset and a "changes" list, newer ones a
+            # "price_changes" list with the asset on every entry
+            for change in message.get("price_changes", message.get("changes", [])):
+                asset_id = change.get("asset_id", message.get("asset_id"))
+                self.book(asset_id).apply_change(
+                    change["side"], change["price"], change["size"]
+                )
+
+    def replay(self, file_path: str, check_snapshots: bool = True) -> int:
+        """Apply every message of a JSON-lines feed file, return how many were read."""
+        count = 0
+        with open(file_path) as feed:
+            for line in feed:
+                if line.strip():
+                    self.apply(json.loads(line), check_snapshots)
+                    count += 1
+        return count
+
+    def subscribe(self, asset_ids: "list[str]", record_path: str = None) -> None:
+        """
+        Follow the live market channel for `asset_ids`, blocking. With
+        `record_path`, every raw message is also appended there for later replay.
+        """
+        import websocket
+
+        record = open(record_path, "a") if record_path else None
+
+        def on_open(ws) -> None:
+            ws.send(json.dumps({"assets_ids": asset_ids, "type": "market"}))
+
+        def on_message(ws, raw: str) -> None:
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                return  # keepalive frames
+            if record:
+                record.write(json.dumps(message) + "\n")
+            self.apply(message)
+
+        try:
+            websocket.WebSocketApp(
+                market_channel_url, on_open=on_open, on_message=on_message
+            ).run_forever()
+        finally:
+            if record:
+                record.close()
@@ -0,0 +1,407 @@
+# paper trading: the Polymarket order interface, matched in process
+# against cached or replayed order books, with no funds at risk
+
+import ast
+import itertools
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+
+from py_clob_client.clob_types import OrderArgs, OrderBookSummary, OrderType
+
+from agents.polymarket.orderbook import BUY, SELL, L2Book, OrderBookEngine
+from agents.polymarket.positions import PositionLedger
+
+BOOK = "book"  # resting liquidity taken from the order book snapshots
+PAPER = "paper"  # our own orders
+
+
+class RestingOrder:
+    __slots__ = ("id", "token_id", "side", "price", "size", "matched", "owner")
+
+    def __init__(self, id, token_id, side, price, size, owner=PAPER) -> None:
+        self.id = id
+        self.token_id = token_id
+        self.side = side
+        self.price = price
+        self.size = size  # remaining, 0 once filled or canceled
+        self.matched = 0.0
+        self.owner = owner
+
+
+class PaperBook:
+    """
+    One token's book as FIFO queues of resting orders per price level, matched
+    with price-time priority. Canceled orders are zeroed in place and dropped
+    when they reach the front of their queue.
+    """
+
+    def __init__(self, token_id: str, market: str = None) -> None:
+        self.token_id = token_id
+        self.market = market
+        self.levels = {BUY: {}, SELL: {}}  # side -> {price: deque[RestingOrder]}
+        self.prices = {BUY: [], SELL: []}  # side -> ascending prices
+
+    def add(self, order: RestingOrder) -> None:
+        levels = self.levels[order.side]
+        queue = levels.get(order.price)
+        if queue is None:
+            queue = levels[order.price] = deque()
+            insort(self.prices[order.side], order.price)
+        queue.append(order)
+
+    def best(self, side: str) -> "tuple[float, deque]":
+        """Best live level of `side` as (price, queue), or None."""
+        prices, levels = self.prices[side], self.levels[side]
+        while prices:
+            price = prices[-1] if side == BUY else prices[0]
+            queue = levels[price]
+            while queue and queue[0].size <= 0:
+                queue.popleft()
+            if queue:
+                return price, queue
+            del levels[price]
+            prices.pop(-1 if side == BUY else 0)
+        return None
+
+    def crossing(self, side: str, limit: float) -> "list[float]":
+        """Opposite side prices an incoming order at `limit` can take, best first."""
+        prices = self.prices[SELL if side == BUY else BUY]
+        if side == BUY:
+            return prices[: bisect_left(prices, limit + 1e-9)]
+        return prices[bisect_left(prices, limit - 1e-9) :][::-1]
+
+    def available(self, side: str, limit: float, usdc: bool = False) -> float:
+        """Shares (or usdc) an incoming order could fill without crossing `limit`."""
+        levels = self.levels[SELL if side == BUY else BUY]
+        total = 0.0
+        for price in self.crossing(side, limit):
+            size = sum(order.size for order in levels[price])
+            total += size * price if usdc else size
+        return total
+
+    def match(self, side: str, limit: float, size: float = None, usdc: float = None):
+        """
+        Take liquidity for an incoming `side` order up to `size` shares, or `usdc`
+        worth of shares, at `limit` or better. Yields (maker, shares, price).
+        """
+        opposite = SELL if side == BUY else BUY
+        while (size is None or size > 1e-9) and (usdc is None or usdc > 1e-9):
+            best = self.best(opposite)
+            if best is None:
+                return
+            price, queue = best
+            if (side == BUY and price > limit + 1e-9) or (
+                side == SELL and price < limit - 1e-9
+            ):
+                return
+            maker = queue[0]
+            shares = maker.size
+            if size is not None:
+                shares = min(shares, size)
+                size -= shares
+            if usdc is not None:
+                shares = min(shares, usdc / price)
+                usdc -= shares * price
+            maker.size -= shares
+            maker.matched += shares
+            if maker.size <= 1e-9:
+                maker.size = 0.0
+                queue.popleft()
+            yield maker, shares, price
+
+    def replace_liquidity(self, book: L2Book) -> "list[RestingOrder]":
+        """
+        Swap in a new snapshot as the book's resting liquidity. Our own resting
+        orders are taken off and returned, oldest first, to be matched again.
+        """
+        own = [
+            order
+            for side in (BUY, SELL)
+            for queue in self.levels[side].values()
+            for order in queue
+            if order.owner == PAPER and order.size > 0
+        ]
+        self.levels = {BUY: {}, SELL: {}}
+        self.prices = {BUY: [], SELL: []}
+        self.market = book.market or self.market
+        for side, levels in ((BUY, book.bids), (SELL, book.asks)):
+            for price, size in zip(levels.prices, levels.sizes):
+                self.add(RestingOrder(None, self.token_id, side, price, size, BOOK))
+        return sorted(own, key=lambda order: int(order.id.rsplit("-", 1)[1]))
+
+
+class PaperPolymarket:
+    """
+    Drop-in for the order side of Polymarket (execute_order,
+    execute_market_order, place_orders, cancel_orders, balances and trades)
+    that never leaves the process. Books are seeded from `polymarket`'s cached
+    or locally maintained books on first use, or from `seed` / `replay`, and
+    then evolve with our own fills. BUYs are limited by the paper USDC balance
+    and SELLs by the shares held, like on the exchange.
+    """
+
+    def __init__(
+        self, polymarket=None, balance: float = 1000.0, fee_rate_bps: float = 0.0
+    ) -> None:
+        self.polymarket = polymarket
+        self.address = PAPER
+        self.fee_rate_bps = fee_rate_bps
+        self.balance = balance
+        self.shares: "dict[str, float]" = {}
+        self.reserved_balance = 0.0
+        self.reserved_shares: "dict[str, float]" = {}
+        self.books: "dict[str, PaperBook]" = {}
+        self.orders: "dict[str, RestingOrder]" = {}
+        self.trades: "list[dict]" = []
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def seed(self, books: "list[OrderBookSummary | L2Book | dict]") -> None:
+        with self._lock:
+            for book in books:
+                if isinstance(book, OrderBookSummary):
+                    book = L2Book.from_summary(book)
+                elif isinstance(book, dict):
+                    raw, book = book, L2Book(book["asset_id"], book.get("market"))
+                    book.apply_snapshot(raw.get("bids", []), raw.get("asks", []))
+                paper_book = self.books.get(book.asset_id)
+                if paper_book is None:
+                    paper_book = self.books[book.asset_id] = PaperBook(book.asset_id)
+                for order in paper_book.replace_liquidity(book):
+                    self._rematch(paper_book, order)
+
+    def replay(self, file_path: str) -> int:
+        """Seed books from a recorded market channel feed (OrderBookEngine.replay)."""
+        engine = OrderBookEngine()
+        count = engine.replay(file_path, check_snapshots=False)
+        self.seed(list(engine.books.values()))
+        return count
+
+    def book(self, token_id: str) -> PaperBook:
+        if token_id not in self.books and self.polymarket is not None:
+            source = self.polymarket.local_books.books.get(token_id)
+            if source is None:
+                source = self.polymarket.get_orderbooks([token_id])[0]
+            if source is not None:
+                self.seed([source])
+        book = self.books.get(token_id)
+        if book is None:
+            book = self.books[token_id] = PaperBook(token_id)
+        return book
+
+    def execute_order(self, price, size, side, token_id, order_type=OrderType.GTC):
+        return self.post_order(
+            OrderArgs(price=price, size=size, side=side, token_id=token_id),
+            order_type,
+        )
+
+    def execute_market_order(self, market, amount) -> dict:
+        token_id = ast.literal_eval(market[0].dict()["metadata"]["clob_token_ids"])[1]
+        resp = self.market_order(token_id, amount)
+        print(resp)
+        return resp
+
+    def market_order(self, token_id: str, amount: float, side: str = BUY) -> dict:
+        """FOK market order: `amount` usdc to spend for BUY, shares to sell for SELL."""
+        with self._lock:
+            book = self.book(token_id)
+            limit = 1.0 if side == BUY else 0.0
+            if side == BUY:
+                error = self._check_balance(amount)
+                if not error and book.available(BUY, limit, usdc=True) < amount - 1e-9:
+                    error = _fok_error
+                return self._submit(book, BUY, limit, None, amount, error)
+            error = self._check_shares(token_id, amount)
+            if not error and book.available(SELL, limit) < amount - 1e-9:
+                error = _fok_error
+            return self._submit(book, SELL, limit, amount, None, error)
+
+    def post_order(self, args: OrderArgs, order_type=OrderType.GTC) -> dict:
+        with self._lock:
+            book = self.book(args.token_id)
+            side = args.side.upper()
+            if side == BUY:
+                error = self._check_balance(args.price * args.size)
+            else:
+                error = self._check_shares(args.token_id, args.size)
+            if not error and order_type == OrderType.FOK:
+                if book.available(side, args.price) < args.size - 1e-9:
+                    error = _fok_error
+            return self._submit(
+                book,
+                side,
+                args.price,
+                args.size,
+                None,
+                error,
+                rest=order_type != OrderType.FOK,
+            )
+
+    def place_orders(
+        self, orders: "list[OrderArgs]", order_type: str = OrderType.GTC, **kwargs
+    ) -> "list[dict]":
+        """Results shaped like Polymarket.place_orders, one per order in order."""
+        results = []
+        for args in orders:
+            response = self.post_order(args, order_type)
+            results.append(
+                {
+                    "order": args,
+                    "success": response["success"],
+                    "response": response,
+                    "error": response["errorMsg"] or None,
+                }
+            )
+        return results
+
+    def cancel_orders(self, order_ids: "list[str]", **kwargs) -> dict:
+        canceled, not_canceled = [], {}
+        with self._lock:
+            for order_id in order_ids:
+                order = self.orders.pop(order_id, None)
+                if order is None:
+                    not_canceled[order_id] = "order not found or already done"
+                    continue
+                self._release(order, order.size)
+                order.size = 0.0
+                canceled.append(order_id)
+        return {"canceled": canceled, "not_canceled": not_canceled}
+
+    def get_usdc_balance(self) -> float:
+        return self.balance
+
+    def get_trades(self, after: int = None) -> "list[dict]":
+        with self._lock:
+            return [t for t in self.trades if after is None or t["match_time"] >= after]
+
+    def sync_positions(self, ledger: PositionLedger) -> int:
+        return ledger.apply_trades(self.get_trades(ledger.cursor or None), self.address)
+
+    def mark_positions(self, ledger: PositionLedger) -> dict:
+        marks = {}
+        with self._lock:
+            for position in ledger.open_positions():
+                best = self.book(position.asset_id).best(BUY)
+                if best is not None:
+                    marks[position.asset_id] = best[0]
+        return ledger.summary(marks)
+
+    def _check_balance(self, cost: float) -> str:
+        if cost > self.balance - self.reserved_balance + 1e-9:
+            return "not enough balance / allowance"
+        return ""
+
+    def _check_shares(self, token_id: str, size: float) -> str:
+        held = self.shares.get(token_id, 0.0) - self.reserved_shares.get(token_id, 0.0)
+        if size > held + 1e-9:
+            return "not enough balance / allowance"
+        return ""
+
+    def _submit(self, book, side, limit, size, usdc, error, rest=False) -> dict:
+        order_id = f"paper-{next(self._ids)}"
+        if error:
+            return _response(order_id, False, error, "unmatched", 0.0, 0.0, side)
+        shares = cost = 0.0
+        for maker, filled, price in book.match(side, limit, size, usdc):
+            self._fill(book, order_id, side, maker, filled, price)
+            shares += filled
+            cost += filled * price
+        status = "matched" if shares > 0 else "unmatched"
+
+        remaining = size - shares if size is not None else 0.0
+        if rest and remaining > 1e-9:
+            order = RestingOrder(order_id, book.token_id, side, limit, remaining)
+            order.matched = shares
+            self._reserve(order)
+            book.add(order)
+            self.orders[order_id] = order
+            status = "live"
+        return _response(order_id, True, "", status, shares, cost, side)
+
+    def _rematch(self, book: PaperBook, order: RestingOrder) -> None:
+        # our resting order against fresh liquidity, as the taker
+        self._release(order, order.size)
+        for maker, filled, price in book.match(order.side, order.price, order.size):
+            self._fill(book, order.id, order.side, maker, filled, price)
+            order.size -= filled
+            order.matched += filled
+        if order.size > 1e-9:
+            self._reserve(order)
+            book.add(order)
+        else:
+            self.orders.pop(order.id, None)
+
+    def _fill(self, book, taker_id, side, maker, shares, price) -> None:
+        fee = shares * price * self.fee_rate_bps / 10000
+        self._settle(book.token_id, side, shares, price, fee)
+        trade = {
+            "taker_order_id": taker_id,
+            "market": book.market,
+            "asset_id": book.token_id,
+            "side": side,
+            "size": shares,
+            "price": price,
+            "fee_rate_bps": self.fee_rate_bps,
+            "status": "MATCHED",
+            "match_time": int(time.time()),
+        }
+        self.trades.append(
+            {"id": str(len(self.trades) + 1), **trade, "maker_orders": []}
+        )
+        if maker.owner == PAPER:
+            # we were the maker as well, the CLOB reports that as its own trade
+            self._release(maker, shares)
+            self._settle(book.token_id, maker.side, shares, price, 0.0)
+            if maker.size <= 0:
+                self.orders.pop(maker.id, None)
+            maker_order = {
+                "order_id": maker.id,
+                "maker_address": PAPER,
+                "matched_amount": shares,
+                "price": price,
+                "side": maker.side,
+                "asset_id": book.token_id,
+            }
+            self.trades.append(
+                {
+                    "id": str(len(self.trades) + 1),
+                    **trade,
+                    "maker_orders": [maker_order],
+                }
+            )
+
+    def _settle(self, token_id, side, shares, price, fee) -> None:
+        signed = shares if side == BUY else -shares
+        self.shares[token_id] = self.shares.get(token_id, 0.0) + signed
+        self.balance -= signed * price + fee
+
+    def _reserve(self, order: RestingOrder) -> None:
+        if order.side == BUY:
+            self.reserved_balance += order.size * order.price
+        else:
+            reserved = self.reserved_shares.get(order.token_id, 0.0)
+            self.reserved_shares[order.token_id] = reserved + order.size
+
+    def _release(self, order: RestingOrder, shares: float) -> None:
+        if order.side == BUY:
+            self.reserved_balance -= shares * order.price
+        else:
+            self.reserved_shares[order.token_id] -= shares
+
+
+_fok_error = "order couldn't be fully filled, FOK orders are fully filled or killed"
+
+
+def _response(order_id, success, error, status, shares, cost, side) -> dict:
+    # shaped like the CLOB's POST /order response
+    making, taking = (cost, shares) if side == BUY else (shares, cost)
+    return {
+        "success": success,
+        "errorMsg": error,
+        "orderID": order_id,
+        "status": status,
+        "makingAmount": f"{making:g}",
+        "takingAmount": f"{taking:g}",
+    }
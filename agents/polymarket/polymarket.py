@@ -5,21 +5,18 @@ import os
 import pdb
 import time
 import ast
+import asyncio
 import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cached_property
+from typing import Iterator
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv
 
-from web3 import Web3
-from web3.constants import MAX_INT
-from web3.middleware import geth_poa_middleware
-
 import httpx
-from py_clob_client.client import ClobClient
 from py_clob_client.clob_types import ApiCreds
 from py_clob_client.constants import AMOY, POLYGON
-from py_order_utils.builders import OrderBuilder
-from py_order_utils.model import OrderData
-from py_order_utils.signer import Signer
 from py_clob_client.clob_types import (
     OrderArgs,
     MarketOrderArgs,
@@ -27,168 +24,165 @@ from py_clob_client.clob_types import (
     OrderBookSummary,
 )
 from py_clob_client.order_builder.constants import BUY
+from py_clob_client.utilities import parse_raw_orderbook_summary
 
+from agents.polymarket.analytics import BookDepth, FillEstimate
+from agents.polymarket.orderbook import L2Book, OrderBookEngine
+from agents.polymarket.positions import PositionLedger
+from agents.polymarket.snapshot import SnapshotStore
+from agents.utils.cache import TTLCache
 from agents.utils.objects import SimpleMarket, SimpleEvent
+from agents.utils.stream import iter_json_array
+from agents.utils.tracing import rpc_tracing_middleware
+from agents.utils.transport import HttpTransport, get_transport
 
 load_dotenv()
 
 
 class Polymarket:
-    def __init__(self) -> None:
+    def __init__(
+        self, transport: HttpTransport = None, snapshot_store: SnapshotStore = None
+    ) -> None:
+        self.transport = transport or get_transport()
+        self.snapshot_store = snapshot_store or SnapshotStore.from_env()
+
         self.gamma_url = "https://gamma-api.polymarket.com"
         self.gamma_markets_endpoint = self.gamma_url + "/markets"
         self.gamma_events_endpoint = self.gamma_url + "/events"
 
-        self.clob_url = "https://clob.polymarket.com"
+        self.clob_url = os.getenv("CLOB_API_URL", "https://clob.polymarket.com")
         self.clob_auth_endpoint = self.clob_url + "/auth/api-key"
+        self.clob_books_endpoint = self.clob_url + "/books"
+        self.clob_prices_endpoint = self.clob_url + "/prices"
+
+        # books and prices are reused for a few hundred ms, i.e. within one decision
+        self.book_cache = TTLCache(ttl=float(os.getenv("ORDERBOOK_TTL_MS", 500)) / 1000)
+        self.price_cache = TTLCache(ttl=self.book_cache.ttl)
+        # incrementally maintained books, fed by the market channel
+        self.local_books = OrderBookEngine()
 
         self.chain_id = 137  # POLYGON
         self.private_key = os.getenv("POLYGON_WALLET_PRIVATE_KEY")
         self.polygon_rpc = "https://polygon-rpc.com"
-        self.w3 = Web3(Web3.HTTPProvider(self.polygon_rpc))
 
         self.exchange_address = "0x4bfb41d5b3570defd03c39a9a4d8de6bd8b8982e"
         self.neg_risk_exchange_address = "0xC5d563A36AE78145C45a50134d48A1215220f80a"
 
         self.erc20_approve = """[{"anonymous":false,"inputs":[{"indexed":true,"internalType":"address","name":"owner","type":"address"},{"indexed":true,"internalType":"address","name":"spender","type":"address"},{"indexed":false,"internalType":"uint256","name":"value","type":"uint256"}],"name":"Approval","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"address","name":"authorizer","type":"address"},{"indexed":true,"internalType":"bytes32","name":"nonce","type":"bytes32"}],"name":"AuthorizationCanceled","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"address","name":"authorizer","type":"address"},{"indexed":true,"internalType":"bytes32","name":"nonce","type":"bytes32"}],"name":"AuthorizationUsed","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"address","name":"account","type":"address"}],"name":"Blacklisted","type":"event"},{"anonymous":false,"inputs":[{"indexed":false,"internalType":"address","name":"userAddress","type":"address"},{"indexed":false,"internalType":"address payable","name":"relayerAddress","type":"address"},{"indexed":false,"internalType":"bytes","name":"functionSignature","type":"bytes"}],"name":"MetaTransactionExecuted","type":"event"},{"anonymous":false,"inputs":[],"name":"Pause","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"address","name":"newRescuer","type":"address"}],"name":"RescuerChanged","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"bytes32","name":"role","type":"bytes32"},{"indexed":true,"internalType":"bytes32","name":"previousAdminRole","type":"bytes32"},{"indexed":true,"internalType":"bytes32","name":"newAdminRole","type":"bytes32"}],"name":"RoleAdminChanged","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"bytes32","name":"role","type":"bytes32"},{"indexed":true,"internalType":"address","name":"account","type":"address"},{"indexed":true,"internalType":"address","name":"sender","type":"address"}],"name":"RoleGranted","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"bytes32","name":"role","type":"bytes32"},{"indexed":true,"internalType":"address","name":"account","type":"address"},{"indexed":true,"internalType":"address","name":"sender","type":"address"}],"name":"RoleRevoked","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"address","name":"from","type":"address"},{"indexed":true,"internalType":"address","name":"to","type":"address"},{"indexed":false,"internalType":"uint256","name":"value","type":"uint256"}],"name":"Transfer","type":"event"},{"anonymous":false,"inputs":[{"indexed":true,"internalType":"address","name":"account","type":"address"}],"name":"UnBlacklisted","type":"event"},{"anonymous":false,"inputs":[],"name":"Unpause","type":"event"},{"inputs":[],"name":"APPROVE_WITH_AUTHORIZATION_TYPEHASH","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"BLACKLISTER_ROLE","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"CANCEL_AUTHORIZATION_TYPEHASH","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"DECREASE_ALLOWANCE_WITH_AUTHORIZATION_TYPEHASH","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"DEFAULT_ADMIN_ROLE","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"DEPOSITOR_ROLE","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"DOMAIN_SEPARATOR","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"EIP712_VERSION","outputs":[{"internalType":"string","name":"","type":"string"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"INCREASE_ALLOWANCE_WITH_AUTHORIZATION_TYPEHASH","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"META_TRANSACTION_TYPEHASH","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"PAUSER_ROLE","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"PERMIT_TYPEHASH","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"RESCUER_ROLE","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"TRANSFER_WITH_AUTHORIZATION_TYPEHASH","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"WITHDRAW_WITH_AUTHORIZATION_TYPEHASH","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"owner","type":"address"},{"internalType":"address","name":"spender","type":"address"}],"name":"allowance","outputs":[{"internalType":"uint256","name":"","type":"uint256"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"spender","type":"address"},{"internalType":"uint256","name":"amount","type":"uint256"}],"name":"approve","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"owner","type":"address"},{"internalType":"address","name":"spender","type":"address"},{"internalType":"uint256","name":"value","type":"uint256"},{"internalType":"uint256","name":"validAfter","type":"uint256"},{"internalType":"uint256","name":"validBefore","type":"uint256"},{"internalType":"bytes32","name":"nonce","type":"bytes32"},{"internalType":"uint8","name":"v","type":"uint8"},{"internalType":"bytes32","name":"r","type":"bytes32"},{"internalType":"bytes32","name":"s","type":"bytes32"}],"name":"approveWithAuthorization","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"authorizer","type":"address"},{"internalType":"bytes32","name":"nonce","type":"bytes32"}],"name":"authorizationState","outputs":[{"internalType":"enum GasAbstraction.AuthorizationState","name":"","type":"uint8"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"account","type":"address"}],"name":"balanceOf","outputs":[{"internalType":"uint256","name":"","type":"uint256"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"account","type":"address"}],"name":"blacklist","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[],"name":"blacklisters","outputs":[{"internalType":"address[]","name":"","type":"address[]"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"authorizer","type":"address"},{"internalType":"bytes32","name":"nonce","type":"bytes32"},{"internalType":"uint8","name":"v","type":"uint8"},{"internalType":"bytes32","name":"r","type":"bytes32"},{"internalType":"bytes32","name":"s","type":"bytes32"}],"name":"cancelAuthorization","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[],"name":"decimals","outputs":[{"internalType":"uint8","name":"","type":"uint8"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"spender","type":"address"},{"internalType":"uint256","name":"subtractedValue","type":"uint256"}],"name":"decreaseAllowance","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"owner","type":"address"},{"internalType":"address","name":"spender","type":"address"},{"internalType":"uint256","name":"decrement","type":"uint256"},{"internalType":"uint256","name":"validAfter","type":"uint256"},{"internalType":"uint256","name":"validBefore","type":"uint256"},{"internalType":"bytes32","name":"nonce","type":"bytes32"},{"internalType":"uint8","name":"v","type":"uint8"},{"internalType":"bytes32","name":"r","type":"bytes32"},{"internalType":"bytes32","name":"s","type":"bytes32"}],"name":"decreaseAllowanceWithAuthorization","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"user","type":"address"},{"internalType":"bytes","name":"depositData","type":"bytes"}],"name":"deposit","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"userAddress","type":"address"},{"internalType":"bytes","name":"functionSignature","type":"bytes"},{"internalType":"bytes32","name":"sigR","type":"bytes32"},{"internalType":"bytes32","name":"sigS","type":"bytes32"},{"internalType":"uint8","name":"sigV","type":"uint8"}],"name":"executeMetaTransaction","outputs":[{"internalType":"bytes","name":"","type":"bytes"}],"stateMutability":"payable","type":"function"},{"inputs":[{"internalType":"bytes32","name":"role","type":"bytes32"}],"name":"getRoleAdmin","outputs":[{"internalType":"bytes32","name":"","type":"bytes32"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"bytes32","name":"role","type":"bytes32"},{"internalType":"uint256","name":"index","type":"uint256"}],"name":"getRoleMember","outputs":[{"internalType":"address","name":"","type":"address"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"bytes32","name":"role","type":"bytes32"}],"name":"getRoleMemberCount","outputs":[{"internalType":"uint256","name":"","type":"uint256"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"bytes32","name":"role","type":"bytes32"},{"internalType":"address","name":"account","type":"address"}],"name":"grantRole","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"bytes32","name":"role","type":"bytes32"},{"internalType":"address","name":"account","type":"address"}],"name":"hasRole","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"spender","type":"address"},{"internalType":"uint256","name":"addedValue","type":"uint256"}],"name":"increaseAllowance","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"owner","type":"address"},{"internalType":"address","name":"spender","type":"address"},{"internalType":"uint256","name":"increment","type":"uint256"},{"internalType":"uint256","name":"validAfter","type":"uint256"},{"internalType":"uint256","name":"validBefore","type":"uint256"},{"internalType":"bytes32","name":"nonce","type":"bytes32"},{"internalType":"uint8","name":"v","type":"uint8"},{"internalType":"bytes32","name":"r","type":"bytes32"},{"internalType":"bytes32","name":"s","type":"bytes32"}],"name":"increaseAllowanceWithAuthorization","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"string","name":"newName","type":"string"},{"internalType":"string","name":"newSymbol","type":"string"},{"internalType":"uint8","name":"newDecimals","type":"uint8"},{"internalType":"address","name":"childChainManager","type":"address"}],"name":"initialize","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[],"name":"initialized","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"account","type":"address"}],"name":"isBlacklisted","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"name","outputs":[{"internalType":"string","name":"","type":"string"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"owner","type":"address"}],"name":"nonces","outputs":[{"internalType":"uint256","name":"","type":"uint256"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"pause","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[],"name":"paused","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"pausers","outputs":[{"internalType":"address[]","name":"","type":"address[]"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"owner","type":"address"},{"internalType":"address","name":"spender","type":"address"},{"internalType":"uint256","name":"value","type":"uint256"},{"internalType":"uint256","name":"deadline","type":"uint256"},{"internalType":"uint8","name":"v","type":"uint8"},{"internalType":"bytes32","name":"r","type":"bytes32"},{"internalType":"bytes32","name":"s","type":"bytes32"}],"name":"permit","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"bytes32","name":"role","type":"bytes32"},{"internalType":"address","name":"account","type":"address"}],"name":"renounceRole","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"contract IERC20","name":"tokenContract","type":"address"},{"internalType":"address","name":"to","type":"address"},{"internalType":"uint256","name":"amount","type":"uint256"}],"name":"rescueERC20","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[],"name":"rescuers","outputs":[{"internalType":"address[]","name":"","type":"address[]"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"bytes32","name":"role","type":"bytes32"},{"internalType":"address","name":"account","type":"address"}],"name":"revokeRole","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[],"name":"symbol","outputs":[{"internalType":"string","name":"","type":"string"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"totalSupply","outputs":[{"internalType":"uint256","name":"","type":"uint256"}],"stateMutability":"view","type":"function"},{"inputs":[{"internalType":"address","name":"recipient","type":"address"},{"internalType":"uint256","name":"amount","type":"uint256"}],"name":"transfer","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"sender","type":"address"},{"internalType":"address","name":"recipient","type":"address"},{"internalType":"uint256","name":"amount","type":"uint256"}],"name":"transferFrom","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"from","type":"address"},{"internalType":"address","name":"to","type":"address"},{"internalType":"uint256","name":"value","type":"uint256"},{"internalType":"uint256","name":"validAfter","type":"uint256"},{"internalType":"uint256","name":"validBefore","type":"uint256"},{"internalType":"bytes32","name":"nonce","type":"bytes32"},{"internalType":"uint8","name":"v","type":"uint8"},{"internalType":"bytes32","name":"r","type":"bytes32"},{"internalType":"bytes32","name":"s","type":"bytes32"}],"name":"transferWithAuthorization","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"account","type":"address"}],"name":"unBlacklist","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[],"name":"unpause","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"string","name":"newName","type":"string"},{"internalType":"string","name":"newSymbol","type":"string"}],"name":"updateMetadata","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"uint256","name":"amount","type":"uint256"}],"name":"withdraw","outputs":[],"stateMutability":"nonpayable","type":"function"},{"inputs":[{"internalType":"address","name":"owner","type":"address"},{"internalType":"uint256","name":"value","type":"uint256"},{"internalType":"uint256","name":"validAfter","type":"uint256"},{"internalType":"uint256","name":"validBefore","type":"uint256"},{"internalType":"bytes32","name":"nonce","type":"bytes32"},{"internalType":"uint8","name":"v","type":"uint8"},{"internalType":"bytes32","name":"r","type":"bytes32"},{"internalType":"bytes32","name":"s","type":"bytes32"}],"name":"withdrawWithAuthorization","outputs":[],"stateMutability":"nonpayable","type":"function"}]"""
-        self.erc1155_set_approval = """[{"inputs": [{ "internalType": "address", "name": "operator", "type": "address" },{ "internalType": "bool", "name": "approved", "type": "bool" }],"name": "setApprovalForAll","outputs": [],"stateMutability": "nonpayable","type": "function"}]"""
+        self.erc1155_set_approval = """[{"inputs": [{ "internalType": "address", "name": "operator", "type": "address" },{ "internalType": "bool", "name": "approved", "type": "bool" }],"name": "setApprovalForAll","outputs": [],"stateMutability": "nonpayable","type": "function"},{"inputs": [{ "internalType": "address", "name": "account", "type": "address" },{ "internalType": "address", "name": "operator", "type": "address" }],"name": "isApprovedForAll","outputs": [{ "internalType": "bool", "name": "", "type": "bool" }],"stateMutability": "view","type": "function"}]"""
 
         self.usdc_address = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
         self.ctf_address = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
 
-        self.web3 = Web3(Web3.HTTPProvider(self.polygon_rpc))
-        self.web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        # CTF Exchange, Neg Risk CTF Exchange, Neg Risk Adapter
+        self.approval_spenders = [
+            "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E",
+            "0xC5d563A36AE78145C45a50134d48A1215220f80a",
+            "0xd91E80cF2E7be2e162c6513ceD06f1dD0dA35296",
+        ]
 
-        self.usdc = self.web3.eth.contract(
-            address=self.usdc_address, abi=self.erc20_approve
-        )
-        self.ctf = self.web3.eth.contract(
+        # web3, the CLOB client and the contracts are created on first use, so
+        # read-only paths never pay for those imports or the api key handshake
+        self._init_approvals(False)
+
+    @cached_property
+    def web3(self) -> "Web3":
+        from web3 import Web3
+        from web3.middleware import geth_poa_middleware
+
+        web3 = Web3(Web3.HTTPProvider(self.polygon_rpc))
+        web3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        web3.middleware_onion.add(rpc_tracing_middleware)
+        return web3
+
+    @cached_property
+    def w3(self) -> "Web3":
+        from web3 import Web3
+
+        return Web3(Web3.HTTPProvider(self.polygon_rpc))
+
+    @cached_property
+    def usdc(self):
+        return self.web3.eth.contract(address=self.usdc_address, abi=self.erc20_approve)
+
+    @cached_property
+    def ctf(self):
+        return self.web3.eth.contract(
             address=self.ctf_address, abi=self.erc1155_set_approval
         )
 
-        self._init_api_keys()
-        self._init_approvals(False)
+    @cached_property
+    def chain(self) -> "ChainStateReader":
+        from agents.polymarket.chain import ChainStateReader
 
-    def _init_api_keys(self) -> None:
-        self.client = ClobClient(
-            self.clob_url, key=self.private_key, chain_id=self.chain_id
-        )
-        self.credentials = self.client.create_or_derive_api_creds()
-        self.client.set_api_creds(self.credentials)
-        # print(self.credentials)
+        return ChainStateReader(self.web3)
+
+    @cached_property
+    def client(self) -> "ClobClient":
+        from py_clob_client.client import ClobClient
+
+        client = ClobClient(self.clob_url, key=self.private_key, chain_id=self.chain_id)
+        self.credentials = client.create_or_derive_api_creds()
+        client.set_api_creds(self.credentials)
+        return client
 
     def _init_approvals(self, run: bool = False) -> None:
         if not run:
             return
 
+        from web3.constants import MAX_INT
+
         priv_key = self.private_key
         pub_key = self.get_address_for_private_key()
         chain_id = self.chain_id
         web3 = self.web3
-        nonce = web3.eth.get_transaction_count(pub_key)
         usdc = self.usdc
         ctf = self.ctf
 
-        # CTF Exchange
-        raw_usdc_approve_txn = usdc.functions.approve(
-            "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E", int(MAX_INT, 0)
-        ).build_transaction({"chainId": chain_id, "from": pub_key, "nonce": nonce})
-        signed_usdc_approve_tx = web3.eth.account.sign_transaction(
-            raw_usdc_approve_txn, private_key=priv_key
-        )
-        send_usdc_approve_tx = web3.eth.send_raw_transaction(
-            signed_usdc_approve_tx.raw_transaction
-        )
-        usdc_approve_tx_receipt = web3.eth.wait_for_transaction_receipt(
-            send_usdc_approve_tx, 600
-        )
-        print(usdc_approve_tx_receipt)
-
-        nonce = web3.eth.get_transaction_count(pub_key)
-
-        raw_ctf_approval_txn = ctf.functions.setApprovalForAll(
-            "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E", True
-        ).build_transaction({"chainId": chain_id, "from": pub_key, "nonce": nonce})
-        signed_ctf_approval_tx = web3.eth.account.sign_transaction(
-            raw_ctf_approval_txn, private_key=priv_key
-        )
-        send_ctf_approval_tx = web3.eth.send_raw_transaction(
-            signed_ctf_approval_tx.raw_transaction
-        )
-        ctf_approval_tx_receipt = web3.eth.wait_for_transaction_receipt(
-            send_ctf_approval_tx, 600
-        )
-        print(ctf_approval_tx_receipt)
-
-        nonce = web3.eth.get_transaction_count(pub_key)
-
-        # Neg Risk CTF Exchange
-        raw_usdc_approve_txn = usdc.functions.approve(
-            "0xC5d563A36AE78145C45a50134d48A1215220f80a", int(MAX_INT, 0)
-        ).build_transaction({"chainId": chain_id, "from": pub_key, "nonce": nonce})
-        signed_usdc_approve_tx = web3.eth.account.sign_transaction(
-            raw_usdc_approve_txn, private_key=priv_key
-        )
-        send_usdc_approve_tx = web3.eth.send_raw_transaction(
-            signed_usdc_approve_tx.raw_transaction
-        )
-        usdc_approve_tx_receipt = web3.eth.wait_for_transaction_receipt(
-            send_usdc_approve_tx, 600
-        )
-        print(usdc_approve_tx_receipt)
-
-        nonce = web3.eth.get_transaction_count(pub_key)
-
-        raw_ctf_approval_txn = ctf.functions.setApprovalForAll(
-            "0xC5d563A36AE78145C45a50134d48A1215220f80a", True
-        ).build_transaction({"chainId": chain_id, "from": pub_key, "nonce": nonce})
-        signed_ctf_approval_tx = web3.eth.account.sign_transaction(
-            raw_ctf_approval_txn, private_key=priv_key
-        )
-        send_ctf_approval_tx = web3.eth.send_raw_transaction(
-            signed_ctf_approval_tx.raw_transaction
-        )
-        ctf_approval_tx_receipt = web3.eth.wait_for_transaction_receipt(
-            send_ctf_approval_tx, 600
-        )
-        print(ctf_approval_tx_receipt)
-
-        nonce = web3.eth.get_transaction_count(pub_key)
-
-        # Neg Risk Adapter
-        raw_usdc_approve_txn = usdc.functions.approve(
-            "0xd91E80cF2E7be2e162c6513ceD06f1dD0dA35296", int(MAX_INT, 0)
-        ).build_transaction({"chainId": chain_id, "from": pub_key, "nonce": nonce})
-        signed_usdc_approve_tx = web3.eth.account.sign_transaction(
-            raw_usdc_approve_txn, private_key=priv_key
-        )
-        send_usdc_approve_tx = web3.eth.send_raw_transaction(
-            signed_usdc_approve_tx.raw_transaction
-        )
-        usdc_approve_tx_receipt = web3.eth.wait_for_transaction_receipt(
-            send_usdc_approve_tx, 600
-        )
-        print(usdc_approve_tx_receipt)
+        # only send what is missing, for each of the exchange contracts
+        state = self.get_trading_state()
+        approvals = []
+        for spender in self.approval_spenders:
+            # a read that reverted comes back as None, treat it as not approved
+            allowance = state["allowances"][spender]
+            if allowance is None or allowance < int(MAX_INT, 0) // 2:
+                approvals.append(usdc.functions.approve(spender, int(MAX_INT, 0)))
+            if not state["approved_for_all"][spender]:
+                approvals.append(ctf.functions.setApprovalForAll(spender, True))
+        if not approvals:
+            print("All approvals already set")
+            return
 
-        nonce = web3.eth.get_transaction_count(pub_key)
+        # nonces are assigned locally so every transaction goes out back to back
+        nonce = web3.eth.get_transaction_count(pub_key, "pending")
+        tx_hashes = []
+        for i, approval in enumerate(approvals):
+            raw_txn = approval.build_transaction(
+                {"chainId": chain_id, "from": pub_key, "nonce": nonce + i}
+            )
+            signed_txn = web3.eth.account.sign_transaction(
+                raw_txn, private_key=priv_key
+            )
+            tx_hashes.append(web3.eth.send_raw_transaction(signed_txn.raw_transaction))
 
-        raw_ctf_approval_txn = ctf.functions.setApprovalForAll(
-            "0xd91E80cF2E7be2e162c6513ceD06f1dD0dA35296", True
-        ).build_transaction({"chainId": chain_id, "from": pub_key, "nonce": nonce})
-        signed_ctf_approval_tx = web3.eth.account.sign_transaction(
-            raw_ctf_approval_txn, private_key=priv_key
-        )
-        send_ctf_approval_tx = web3.eth.send_raw_transaction(
-            signed_ctf_approval_tx.raw_transaction
-        )
-        ctf_approval_tx_receipt = web3.eth.wait_for_transaction_receipt(
-            send_ctf_approval_tx, 600
-        )
-        print(ctf_approval_tx_receipt)
+        with ThreadPoolExecutor(max_workers=len(tx_hashes)) as pool:
+            receipts = pool.map(
+                lambda tx_hash: web3.eth.wait_for_transaction_receipt(tx_hash, 600),
+                tx_hashes,
+            )
+            failed = []
+            for receipt in receipts:
+                print(receipt)
+                if receipt.status == 0:
+                    failed.append(receipt.transactionHash.hex())
+        # the approvals that did go through are part of the new state
+        self.chain.invalidate()
+        if failed:
+            raise Exception(f"Approval transactions reverted: {', '.join(failed)}")
 
     def get_all_markets(self) -> "list[SimpleMarket]":
         markets = []
-        res = httpx.get(self.gamma_markets_endpoint)
+        res = self.transport.get(self.gamma_markets_endpoint)
         if res.status_code == 200:
             for market in res.json():
                 try:
@@ -197,6 +191,8 @@ class Polymarket:
                 except Exception as e:
                     print(e)
                     pass
+        else:
+            print(f"Error response returned from api: HTTP {res.status_code}")
         return markets
 
     def filter_markets_for_trading(self, markets: "list[SimpleMarket]"):
@@ -208,11 +204,12 @@ class Polymarket:
 
     def get_market(self, token_id: str) -> SimpleMarket:
         params = {"clob_token_ids": token_id}
-        res = httpx.get(self.gamma_markets_endpoint, params=params)
+        res = self.transport.get(self.gamma_markets_endpoint, params=params)
         if res.status_code == 200:
             data = res.json()
             market = data[0]
             return self.map_api_to_market(market, token_id)
+        print(f"Error response returned from api: HTTP {res.status_code}")
 
     def map_api_to_market(self, market, token_id: str = "") -> SimpleMarket:
         market = {
@@ -237,7 +234,7 @@ class Polymarket:
 
     def get_all_events(self) -> "list[SimpleEvent]":
         events = []
-        res = httpx.get(self.gamma_events_endpoint)
+        res = self.transport.get(self.gamma_events_endpoint)
         if res.status_code == 200:
             print(len(res.json()))
             for event in res.json():
@@ -248,8 +245,33 @@ class Polymarket:
                 except Exception as e:
                     print(e)
                     pass
+        else:
+            print(f"Error response returned from api: HTTP {res.status_code}")
         return events
 
+    def iter_events(self, params={}, page_size=100) -> "Iterator[SimpleEvent]":
+        """
+        Lazily walk /events page by page, yielding each event as soon as it has
+        been read off the response stream.
+        """
+        offset = params.get("offset", 0)
+        while True:
+            page_params = {**params, "limit": page_size, "offset": offset}
+            count = 0
+            with self.transport.stream(self.gamma_events_endpoint, page_params) as res:
+                if res.status_code != 200:
+                    print(f"Error response returned from api: HTTP {res.status_code}")
+                    raise Exception()
+                for event in iter_json_array(res.iter_text()):
+                    count += 1
+                    try:
+                        yield SimpleEvent(**self.map_api_to_event(event))
+                    except Exception as e:
+                        print(e)
+            if count < page_size:
+                return
+            offset += page_size
+
     def map_api_to_event(self, event) -> SimpleEvent:
         description = event["description"] if "description" in event.keys() else ""
         return {
@@ -283,9 +305,41 @@ class Polymarket:
         return tradeable_events
 
     def get_all_tradeable_events(self) -> "list[SimpleEvent]":
-        all_events = self.get_all_events()
+        if self.snapshot_store is not None:
+            all_events = self.get_snapshot_events()
+        else:
+            all_events = self.get_all_events()
         return self.filter_events_for_trading(all_events)
 
+    def get_snapshot_events(self) -> "list[SimpleEvent]":
+        def fetch_page(params: dict) -> "list[dict]":
+            res = self.transport.get(self.gamma_events_endpoint, params=params)
+            if res.status_code != 200:
+                print(f"Error response returned from api: HTTP {res.status_code}")
+                raise Exception()
+            return res.json()
+
+        def full_fetch(page_size: int = 100) -> "list[dict]":
+            params = {"active": True, "closed": False, "archived": False}
+            records, offset = [], 0
+            while True:
+                page = fetch_page({**params, "limit": page_size, "offset": offset})
+                records.extend(page)
+                if len(page) < page_size:
+                    return records
+                offset += page_size
+
+        self.snapshot_store.refresh(
+            "events", fetch_page=fetch_page, full_fetch=full_fetch
+        )
+        events = []
+        for event in self.snapshot_store.load("events"):
+            try:
+                events.append(SimpleEvent(**self.map_api_to_event(event)))
+            except Exception as e:
+                print(e)
+        return events
+
     def get_sampling_simplified_markets(self) -> "list[SimpleEvent]":
         markets = []
         raw_sampling_simplified_markets = self.client.get_sampling_simplified_markets()
@@ -296,50 +350,292 @@ class Polymarket:
         return markets
 
     def get_orderbook(self, token_id: str) -> OrderBookSummary:
-        return self.client.get_order_book(token_id)
+        return self.get_orderbooks([token_id])[0]
+
+    def get_local_orderbook(self, token_id: str) -> L2Book:
+        """The local L2 book for a token, seeded from a CLOB snapshot on first use."""
+        if token_id not in self.local_books.books:
+            self.local_books.seed([self.get_orderbook(token_id)])
+        return self.local_books.books[token_id]
+
+    def get_orderbook_price(self, token_id: str, side: str = BUY) -> float:
+        return self.get_orderbook_prices([token_id], side)[0]
+
+    def get_orderbooks(
+        self, token_ids: "list[str]", batch_size: int = 100
+    ) -> "list[OrderBookSummary]":
+        """
+        Order books for many tokens, served from the short-lived cache when
+        possible; the rest is fetched through the CLOB's batch /books endpoint,
+        `batch_size` tokens per request, all requests in flight at once.
+        """
+        books = self.book_cache.get_many(token_ids)
+        missing = [t for t in dict.fromkeys(token_ids) if t not in books]
+        body = [{"token_id": token_id} for token_id in missing]
+        for raw_book in self._post_batches(self.clob_books_endpoint, body, batch_size):
+            book = parse_raw_orderbook_summary(raw_book)
+            books[book.asset_id] = book
+        self.book_cache.put_many({t: books[t] for t in missing if t in books})
+        return [books.get(token_id) for token_id in token_ids]
+
+    def get_orderbook_prices(
+        self, token_ids: "list[str]", side: str = BUY, batch_size: int = 100
+    ) -> "list[float]":
+        keys = [(token_id, side) for token_id in token_ids]
+        prices = self.price_cache.get_many(keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in prices]
+        body = [{"token_id": token_id, "side": side} for token_id, side in missing]
+        for response in self._post_batches(self.clob_prices_endpoint, body, batch_size):
+            # {token_id: {side: price}}
+            for token_id, sides in response.items():
+                for price_side, price in sides.items():
+                    prices[(token_id, price_side)] = float(price)
+        self.price_cache.put_many({k: prices[k] for k in missing if k in prices})
+        return [prices.get(key) for key in keys]
+
+    def estimate_market_orders(
+        self, token_ids: "list[str]", amounts, side: str = BUY
+    ) -> FillEstimate:
+        """
+        Expected fills for market orders on many tokens, from their current books.
+        `amounts` follow MarketOrderArgs: usdc for BUY, shares for SELL.
+        """
+        return BookDepth(self.get_orderbooks(token_ids), side).fill(amounts)
+
+    def _post_batches(self, url: str, body: list, batch_size: int) -> list:
+        async def post_all() -> list:
+            responses = await asyncio.gather(
+                *[
+                    self.transport.apost(url, json=body[i : i + batch_size])
+                    for i in range(0, len(body), batch_size)
+                ]
+            )
+            results = []
+            for res in responses:
+                if res.status_code != 200:
+                    print(f"Error response returned from api: HTTP {res.status_code}")
+                    raise Exception()
+                data = res.json()
+                results.extend(data if isinstance(data, list) else [data])
+            return results
+
+        if not body:
+            return []
+        return self.transport.run(post_all())
+
+    @cached_property
+    def order_builder(self) -> "OrderBuilder":
+        from py_order_utils.builders import OrderBuilder
+        from py_order_utils.signer import Signer
+
+        # signer and builder only depend on the key, build them once
+        return OrderBuilder(
+            self.exchange_address, self.chain_id, Signer(self.private_key)
+        )
+
+    @cached_property
+    def neg_risk_order_builder(self) -> "OrderBuilder":
+        from py_order_utils.builders import OrderBuilder
+        from py_order_utils.signer import Signer
 
-    def get_orderbook_price(self, token_id: str) -> float:
-        return float(self.client.get_price(token_id))
+        return OrderBuilder(
+            self.neg_risk_exchange_address, self.chain_id, Signer(self.private_key)
+        )
+
+    @cached_property
+    def address(self) -> str:
+        return self.w3.eth.account.from_key(str(self.private_key)).address
 
     def get_address_for_private_key(self):
-        account = self.w3.eth.account.from_key(str(self.private_key))
-        return account.address
+        return self.address
 
     def build_order(
         self,
         market_token: str,
         amount: float,
-        nonce: str = str(round(time.time())),  # for cancellations
+        nonce: str = None,  # for cancellations
         side: str = "BUY",
         expiration: str = "0",  # timestamp after which order expires
-    ):
-        signer = Signer(self.private_key)
-        builder = OrderBuilder(self.exchange_address, self.chain_id, signer)
-
-        buy = side == "BUY"
-        side = 0 if buy else 1
-        maker_amount = amount if buy else 0
-        taker_amount = amount if not buy else 0
-        order_data = OrderData(
-            maker=self.get_address_for_private_key(),
-            tokenId=market_token,
-            makerAmount=maker_amount,
-            takerAmount=taker_amount,
-            feeRateBps="1",
-            nonce=nonce,
-            side=side,
-            expiration=expiration,
+    ) -> "SignedOrder":
+        order_data = order_data_for(
+            self.address, market_token, amount, nonce, side, expiration
+        )
+        return self.order_builder.build_signed_order(order_data)
+
+    def build_orders(
+        self, orders: "list[dict | OrderData]", processes: int = None, neg_risk=False
+    ) -> "list[tuple[SignedOrder, float]]":
+        """
+        Sign many orders, each given as build_order keyword arguments or as
+        ready OrderData. Returns (signed order, signing seconds) per order, in
+        input order. With `processes`, the EIP-712 hashing and signing is spread
+        over a process pool. `neg_risk` orders are signed for the neg risk exchange.
+        """
+        builder = self.neg_risk_order_builder if neg_risk else self.order_builder
+        exchange_address = (
+            self.neg_risk_exchange_address if neg_risk else self.exchange_address
         )
-        order = builder.build_signed_order(order_data)
-        return order
+        # more workers than cores only adds contention
+        processes = min(processes or 1, os.cpu_count() or 1)
+        if processes < 2 or len(orders) < 2:
+            results = sign_orders(builder, self.address, orders)
+        else:
+            chunk = -(-len(orders) // processes)
+            chunks = [orders[i : i + chunk] for i in range(0, len(orders), chunk)]
+            with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+                futures = [
+                    pool.submit(
+                        sign_orders_with_key,
+                        self.private_key,
+                        exchange_address,
+                        self.chain_id,
+                        self.address,
+                        orders_chunk,
+                    )
+                    for orders_chunk in chunks
+                ]
+                results = [result for f in futures for result in f.result()]
+
+        latencies = sorted(seconds for _, seconds in results)
+        if latencies:
+            print(
+                f"Signed {len(latencies)} orders: "
+                f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+                f"max {latencies[-1] * 1000:.2f} ms"
+            )
+        return results
 
     def execute_order(self, price, size, side, token_id) -> str:
         return self.client.create_and_post_order(
             OrderArgs(price=price, size=size, side=side, token_id=token_id)
         )
 
+    def place_orders(
+        self,
+        orders: "list[OrderArgs]",
+        order_type: str = OrderType.GTC,
+        max_workers: int = 8,
+    ) -> "list[dict]":
+        """
+        Sign all `orders` up front, then post them with at most `max_workers` in
+        flight. Returns one result per order, in input order:
+        {"order", "success", "response", "error"}. A failing order is reported in
+        its result and does not stop the others.
+        """
+        results = [
+            {"order": args, "success": False, "response": None, "error": None}
+            for args in orders
+        ]
+
+        # tick size and neg risk are per token: look them up for all tokens
+        # concurrently (the client caches them), then sign in one batch per
+        # exchange with the cached signers
+        def market_options(token_id: str) -> tuple:
+            try:
+                return (
+                    self.client.get_tick_size(token_id),
+                    self.client.get_neg_risk(token_id),
+                )
+            except Exception as e:
+                return e
+
+        token_ids = list(dict.fromkeys(args.token_id for args in orders))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            options = dict(zip(token_ids, pool.map(market_options, token_ids)))
+
+        by_exchange = {False: {}, True: {}}  # neg_risk -> {i: OrderData}
+        for i, args in enumerate(orders):
+            try:
+                if isinstance(options[args.token_id], Exception):
+                    raise options[args.token_id]
+                tick_size, neg_risk = options[args.token_id]
+                by_exchange[bool(neg_risk)][i] = order_data_from_args(
+                    self.client.builder, args, tick_size
+                )
+            except Exception as e:
+                results[i]["error"] = f"signing failed: {e}"
+
+        signed_orders = {}
+        for neg_risk, order_data in by_exchange.items():
+            if order_data:
+                signed = self.build_orders(list(order_data.values()), neg_risk=neg_risk)
+                signed_orders.update(
+                    (i, order) for i, (order, _) in zip(order_data, signed)
+                )
+
+        def post(i: int) -> None:
+            try:
+                response = self.transport.scheduler.call(
+                    urlsplit(self.clob_url).netloc,
+                    self.client.post_order,
+                    signed_orders[i],
+                    order_type,
+                    retry_on=is_rate_limited,
+                )
+            except Exception as e:
+                results[i]["error"] = str(e)
+                return
+            results[i]["response"] = response
+            results[i]["success"] = bool(response.get("success", True))
+            results[i]["error"] = response.get("errorMsg") or None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(post, sorted(signed_orders)))
+
+        failed = sum(not result["success"] for result in results)
+        print(f"Placed {len(results) - failed} of {len(results)} orders")
+        return results
+
+    def cancel_orders(
+        self, order_ids: "list[str]", batch_size: int = 100, max_workers: int = 4
+    ) -> dict:
+        """
+        Cancel orders through the CLOB's batch DELETE /orders endpoint,
+        `batch_size` ids per request. Returns {"canceled": [...],
+        "not_canceled": {order_id: reason}}; ids of a batch that failed as a
+        whole are reported under not_canceled with the error.
+        """
+        batches = [
+            order_ids[i : i + batch_size] for i in range(0, len(order_ids), batch_size)
+        ]
+
+        def cancel(batch: "list[str]") -> dict:
+            try:
+                return self.transport.scheduler.call(
+                    urlsplit(self.clob_url).netloc,
+                    self.client.cancel_orders,
+                    batch,
+                    retry_on=is_rate_limited,
+                )
+            except Exception as e:
+                return {"canceled": [], "not_canceled": {i: str(e) for i in batch}}
+
+        canceled, not_canceled = [], {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for response in pool.map(cancel, batches):
+                canceled.extend(response.get("canceled") or [])
+                not_canceled.update(response.get("not_canceled") or {})
+        return {"canceled": canceled, "not_canceled": not_canceled}
+
     def execute_market_order(self, market, amount) -> str:
         token_id = ast.literal_eval(market[0].dict()["metadata"]["clob_token_ids"])[1]
+        book = self.get_orderbook(token_id)
+        if book is None:
+            # unknown token or delisted book, nothing to fill against
+            print(f"No order book for token {token_id}, not placing a market order")
+            return None
+        estimate = BookDepth([book]).fill(amount)
+        if not estimate.complete[0]:
+            # a FOK order larger than the book would only be killed
+            print(
+                f"Not enough liquidity for a {amount} USDC market order, the book "
+                f"fills {estimate.cost[0]:.2f} USDC"
+            )
+            return None
+        print(
+            f"Expected fill: {estimate.size[0]:.2f} shares at {estimate.vwap[0]:.4f} "
+            f"(slippage {estimate.slippage[0]:.4f})"
+        )
         order_args = MarketOrderArgs(
             token_id=token_id,
             amount=amount,
@@ -352,13 +648,151 @@ class Polymarket:
         return resp
 
     def get_usdc_balance(self) -> float:
-        balance_res = self.usdc.functions.balanceOf(
-            self.get_address_for_private_key()
-        ).call()
+        # cached until the next block
+        (balance_res,) = self.chain.read([self.usdc.functions.balanceOf(self.address)])
+        if balance_res is None:
+            raise Exception(f"USDC balanceOf({self.address}) reverted")
         return float(balance_res / 10e5)
 
+    def get_trading_state(self) -> dict:
+        """
+        USDC balance, USDC allowances and CTF approvals for every exchange
+        contract, read in a single multicall.
+        """
+        spenders = self.approval_spenders
+        results = self.chain.read(
+            [self.usdc.functions.balanceOf(self.address)]
+            + [self.usdc.functions.allowance(self.address, s) for s in spenders]
+            + [self.ctf.functions.isApprovedForAll(self.address, s) for s in spenders]
+        )
+        n = len(spenders)
+        # reads that reverted are None
+        return {
+            "usdc_balance": None if results[0] is None else float(results[0] / 10e5),
+            "allowances": dict(zip(spenders, results[1 : n + 1])),
+            "approved_for_all": dict(zip(spenders, results[n + 1 :])),
+        }
+
+    def get_trades(self, after: int = None) -> "list[dict]":
+        """Our CLOB trades, optionally only those matched at or after `after`."""
+        from py_clob_client.clob_types import TradeParams
+
+        params = TradeParams(maker_address=self.address, after=after)
+        return self.transport.scheduler.call(
+            urlsplit(self.clob_url).netloc,
+            self.client.get_trades,
+            params,
+            retry_on=is_rate_limited,
+        )
+
+    def sync_positions(self, ledger: "PositionLedger") -> int:
+        """
+        Apply the trades matched since the ledger's cursor. The cursor second is
+        fetched again and deduplicated by trade id, so nothing is missed or
+        counted twice. Returns the number of new trades.
+        """
+        trades = self.get_trades(after=ledger.cursor or None)
+        return ledger.apply_trades(trades, self.address)
+
+    def mark_positions(self, ledger: "PositionLedger") -> dict:
+        """Ledger summary with open positions marked at the best bid."""
+        token_ids = [position.asset_id for position in ledger.open_positions()]
+        prices = self.get_orderbook_prices(token_ids, side="SELL") if token_ids else []
+        marks = {t: p for t, p in zip(token_ids, prices) if p is not None}
+        return ledger.summary(marks)
+
+
+def is_rate_limited(exception: Exception) -> bool:
+    from py_clob_client.exceptions import PolyApiException
+
+    # only 429s are safe to resend, a 5xx may have reached the matching engine
+    return isinstance(exception, PolyApiException) and exception.status_code == 429
+
+
+def order_data_for(
+    maker: str,
+    market_token: str,
+    amount: float,
+    nonce: str = None,
+    side: str = "BUY",
+    expiration: str = "0",
+) -> "OrderData":
+    from py_order_utils.model import OrderData
+
+    buy = side == "BUY"
+    return OrderData(
+        maker=maker,
+        tokenId=market_token,
+        makerAmount=amount if buy else 0,
+        takerAmount=amount if not buy else 0,
+        feeRateBps="1",
+        nonce=nonce or str(round(time.time())),
+        side=0 if buy else 1,
+        expiration=expiration,
+    )
+
+
+def order_data_from_args(
+    builder: "ClobOrderBuilder", args: OrderArgs, tick_size: str
+) -> "OrderData":
+    """The OrderData ClobClient.create_order would sign for `args`."""
+    from py_clob_client.order_builder.builder import ROUNDING_CONFIG
+    from py_clob_client.utilities import price_valid
+    from py_order_utils.model import OrderData
+
+    if not price_valid(args.price, tick_size):
+        raise Exception(
+            f"price ({args.price}), min: {tick_size} - max: {1 - float(tick_size)}"
+        )
+    side, maker_amount, taker_amount = builder.get_order_amounts(
+        args.side, args.size, args.price, ROUNDING_CONFIG[tick_size]
+    )
+    return OrderData(
+        maker=builder.funder,
+        taker=args.taker,
+        tokenId=args.token_id,
+        makerAmount=str(maker_amount),
+        takerAmount=str(taker_amount),
+        side=side,
+        feeRateBps=str(args.fee_rate_bps),
+        nonce=str(args.nonce),
+        signer=builder.signer.address(),
+        expiration=str(args.expiration),
+        signatureType=builder.sig_type,
+    )
+
+
+def sign_orders(
+    builder: "OrderBuilder", maker: str, orders: "list[dict | OrderData]"
+) -> "list[tuple[SignedOrder, float]]":
+    results = []
+    for order in orders:
+        start = time.perf_counter()
+        if isinstance(order, dict):
+            order = order_data_for(maker, **order)
+        signed = builder.build_signed_order(order)
+        results.append((signed, time.perf_counter() - start))
+    return results
+
+
+def sign_orders_with_key(
+    private_key: str,
+    exchange_address: str,
+    chain_id: int,
+    maker: str,
+    orders: "list[dict | OrderData]",
+) -> "list[tuple[SignedOrder, float]]":
+    from py_order_utils.builders import OrderBuilder
+    from py_order_utils.signer import Signer
+
+    # process pool entry point: one builder per worker chunk
+    builder = OrderBuilder(exchange_address, chain_id, Signer(private_key))
+    return sign_orders(builder, maker, orders)
+
 
 def test():
+    from py_clob_client.client import ClobClient
+
     host = "https://clob.polymarket.com"
     key = os.getenv("POLYGON_WALLET_PRIVATE_KEY")
     print(key)
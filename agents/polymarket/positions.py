@@ -0,0 +1,199 @@
+import json
+import os
+
+from agents.utils.objects import Trade
+
+# sizes within this of zero are flat, not open dust left by float rounding
+DUST = 1e-9
+
+
+class Position:
+    __slots__ = ("asset_id", "market", "size", "avg_price", "realized_pnl", "fees")
+
+    def __init__(
+        self,
+        asset_id: str,
+        market: str = None,
+        size: float = 0.0,
+        avg_price: float = 0.0,
+        realized_pnl: float = 0.0,
+        fees: float = 0.0,
+    ) -> None:
+        self.asset_id = asset_id
+        self.market = market
+        self.size = size  # shares, negative when short
+        self.avg_price = avg_price  # average entry price of the open size
+        self.realized_pnl = realized_pnl  # net of fees
+        self.fees = fees
+
+    def apply(self, side: str, size: float, price: float, fee: float = 0.0) -> None:
+        signed = size if side == "BUY" else -size
+        if abs(self.size) <= DUST or (self.size > 0) == (signed > 0):
+            # opening or adding: new weighted average entry
+            total = abs(self.size) + size
+            self.avg_price = (abs(self.size) * self.avg_price + size * price) / total
+        else:
+            # reducing or flipping: realize against the average entry
+            closed = min(size, abs(self.size))
+            direction = 1.0 if self.size > 0 else -1.0
+            self.realized_pnl += closed * (price - self.avg_price) * direction
+            if size > closed + DUST:
+                self.avg_price = price
+        self.size += signed
+        if abs(self.size) <= DUST:
+            self.size, self.avg_price = 0.0, 0.0
+        self.realized_pnl -= fee
+        self.fees += fee
+
+    def unrealized_pnl(self, mark: float) -> float:
+        return self.size * (mark - self.avg_price)
+
+    def to_list(self) -> list:
+        return [
+            self.market,
+            self.size,
+            self.avg_price,
+            self.realized_pnl,
+            self.fees,
+        ]
+
+
+class PositionLedger:
+    """
+    Positions, average entry and realized PnL per outcome token, updated in O(1)
+    per fill. Only the positions and a trade cursor are persisted, so loading the
+    ledger and valuing the portfolio never replays the trade history.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or os.getenv(
+            "POSITIONS_PATH", "./local_db_positions/positions.json"
+        )
+        self.positions: "dict[str, Position]" = {}
+        # newest applied match_time, and the trade ids applied at that time
+        self.cursor = 0
+        self.cursor_ids: "set[str]" = set()
+
+    @classmethod
+    def load(cls, path: str = None) -> "PositionLedger":
+        ledger = cls(path)
+        if os.path.exists(ledger.path):
+            with open(ledger.path) as f:
+                state = json.load(f)
+            ledger.cursor = state["cursor"]
+            ledger.cursor_ids = set(state["cursor_ids"])
+            for asset_id, values in state["positions"].items():
+                ledger.positions[asset_id] = Position(asset_id, *values)
+        return ledger
+
+    def save(self) -> None:
+        state = {
+            "cursor": self.cursor,
+            "cursor_ids": sorted(self.cursor_ids),
+            "positions": {a: p.to_list() for a, p in self.positions.items()},
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def position(self, asset_id: str, market: str = None) -> Position:
+        position = self.positions.get(asset_id)
+        if position is None:
+            position = self.positions[asset_id] = Position(asset_id, market)
+        return position
+
+    def apply_fill(
+        self,
+        asset_id: str,
+        side: str,
+        size: float,
+        price: float,
+        fee: float = 0.0,
+        market: str = None,
+    ) -> Position:
+        position = self.position(asset_id, market)
+        position.apply(side.upper(), size, price, fee)
+        return position
+
+    def apply_trade(self, trade: "Trade | dict", address: str = None) -> bool:
+        """
+        Apply one CLOB trade, as a Trade or a raw /data/trades record. When we
+        were a maker in it (our `address` on maker_orders), our own maker fills are
+        applied instead of the taker side. Returns False for trades already seen
+        and for FAILED trades, which never settled.
+        """
+        if isinstance(trade, Trade):
+            trade = trade.dict()
+        if str(trade.get("status", "")).upper() == "FAILED":
+            return False
+        trade_id = str(trade["id"])
+        match_time = int(trade["match_time"])
+        if match_time < self.cursor or (
+            match_time == self.cursor and trade_id in self.cursor_ids
+        ):
+            return False
+
+        fee_rate = float(trade.get("fee_rate_bps") or 0) / 10000
+        maker_fills = [
+            order
+            for order in trade.get("maker_orders") or []
+            if address and order.get("maker_address", "").lower() == address.lower()
+        ]
+        if maker_fills:
+            for order in maker_fills:
+                size, price = float(order["matched_amount"]), float(order["price"])
+                self.apply_fill(
+                    order.get("asset_id") or trade["asset_id"],
+                    order.get("side") or ("SELL" if trade["side"] == "BUY" else "BUY"),
+                    size,
+                    price,
+                    size * price * float(order.get("fee_rate_bps") or 0) / 10000,
+                    trade["market"],
+                )
+        else:
+            size, price = float(trade["size"]), float(trade["price"])
+            self.apply_fill(
+                trade["asset_id"],
+                trade["side"],
+                size,
+                price,
+                size * price * fee_rate,
+                trade["market"],
+            )
+
+        if match_time > self.cursor:
+            self.cursor, self.cursor_ids = match_time, set()
+        self.cursor_ids.add(trade_id)
+        return True
+
+    def apply_trades(self, trades: list, address: str = None) -> int:
+        trades = sorted(trades, key=lambda t: int(_get(t, "match_time")))
+        return sum(self.apply_trade(trade, address) for trade in trades)
+
+    def open_positions(self) -> "list[Position]":
+        return [p for p in self.positions.values() if abs(p.size) > DUST]
+
+    def summary(self, marks: "dict[str, float]" = None) -> dict:
+        """Portfolio totals, valuing open positions at `marks` where given."""
+        marks = marks or {}
+        realized = unrealized = exposure = 0.0
+        for position in self.positions.values():
+            realized += position.realized_pnl
+            mark = marks.get(position.asset_id)
+            if abs(position.size) > DUST and mark is not None:
+                unrealized += position.unrealized_pnl(mark)
+                exposure += abs(position.size) * mark
+        return {
+            "positions": len(self.open_positions()),
+            "realized_pnl": realized,
+            "unrealized_pnl": unrealized,
+            "exposure": exposure,
+        }
+
+
+def _get(trade, name: str):
+    return getattr(trade, name) if isinstance(trade, Trade) else trade[name]
@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def parse_timestamp(value: str) -> float:
+    """Seconds since the epoch for an ISO 8601 `updatedAt`, None if it is unusable."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class SnapshotStore:
+    """
+    On-disk snapshot of the Gamma market and event universe, keyed by id.
+
+    Every record keeps its raw api payload along with its `updatedAt` and the time
+    it was fetched. Once a full snapshot exists, `refresh` only pulls the records
+    whose `updatedAt` is newer than the last sync, newest first, and stops at the
+    first page that has nothing new. Within `ttl` seconds of the last sync reads
+    are served from disk without touching the network.
+    """
+
+    kinds = ("markets", "events")
+
+    def __init__(self, path="./local_db_snapshot/snapshot.sqlite", ttl=300) -> None:
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            for kind in self.kinds:
+                self.connection.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {kind} (
+                        id TEXT PRIMARY KEY,
+                        updated_at TEXT,
+                        fetched_at REAL,
+                        active INTEGER,
+                        closed INTEGER,
+                        archived INTEGER,
+                        data TEXT
+                    )
+                    """
+                )
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sync (
+                    kind TEXT PRIMARY KEY,
+                    synced_at REAL,
+                    high_water TEXT
+                )
+                """
+            )
+
+    @classmethod
+    def from_env(cls) -> "SnapshotStore":
+        path = os.getenv("SNAPSHOT_DB_PATH")
+        if not path:
+            return None
+        return cls(path=path, ttl=float(os.getenv("SNAPSHOT_TTL", 300)))
+
+    def upsert(self, kind: str, records: "list[dict]") -> None:
+        fetched_at = time.time()
+        rows = [
+            (
+                str(record["id"]),
+                record.get("updatedAt"),
+                fetched_at,
+                record.get("active"),
+                record.get("closed"),
+                record.get("archived"),
+                json.dumps(record),
+            )
+            for record in records
+        ]
+        # ON CONFLICT keeps the rowid, so loads stay in first-seen order
+        with self._lock, self.connection:
+            self.connection.executemany(
+                f"""
+                INSERT INTO {kind} VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    updated_at = excluded.updated_at,
+                    fetched_at = excluded.fetched_at,
+                    active = excluded.active,
+                    closed = excluded.closed,
+                    archived = excluded.archived,
+                    data = excluded.data
+                """,
+                rows,
+            )
+
+    def load(self, kind: str, current_only=True) -> "list[dict]":
+        query = f"SELECT data FROM {kind}"
+        if current_only:
+            query += " WHERE active = 1 AND closed = 0 AND archived = 0"
+        with self._lock:
+            rows = self.connection.execute(query + " ORDER BY rowid").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def retired_ids(self, kind: str, ids: "list[str]") -> "list[str]":
+        """The `ids` stored as no longer current: closed, archived or inactive."""
+        ids = [str(i) for i in ids]
+        retired = []
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start : start + 500]
+                retired += self.connection.execute(
+                    f"""
+                    SELECT id FROM {kind}
+                    WHERE id IN ({", ".join("?" * len(chunk))})
+                    AND NOT (active = 1 AND closed = 0 AND archived = 0)
+                    """,
+                    chunk,
+                ).fetchall()
+        return [doc_id for (doc_id,) in retired]
+
+    def last_sync(self, kind: str) -> "tuple[float, str]":
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT synced_at, high_water FROM sync WHERE kind = ?", (kind,)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def is_fresh(self, kind: str) -> bool:
+        synced_at, _ = self.last_sync(kind)
+        return synced_at is not None and time.time() - synced_at < self.ttl
+
+    def refresh(self, kind: str, fetch_page, full_fetch, page_size=100) -> None:
+        """
+        Bring `kind` up to date unless it was synced less than `ttl` seconds ago.
+
+        `full_fetch()` returns the whole universe and is only used for the first
+        sync. `fetch_page(params)` returns one page of raw records for the given
+        querystring params and drives the incremental refresh.
+        """
+        synced_at, high_water = self.last_sync(kind)
+        if synced_at is not None and time.time() - synced_at < self.ttl:
+            return
+
+        since = parse_timestamp(high_water)
+        if since is None:
+            high_water = None
+            records = full_fetch()
+        else:
+            records = []
+            offset = 0
+            while True:
+                page = fetch_page(
+                    {
+                        "order": "updatedAt",
+                        "ascending": False,
+                        "limit": page_size,
+                        "offset": offset,
+                    }
+                )
+                changed = [
+                    r
+                    for r in page
+                    if (parse_timestamp(r.get("updatedAt")) or 0) >= since
+                ]
+                records.extend(changed)
+                if len(changed) < len(page) or len(page) < page_size:
+                    break
+                offset += page_size
+
+        self.upsert(kind, records)
+        # keep the raw string of the newest record; None (nothing fetched yet)
+        # makes the next refresh a full fetch again
+        for record in records:
+            updated = parse_timestamp(record.get("updatedAt"))
+            if updated is not None and (since is None or updated > since):
+                since, high_water = updated, record["updatedAt"]
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync VALUES (?, ?, ?)",
+                (kind, time.time(), high_water),
+            )
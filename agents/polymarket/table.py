@@ -0,0 +1,149 @@
+import ast
+import json
+
+import numpy as np
+
+
+def _field(record: dict, *names):
+    # the api's camelCase or our snake_case names, whichever is set
+    for name in names:
+        value = record.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _list(value) -> list:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return ast.literal_eval(value)
+    return value or []
+
+
+def _count(value) -> int:
+    # SimpleEvent keeps its market ids as one comma-joined string
+    if isinstance(value, str):
+        return len(value.split(",")) if value else 0
+    return len(value or [])
+
+
+class ColumnTable:
+    """
+    Columnar view over a list of pydantic objects (or raw api dicts). Each entry of
+    `columns` becomes a NumPy array attribute, built once; filters, sorts and
+    top-k selection then run on the arrays and map back to the original objects.
+    """
+
+    columns: "dict[str, tuple]" = {}
+
+    def __init__(self, rows: list) -> None:
+        self.rows = list(rows)
+        # rows are pydantic models or raw api dicts, read both as plain dicts
+        records = [row if isinstance(row, dict) else vars(row) for row in self.rows]
+        for name, (extract, dtype) in self.columns.items():
+            values = np.fromiter(
+                (extract(record) for record in records), dtype=dtype, count=len(records)
+            )
+            setattr(self, name, values)
+        self._build_extra_columns(records)
+
+    def _build_extra_columns(self, records: "list[dict]") -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def select(self, mask_or_indices) -> list:
+        indices = np.asarray(mask_or_indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        return [self.rows[i] for i in indices]
+
+    def take(self, mask_or_indices) -> "ColumnTable":
+        table = self.__class__.__new__(self.__class__)
+        indices = np.asarray(mask_or_indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        table.rows = [self.rows[i] for i in indices]
+        for name in self.columns:
+            setattr(table, name, getattr(self, name)[indices])
+        return table
+
+    def _sort_keys(self, column: str, descending: bool) -> np.ndarray:
+        values = getattr(self, column).astype(float)
+        # missing values always sort last
+        values = np.where(np.isnan(values), -np.inf if descending else np.inf, values)
+        return -values if descending else values
+
+    def argsort(self, column: str, descending=True) -> np.ndarray:
+        return np.argsort(self._sort_keys(column, descending), kind="stable")
+
+    def top_k(self, column: str, k: int, descending=True) -> np.ndarray:
+        """Indices of the k best rows by `column`, in order, without a full sort."""
+        keys = self._sort_keys(column, descending)
+        if k >= len(keys):
+            return np.argsort(keys, kind="stable")
+        candidates = np.argpartition(keys, k)[:k]
+        return candidates[np.argsort(keys[candidates], kind="stable")]
+
+
+class MarketTable(ColumnTable):
+    columns = {
+        "id": (lambda m: int(_field(m, "id")), np.int64),
+        "active": (lambda m: bool(_field(m, "active")), bool),
+        "closed": (lambda m: bool(_field(m, "closed")), bool),
+        "archived": (lambda m: bool(_field(m, "archived")), bool),
+        "spread": (lambda m: _float(_field(m, "spread")), np.float64),
+        "liquidity": (lambda m: _float(_field(m, "liquidity")), np.float64),
+        "volume": (lambda m: _float(_field(m, "volume")), np.float64),
+        "rewards_min_size": (
+            lambda m: _float(_field(m, "rewardsMinSize")),
+            np.float64,
+        ),
+        "rewards_max_spread": (
+            lambda m: _float(_field(m, "rewardsMaxSpread")),
+            np.float64,
+        ),
+    }
+
+    def _build_extra_columns(self, records: "list[dict]") -> None:
+        # binary markets: column 0 is the first outcome (usually "Yes"), 1 the second
+        self.outcome_prices = np.full((len(records), 2), np.nan)
+        for i, market in enumerate(records):
+            prices = _list(_field(market, "outcome_prices", "outcomePrices"))[:2]
+            self.outcome_prices[i, : len(prices)] = [_float(p) for p in prices]
+
+    def take(self, mask_or_indices) -> "MarketTable":
+        table = super().take(mask_or_indices)
+        indices = np.asarray(mask_or_indices)
+        table.outcome_prices = self.outcome_prices[indices]
+        return table
+
+    def tradeable(self) -> np.ndarray:
+        return self.active & ~self.closed & ~self.archived
+
+
+class EventTable(ColumnTable):
+    columns = {
+        "id": (lambda e: int(_field(e, "id")), np.int64),
+        "active": (lambda e: bool(_field(e, "active")), bool),
+        "closed": (lambda e: bool(_field(e, "closed")), bool),
+        "archived": (lambda e: bool(_field(e, "archived")), bool),
+        "restricted": (lambda e: bool(_field(e, "restricted")), bool),
+        "number_of_markets": (
+            lambda e: _count(_field(e, "markets")),
+            np.int64,
+        ),
+    }
+
+    def tradeable(self) -> np.ndarray:
+        return self.active & ~self.restricted & ~self.archived & ~self.closed
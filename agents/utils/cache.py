@@ -0,0 +1,46 @@
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Small in-memory cache whose entries expire `ttl` seconds after being stored.
+    Meant for millisecond-scale reuse, e.g. order books within one decision cycle.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: list) -> dict:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    found[key] = entry[1]
+                elif entry is not None:
+                    del self._entries[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key, value) -> None:
+        self.put_many({key: value})
+
+    def put_many(self, values: dict) -> None:
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (expires, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
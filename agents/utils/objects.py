@@ -3,6 +3,18 @@ from typing import Optional, Union
 from pydantic import BaseModel
 
 
+class MakerOrder(BaseModel):
+    order_id: str
+    maker_address: str
+    matched_amount: str
+    price: str
+    asset_id: str
+    owner: Optional[str] = None
+    outcome: Optional[str] = None
+    fee_rate_bps: Optional[str] = None
+    side: Optional[str] = None  # missing from older trades
+
+
 class Trade(BaseModel):
     id: int
     taker_order_id: str
@@ -20,7 +32,7 @@ class Trade(BaseModel):
     owner: str
     transaction_hash: str
     bucket_index: str
-    maker_orders: list[str]
+    maker_orders: list[MakerOrder]
     type: str
 
 
@@ -0,0 +1,270 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from agents.utils.tracing import get_tracer
+
+# requests per second and burst size per upstream host, kept under the published
+# limits so that a fan-out never trips them. Hosts not listed here are not paced.
+DEFAULT_RATES = {
+    "gamma-api.polymarket.com": (12.5, 25),
+    "clob.polymarket.com": (20.0, 40),
+    "newsapi.org": (1.0, 5),
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class HostSlots:
+    """
+    Bounded semaphore shared by threads and event loops. A release hands the slot
+    straight to the longest waiting caller: a blocked thread is woken through an
+    event, an async caller through its future on its own loop, so nobody polls.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.free = size
+        self._lock = threading.Lock()
+        # (loop, future) for async callers, (None, threading.Event) for threads
+        self._waiters = deque()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self.free and not self._waiters:
+                self.free -= 1
+                return
+            ready = threading.Event()
+            self._waiters.append((None, ready))
+        ready.wait()
+
+    async def acquire_async(self) -> None:
+        with self._lock:
+            if self.free and not self._waiters:
+                self.free -= 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # cancelled just after the slot was handed over: pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if loop is None:
+                    waiter.set()
+                    return
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, waiter)
+                    return
+                except RuntimeError:
+                    # the waiter's loop is closed
+                    continue
+            if self.free >= self.size:
+                raise ValueError("HostSlots released too many times")
+            self.free += 1
+
+    def _hand_over(self, future: asyncio.Future) -> None:
+        # runs on the waiter's loop; a cancelled waiter passes the slot on
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def __enter__(self) -> "HostSlots":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class RequestScheduler:
+    """
+    Central gate for outbound requests: a token bucket per host, a cap on requests
+    in flight per host shared by sync and async callers on any thread or event
+    loop, and retries with jittered exponential backoff on 429/5xx (honouring
+    Retry-After). `stats()` exposes the counters.
+    """
+
+    def __init__(
+        self,
+        rates: "dict[str, tuple[float, int]]" = None,
+        default_rate: "tuple[float, int]" = None,
+        max_concurrency: int = 16,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ) -> None:
+        self.rates = {**DEFAULT_RATES, **(rates or {})}
+        self.default_rate = default_rate
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.counters = Counter()
+        self._buckets: "dict[str, TokenBucket]" = {}
+        self._lock = threading.Lock()
+        self._slots: "dict[str, HostSlots]" = {}
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                rate = self.rates.get(host, self.default_rate)
+                self._buckets[host] = TokenBucket(*rate) if rate else None
+            return self._buckets[host]
+
+    def _host_slots(self, host: str) -> HostSlots:
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = HostSlots(self.max_concurrency)
+            return self._slots[host]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+    def _count(self, host: str, key: str, value=1) -> None:
+        with self._lock:
+            self.counters[key] += value
+            self.counters[f"{host}:{key}"] += value
+
+    def _reserve(self, host: str) -> float:
+        bucket = self.bucket(host)
+        delay = bucket.reserve() if bucket else 0.0
+        self._count(host, "requests")
+        if delay:
+            self._count(host, "throttled")
+            self._count(host, "throttled_seconds", delay)
+        return delay
+
+    def _backoff(self, attempt: int, retry_after=None) -> float:
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        # full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    @contextmanager
+    def slot(self, host: str):
+        """Wait for a token and a concurrency slot, without any retry handling."""
+        time.sleep(self._reserve(host))
+        with self._host_slots(host):
+            yield
+
+    @asynccontextmanager
+    async def async_slot(self, host: str):
+        await asyncio.sleep(self._reserve(host))
+        # the same slots as the sync path, awaited without blocking the loop
+        slots = self._host_slots(host)
+        await slots.acquire_async()
+        try:
+            yield
+        finally:
+            slots.release()
+
+    def send(self, host: str, request):
+        """Run `request()`, an http call returning a response, with retries."""
+        for attempt in range(self.max_retries + 1):
+            with self.slot(host):
+                response = request()
+            self._count(host, f"status_{response.status_code}")
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+            if attempt == self.max_retries:
+                self._count(host, "failures")
+                return response
+            self._count(host, "retries")
+            time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+
+    async def asend(self, host: str, request):
+        """Async version of send, `request()` returns an awaitable response."""
+        for attempt in range(self.max_retries + 1):
+            async with self.async_slot(host):
+                response = await request()
+            self._count(host, f"status_{response.status_code}")
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+            if attempt == self.max_retries:
+                self._count(host, "failures")
+                return response
+            self._count(host, "retries")
+            await asyncio.sleep(
+                self._backoff(attempt, response.headers.get("Retry-After"))
+            )
+
+    def call(self, host: str, func, *args, retry_on=None, **kwargs):
+        """
+        Rate limit an arbitrary client call (e.g. a third party sdk). Exceptions for
+        which `retry_on(exception)` is true are retried with backoff.
+        """
+        tracer = get_tracer()
+        name = getattr(func, "__name__", "call")
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.slot(host), tracer.span(f"sdk {host}", call=name):
+                    tracer.count(f"sdk.{host}.requests")
+                    return func(*args, **kwargs)
+            except Exception as e:
+                if retry_on is None or not retry_on(e) or attempt == self.max_retries:
+                    self._count(host, "failures")
+                    raise
+                self._count(host, "retries")
+                time.sleep(self._backoff(attempt))
+
+
+_shared_scheduler = None
+
+
+def parse_rates(value: str) -> "dict[str, tuple[float, int]]":
+    # "gamma-api.polymarket.com=12.5/25,newsapi.org=1/5"
+    rates = {}
+    for entry in filter(None, value.split(",")):
+        host, limit = entry.strip().split("=")
+        rate, burst = limit.split("/")
+        rates[host] = (float(rate), int(burst))
+    return rates
+
+
+def get_scheduler() -> RequestScheduler:
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        _shared_scheduler = RequestScheduler(
+            rates=parse_rates(os.getenv("RATE_LIMITS", "")),
+            max_concurrency=int(os.getenv("MAX_CONCURRENT_REQUESTS", 16)),
+        )
+    return _shared_scheduler
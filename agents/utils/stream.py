@@ -0,0 +1,102 @@
+import json
+import re
+from typing import Iterable, Iterator
+
+_whitespace = re.compile(r"\s*")
+_structure = re.compile(r'["\[\]{}]')
+_string_special = re.compile(r'["\\]')
+_scalar_end = re.compile(r"[\s,\]]")
+
+
+def iter_json_array(chunks: "Iterable[str]") -> Iterator:
+    """
+    Yield the items of a top-level JSON array as soon as each one is complete,
+    reading the document from an iterable of text chunks (e.g. `response.iter_text()`).
+    Only the item currently being received is held in memory, and every character
+    is scanned once: an item's end is found by tracking string and bracket state
+    across chunks, then the item is decoded in one go.
+    """
+    started = False
+    parts = None  # pieces of the item being received, None between items
+    depth = 0  # open brackets in that item, 0 for a bare string or scalar
+    in_string = False
+    escaped = False  # a backslash ended the previous chunk
+
+    for text in chunks:
+        if not text:
+            continue
+        position = 0
+        start = 0  # where the current item's piece begins in this chunk
+        if escaped:
+            position, escaped = 1, False
+        while True:
+            if parts is None:
+                position = _whitespace.match(text, position).end()
+                if position == len(text):
+                    break
+                char = text[position]
+                if not started:
+                    if char != "[":
+                        raise ValueError("expected a JSON array")
+                    started = True
+                    position += 1
+                    continue
+                if char == ",":
+                    position += 1
+                    continue
+                if char == "]":
+                    return
+                parts, start, depth = [], position, 0
+                if char in "{[":
+                    depth = 1
+                    position += 1
+                elif char == '"':
+                    in_string = True
+                    position += 1
+
+            end = None
+            if in_string:
+                match = _string_special.search(text, position)
+                if match is None:
+                    position = len(text)
+                elif match.group() == "\\":
+                    position = match.end() + 1
+                    escaped = position > len(text)
+                    continue
+                else:
+                    in_string = False
+                    position = match.end()
+                    if depth == 0:
+                        end = position
+            elif depth == 0:
+                match = _scalar_end.search(text, position)
+                if match is None:
+                    position = len(text)
+                else:
+                    position = end = match.start()
+            else:
+                match = _structure.search(text, position)
+                if match is None:
+                    position = len(text)
+                else:
+                    position = match.end()
+                    char = match.group()
+                    if char == '"':
+                        in_string = True
+                    elif char in "{[":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            end = position
+
+            if end is not None:
+                parts.append(text[start:end])
+                yield json.loads("".join(parts))
+                parts = None
+            elif position >= len(text):
+                # the item continues in the next chunk
+                parts.append(text[start:])
+                break
+
+    raise ValueError("JSON array ended unexpectedly")
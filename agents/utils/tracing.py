@@ -0,0 +1,200 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class SpanStats:
+    """Running count and total of one span name, and its most recent durations."""
+
+    def __init__(self, window: int) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.recent.append(duration)
+
+
+class Tracer:
+    """
+    Lightweight spans and counters. Every finished span is counted for the
+    summary and, with `path` set, appended to a JSON-lines trace file. Memory
+    stays bounded on long runs: only the last `window` durations of each span
+    name are kept, for the percentiles. Spans nest through a context variable,
+    so they follow both threads and asyncio tasks.
+    """
+
+    def __init__(self, path: str = None, window: int = 10000) -> None:
+        self.path = path
+        self.window = window
+        self.counters = Counter()
+        self.spans: "dict[str, SpanStats]" = {}
+        self.errors = Counter()
+        self._lock = threading.Lock()
+        self._file = None
+        self._next_id = 0
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        return cls(
+            path=os.getenv("TRACE_FILE"), window=int(os.getenv("TRACE_WINDOW", 10000))
+        )
+
+    def _span_id(self) -> int:
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Time the enclosed block as `name`. Yields the attribute dict, so the block
+        can attach results (status codes, sizes, token counts) before it closes.
+        """
+        span_id = self._span_id()
+        parent = _current_span.get()
+        token = _current_span.set(span_id)
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            self.record(
+                name, time.perf_counter() - start, started, span_id, parent, attributes
+            )
+
+    def record(
+        self,
+        name: str,
+        duration: float,
+        started: float = None,
+        span_id: int = None,
+        parent: int = None,
+        attributes: dict = None,
+    ) -> None:
+        attributes = attributes or {}
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats(self.window)
+            stats.add(duration)
+            if "error" in attributes:
+                self.errors[name] += 1
+            if self.path:
+                if self._file is None:
+                    self._file = open(self.path, "a")
+                entry = {
+                    "name": name,
+                    "id": span_id,
+                    "parent": parent,
+                    "start": started,
+                    "duration_ms": round(duration * 1000, 3),
+                    **attributes,
+                }
+                self._file.write(json.dumps(entry, default=str) + "\n")
+                self._file.flush()
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def traced(self, name: str = None):
+        """Decorator form of span, named after the function by default."""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name or func.__qualname__):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self) -> str:
+        with self._lock:
+            spans = {
+                name: (stats.count, stats.total, sorted(stats.recent))
+                for name, stats in self.spans.items()
+            }
+            counters = dict(self.counters)
+            errors = dict(self.errors)
+
+        lines = [
+            f"{'span':<36} {'count':>6} {'total s':>9} {'mean ms':>9} "
+            f"{'p50 ms':>9} {'p99 ms':>9} {'errors':>6}"
+        ]
+        # count, total and mean cover the whole run, percentiles the last `window`
+        for name, (count, total, recent) in sorted(
+            spans.items(), key=lambda item: -item[1][1]
+        ):
+            lines.append(
+                f"{name:<36} {count:>6} {total:>9.3f} "
+                f"{total / count * 1000:>9.1f} {_percentile(recent, 50) * 1000:>9.1f} "
+                f"{_percentile(recent, 99) * 1000:>9.1f} {errors.get(name, 0):>6}"
+            )
+        if counters:
+            lines.append("")
+            lines.append(f"{'counter':<36} {'value':>12}")
+            for name, value in sorted(counters.items()):
+                lines.append(f"{name:<36} {value:>12,.0f}")
+        return "\n".join(lines)
+
+    def print_summary(self) -> None:
+        print(self.summary())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.spans.clear()
+            self.errors.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _percentile(sorted_values: "list[float]", percentile: float) -> float:
+    index = round(percentile / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+def rpc_tracing_middleware(make_request, web3):
+    """web3 middleware timing every JSON-RPC call as an `rpc <method>` span."""
+
+    def middleware(method, params):
+        tracer = get_tracer()
+        with tracer.span(f"rpc {method}"):
+            tracer.count("rpc.requests")
+            return make_request(method, params)
+
+    return middleware
+
+
+_shared_tracer = None
+
+
+def get_tracer() -> Tracer:
+    global _shared_tracer
+    if _shared_tracer is None:
+        _shared_tracer = Tracer.from_env()
+    return _shared_tracer
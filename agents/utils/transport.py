@@ -0,0 +1,210 @@
+import asyncio
+import importlib.util
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+from agents.utils.ratelimit import RequestScheduler, get_scheduler
+from agents.utils.tracing import get_tracer
+
+load_dotenv()
+
+
+class HttpTransport:
+    """
+    Long-lived, connection-pooled HTTP layer shared by the Gamma and CLOB REST calls.
+
+    The sync client is created once and reused across threads. httpx async clients
+    are bound to the event loop they first ran on, so one async client is kept per
+    running loop. Sync callers of async code go through `run`, which executes it on
+    one resident loop, so its client and connections outlive the call. Every
+    request is paced and retried by the shared RequestScheduler.
+    """
+
+    def __init__(
+        self,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 5.0,
+        scheduler: RequestScheduler = None,
+    ) -> None:
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("[HttpTransport] h2 is not installed, falling back to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self.scheduler = scheduler or get_scheduler()
+
+        self._lock = threading.Lock()
+        self._client = None
+        self._loop = None
+        self._async_clients: "dict[asyncio.AbstractEventLoop, httpx.AsyncClient]" = {}
+
+    @classmethod
+    def from_env(cls) -> "HttpTransport":
+        return cls(
+            http2=os.getenv("HTTP2", "false").lower() in ("1", "true", "yes"),
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", 20)),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30.0)),
+            timeout=float(os.getenv("HTTP_TIMEOUT", 5.0)),
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        http2=self.http2, limits=self.limits, timeout=self.timeout
+                    )
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            # drop clients whose loop is gone, their connections can't be reused
+            for stale_loop in [l for l in self._async_clients if l.is_closed()]:
+                del self._async_clients[stale_loop]
+            client = httpx.AsyncClient(
+                http2=self.http2, limits=self.limits, timeout=self.timeout
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def get(self, url: str, params=None, **kwargs) -> httpx.Response:
+        return self._send(
+            "GET", url, lambda: self.client.get(url, params=params, **kwargs)
+        )
+
+    def post(self, url: str, json=None, **kwargs) -> httpx.Response:
+        return self._send(
+            "POST", url, lambda: self.client.post(url, json=json, **kwargs)
+        )
+
+    @contextmanager
+    def stream(self, url: str, params=None, **kwargs):
+        host = urlsplit(url).netloc
+        tracer = get_tracer()
+        # a stream can't be replayed, so it is paced but not retried
+        with tracer.span(f"http {host}", method="GET", path=urlsplit(url).path):
+            tracer.count(f"http.{host}.requests")
+            with self.scheduler.slot(host):
+                with self.client.stream(
+                    "GET", url, params=params, **kwargs
+                ) as response:
+                    yield response
+            tracer.count(f"http.{host}.bytes", response.num_bytes_downloaded)
+
+    async def aget(self, url: str, params=None, **kwargs) -> httpx.Response:
+        return await self._asend(
+            "GET", url, lambda: self.async_client.get(url, params=params, **kwargs)
+        )
+
+    async def apost(self, url: str, json=None, **kwargs) -> httpx.Response:
+        return await self._asend(
+            "POST", url, lambda: self.async_client.post(url, json=json, **kwargs)
+        )
+
+    def _send(self, method: str, url: str, request) -> httpx.Response:
+        host = urlsplit(url).netloc
+        tracer = get_tracer()
+        with tracer.span(
+            f"http {host}", method=method, path=urlsplit(url).path
+        ) as span:
+            response = self.scheduler.send(host, request)
+            span["status"] = response.status_code
+        tracer.count(f"http.{host}.requests")
+        tracer.count(f"http.{host}.bytes", len(response.content))
+        return response
+
+    async def _asend(self, method: str, url: str, request) -> httpx.Response:
+        host = urlsplit(url).netloc
+        tracer = get_tracer()
+        with tracer.span(
+            f"http {host}", method=method, path=urlsplit(url).path
+        ) as span:
+            response = await self.scheduler.asend(host, request)
+            span["status"] = response.status_code
+        tracer.count(f"http.{host}.requests")
+        tracer.count(f"http.{host}.bytes", len(response.content))
+        return response
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The resident event loop `run` executes on, on its own daemon thread."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(
+                        target=loop.run_forever, name="http-transport", daemon=True
+                    ).start()
+                    self._loop = loop
+        return self._loop
+
+    def run(self, coroutine):
+        """
+        Run `coroutine` to completion on the resident event loop and return its
+        result. Works from sync code and from inside another running loop, which
+        is blocked until the result is ready (await the async variant there
+        instead). The loop's async client stays open between calls.
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and running is self._loop:
+            coroutine.close()
+            raise RuntimeError(
+                "HttpTransport.run called from its own loop, await the coroutine"
+            )
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def arun(self, coroutine):
+        """
+        Await `coroutine` on the resident event loop from any other running
+        loop, without blocking it, so the loop's async client is shared.
+        """
+        if asyncio.get_running_loop() is self._loop:
+            return await coroutine
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        )
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+        if self._loop is not None:
+            loop, self._loop = self._loop, None
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+    async def aclose(self) -> None:
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_shared_transport = None
+
+
+def get_transport() -> HttpTransport:
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = HttpTransport.from_env()
+    return _shared_transport
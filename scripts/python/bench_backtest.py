@@ -0,0 +1,90 @@
+import csv
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import typer
+
+from agents.application.backtest import Backtester, MarketHistory
+from scripts.python.standin import fake_market
+
+app = typer.Typer()
+
+
+def write_history(directory: str, n_markets: int, n_days: int, seed: int = 0):
+    """Random-walk YES prices, markets listing and resolving at random days"""
+    rng = np.random.default_rng(seed)
+    markets = [fake_market(i) for i in range(1, n_markets + 1)]
+    start = rng.integers(0, n_days // 2, n_markets)
+    end = rng.integers(n_days // 2, n_days, n_markets)
+    steps = rng.normal(0, 0.03, (n_days, n_markets))
+    prices = np.clip(0.5 + np.cumsum(steps, axis=0), 0.01, 0.99)
+    for i, market in enumerate(markets):
+        if end[i] < n_days - 1:
+            outcome = "1" if prices[end[i], i] > 0.5 else "0"
+            market["closed"] = True
+            market["outcomePrices"] = json.dumps([outcome, str(1 - int(outcome))])
+
+    dates = np.datetime64("2024-01-01") + np.arange(n_days)
+    markets_path = os.path.join(directory, "markets.json")
+    prices_path = os.path.join(directory, "prices.csv")
+    with open(markets_path, "w") as f:
+        json.dump(markets, f)
+    with open(prices_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "market_id", "price"])
+        for day in range(n_days):
+            live = np.nonzero((start <= day) & (day <= end))[0]
+            writer.writerows(
+                (str(dates[day]), markets[i]["id"], f"{prices[day, i]:.4f}")
+                for i in live
+            )
+    return markets_path, prices_path
+
+
+@app.command()
+def run(
+    n_markets: int = 2000,
+    n_days: int = 365,
+    trades_per_day: int = 4,
+    holding_days: int = 30,
+    markets_path: str = None,
+    prices_path: str = None,
+) -> None:
+    """
+    Replay a year of daily one_best_trade decisions over synthetic (or recorded)
+    history and report throughput
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        if markets_path is None:
+            markets_path, prices_path = write_history(directory, n_markets, n_days)
+
+        start = time.perf_counter()
+        history = MarketHistory.from_files(markets_path, prices_path)
+        load_time = time.perf_counter() - start
+
+    backtester = Backtester(
+        history,
+        filter_top=2 * trades_per_day,
+        trades_per_day=trades_per_day,
+        holding_days=holding_days,
+        slippage=0.01,
+    )
+    start = time.perf_counter()
+    result = backtester.run()
+    run_time = time.perf_counter() - start
+
+    n_days, n_markets = history.prices.shape
+    print(f"history: {n_days} days x {n_markets} markets, loaded in {load_time:.2f}s")
+    print(
+        f"replay: {run_time:.2f}s, {n_days / run_time:.0f} days/s, "
+        f"{backtester.llm.calls} llm calls"
+    )
+    for name, value in result.stats.items():
+        print(f"{name:>14}: {value}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,89 @@
+import time
+
+import typer
+from web3 import Web3
+
+from agents.polymarket.chain import ChainStateReader
+
+app = typer.Typer()
+
+USDC = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+CTF = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
+SPENDERS = [
+    "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E",
+    "0xC5d563A36AE78145C45a50134d48A1215220f80a",
+    "0xd91E80cF2E7be2e162c6513ceD06f1dD0dA35296",
+]
+ABI = [
+    {
+        "inputs": [{"name": "account", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"name": "owner", "type": "address"},
+            {"name": "spender", "type": "address"},
+        ],
+        "name": "allowance",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"name": "account", "type": "address"},
+            {"name": "operator", "type": "address"},
+        ],
+        "name": "isApprovedForAll",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
+
+@app.command()
+def trading_state(
+    address: str, rpc_url: str = "http://127.0.0.1:8545", repeats: int = 5
+) -> None:
+    """
+    Compare one call per read with the multicall reader, e.g. against
+    `anvil --fork-url https://polygon-rpc.com`
+    """
+    web3 = Web3(Web3.HTTPProvider(rpc_url))
+    address = Web3.to_checksum_address(address)
+    usdc = web3.eth.contract(address=USDC, abi=ABI)
+    ctf = web3.eth.contract(address=CTF, abi=ABI)
+    functions = (
+        [usdc.functions.balanceOf(address)]
+        + [usdc.functions.allowance(address, s) for s in SPENDERS]
+        + [ctf.functions.isApprovedForAll(address, s) for s in SPENDERS]
+    )
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        individual = [f.call() for f in functions]
+    individual_time = (time.perf_counter() - start) / repeats
+
+    reader = ChainStateReader(web3)
+    start = time.perf_counter()
+    batched = reader.read(functions)
+    batched_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        reader.read(functions)
+    cached_time = (time.perf_counter() - start) / repeats
+
+    assert batched == individual, (batched, individual)
+    print(f"reads: {len(functions)}, multicall: {reader._has_multicall}")
+    print(f"one call per read: {individual_time * 1000:.1f}ms")
+    print(f"multicall:         {batched_time * 1000:.1f}ms")
+    print(f"cached:            {cached_time * 1000:.3f}ms ({reader.calls} calls)")
+
+
+if __name__ == "__main__":
+    app()
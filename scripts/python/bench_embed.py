@@ -0,0 +1,59 @@
+import os
+import time
+
+import typer
+
+from scripts.python.standin import fake_embedding, fake_market, serve_embeddings
+
+app = typer.Typer()
+
+
+@app.command()
+def run(
+    n_documents: int = 5000,
+    latency: float = 0.1,
+    token_latency: float = 0.00002,
+    max_batch_tokens: int = 8000,
+    max_concurrency: int = 8,
+    fail_every: int = 7,
+) -> None:
+    """
+    Embed market descriptions against a local stand-in embedding server, one
+    request at a time and batched with bounded concurrency, and check the
+    vectors come back in input order despite dropped requests
+    """
+    server, url = serve_embeddings(latency, token_latency, fail_every)
+    os.environ["OPENAI_BASE_URL"] = url
+
+    from agents.connectors.embeddings import BatchEmbedder
+
+    texts = [
+        fake_market(i)["description"] * (1 + i % 5) for i in range(1, n_documents + 1)
+    ]
+    expected = [fake_embedding(text) for text in texts]
+
+    modes = {
+        "sequential": BatchEmbedder(
+            max_batch_tokens=max_batch_tokens, max_concurrency=1
+        ),
+        "concurrent": BatchEmbedder(
+            max_batch_tokens=max_batch_tokens, max_concurrency=max_concurrency
+        ),
+    }
+    print(f"documents: {n_documents}, request latency {latency * 1000:.0f}ms")
+    for name, embedder in modes.items():
+        server.RequestHandlerClass.requests.clear()
+        start = time.perf_counter()
+        vectors = embedder.embed_documents(texts)
+        elapsed = time.perf_counter() - start
+        run = embedder.last_run
+        print(
+            f"{name:>10}: {elapsed:6.2f}s, {n_documents / elapsed:7.0f} docs/s, "
+            f"{run['batches']} batches, {run['retries']} retried, "
+            f"in order: {vectors == expected}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,58 @@
+import time
+
+import typer
+
+from agents.polymarket.gamma import GammaMarketClient
+from scripts.python.standin import serve_gamma
+
+app = typer.Typer()
+
+
+def serial_walk(gamma: GammaMarketClient, limit: int) -> list:
+    # the page-by-page loop get_all_current_markets used before the async fetcher
+    offset = 0
+    all_markets = []
+    while True:
+        params = {
+            "active": True,
+            "closed": False,
+            "archived": False,
+            "limit": limit,
+            "offset": offset,
+        }
+        market_batch = gamma.get_markets(querystring_params=params)
+        all_markets.extend(market_batch)
+        if len(market_batch) < limit:
+            break
+        offset += limit
+    return all_markets
+
+
+@app.command()
+def current_markets(
+    n_markets: int = 5000, latency: float = 0.05, limit: int = 100, concurrency: int = 8
+) -> None:
+    """
+    Compare the serial and concurrent market fetch against a local stand-in Gamma server
+    """
+    server, url = serve_gamma(n_markets=n_markets, latency=latency)
+    gamma = GammaMarketClient(gamma_url=url)
+
+    start = time.perf_counter()
+    serial = serial_walk(gamma, limit)
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = gamma.get_all_current_markets(limit=limit, concurrency=concurrency)
+    concurrent_time = time.perf_counter() - start
+    server.shutdown()
+
+    assert [m["id"] for m in serial] == [m["id"] for m in concurrent]
+    print(f"markets: {len(concurrent)}, per-request latency: {latency * 1000:.0f}ms")
+    print(f"serial:     {serial_time:.2f}s")
+    print(f"concurrent: {concurrent_time:.2f}s (concurrency={concurrency})")
+    print(f"speedup:    {serial_time / concurrent_time:.1f}x")
+
+
+if __name__ == "__main__":
+    app()
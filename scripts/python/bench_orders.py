@@ -0,0 +1,70 @@
+import os
+import time
+
+import typer
+from eth_account import Account
+from py_clob_client.clob_types import OrderArgs
+
+from scripts.python.standin import serve_clob
+
+app = typer.Typer()
+
+
+@app.command()
+def place_and_cancel(
+    n_orders: int = 100, latency: float = 0.05, max_workers: int = 8, rejected: int = 5
+) -> None:
+    """
+    Time placing and cancelling a batch of orders against a local stand-in CLOB
+    server, one by one and through the batch API (tests/test_orders.py checks
+    the results)
+    """
+    rejected_tokens = {str(1000 + i) for i in range(0, n_orders, n_orders // rejected)}
+    server, url = serve_clob(latency=latency, rejected_tokens=rejected_tokens)
+    os.environ["CLOB_API_URL"] = url
+    os.environ["POLYGON_WALLET_PRIVATE_KEY"] = Account.create().key.hex()
+
+    from agents.polymarket.polymarket import Polymarket
+
+    polymarket = Polymarket()
+    orders = [
+        OrderArgs(token_id=str(1000 + i), price=0.5, size=10, side="BUY")
+        for i in range(n_orders)
+    ]
+
+    start = time.perf_counter()
+    for args in orders:
+        try:
+            polymarket.client.create_and_post_order(args)
+        except Exception:
+            pass
+    serial_time = time.perf_counter() - start
+    server.RequestHandlerClass.orders.clear()
+
+    # a fresh client, so tick sizes are looked up again as in the serial run
+    polymarket = Polymarket()
+    start = time.perf_counter()
+    results = polymarket.place_orders(orders, max_workers=max_workers)
+    batch_time = time.perf_counter() - start
+
+    placed = [r["response"]["orderID"] for r in results if r["success"]]
+    failed = [r["order"].token_id for r in results if not r["success"]]
+
+    start = time.perf_counter()
+    cancelled = polymarket.cancel_orders(placed + ["0xunknown"], batch_size=25)
+    cancel_time = time.perf_counter() - start
+    server.shutdown()
+
+    print(
+        f"orders: {n_orders}, rejected: {len(failed)}, latency: {latency * 1000:.0f}ms"
+    )
+    print(f"one by one:   {serial_time:.2f}s")
+    print(f"place_orders: {batch_time:.2f}s (max_workers={max_workers})")
+    print(
+        f"cancel_orders: {cancel_time:.2f}s for {len(placed)} orders, "
+        f"{len(cancelled['canceled'])} canceled"
+    )
+
+
+if __name__ == "__main__":
+    app()
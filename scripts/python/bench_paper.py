@@ -0,0 +1,84 @@
+import random
+import time
+
+import typer
+from py_clob_client.clob_types import OrderArgs, OrderType
+
+from agents.polymarket.orderbook import BUY, SELL
+from agents.polymarket.paper import PaperPolymarket
+from agents.polymarket.positions import PositionLedger
+from scripts.python.standin import fake_book
+
+app = typer.Typer()
+
+
+@app.command()
+def run(
+    n_orders: int = 100000, n_tokens: int = 50, cancel_every: int = 10, seed: int = 0
+) -> None:
+    """
+    Fire random GTC, FOK and market orders at the paper exchange and check that
+    books never cross and the cash and share accounting adds up
+    """
+    rng = random.Random(seed)
+    token_ids = [str(1000 + i) for i in range(n_tokens)]
+    paper = PaperPolymarket(balance=1e9)
+    paper.seed([fake_book(token_id, depth=20) for token_id in token_ids])
+
+    live = []
+    start = time.perf_counter()
+    for i in range(n_orders):
+        token_id = rng.choice(token_ids)
+        kind = rng.random()
+        if kind < 0.1:
+            response = paper.market_order(token_id, rng.uniform(1, 50))
+        else:
+            side = (
+                BUY if paper.shares.get(token_id, 0) < 100 else rng.choice((BUY, SELL))
+            )
+            args = OrderArgs(
+                token_id=token_id,
+                price=round(rng.uniform(0.2, 0.8), 2),
+                size=round(rng.uniform(1, 50), 2),
+                side=side,
+            )
+            order_type = OrderType.FOK if kind < 0.3 else OrderType.GTC
+            response = paper.post_order(args, order_type)
+        if response["status"] == "live":
+            live.append(response["orderID"])
+        if cancel_every and i % cancel_every == 0 and live:
+            paper.cancel_orders([live.pop(rng.randrange(len(live)))])
+    elapsed = time.perf_counter() - start
+
+    crossed = 0
+    for book in paper.books.values():
+        bid, ask = book.best(BUY), book.best(SELL)
+        crossed += bid is not None and ask is not None and bid[0] >= ask[0]
+    cash = 1e9 - sum(
+        t["size"] * t["price"] * (1 if t["side"] == BUY else -1)
+        for t in paper.trades
+        if not t["maker_orders"]
+    )
+    cash -= sum(
+        t["size"] * t["price"] * (1 if t["maker_orders"][0]["side"] == BUY else -1)
+        for t in paper.trades
+        if t["maker_orders"]
+    )
+    ledger = PositionLedger()
+    paper.sync_positions(ledger)
+    share_errors = sum(
+        abs(ledger.positions[token_id].size - held) > 1e-6
+        for token_id, held in paper.shares.items()
+    )
+
+    print(
+        f"{n_orders} orders in {elapsed:.2f}s ({n_orders / elapsed:,.0f} orders/s), "
+        f"{len(paper.trades)} fills, {len(paper.orders)} resting"
+    )
+    print(f"crossed books: {crossed}")
+    print(f"cash mismatch: {abs(cash - paper.balance):.6f}")
+    print(f"ledger position mismatches: {share_errors}")
+
+
+if __name__ == "__main__":
+    app()
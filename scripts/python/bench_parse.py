@@ -0,0 +1,56 @@
+import json
+import time
+
+import typer
+
+from agents.polymarket.gamma import GammaMarketClient
+from scripts.python.standin import fake_market
+
+app = typer.Typer()
+
+
+@app.command()
+def record(local_file_path: str, limit: int = 500) -> None:
+    """
+    Record a page of live Gamma markets to parse offline
+    """
+    gamma = GammaMarketClient()
+    gamma.get_markets(
+        querystring_params={"active": True, "closed": False, "limit": limit},
+        local_file_path=local_file_path,
+    )
+
+
+@app.command()
+def run(local_file_path: str = None, n_markets: int = 2000, repeat: int = 5) -> None:
+    """
+    Compare per-object, batch validated and trusted market parsing
+    """
+    if local_file_path is not None:
+        with open(local_file_path) as in_file:
+            payload = json.load(in_file)
+    else:
+        payload = [fake_market(i) for i in range(1, n_markets + 1)]
+
+    gamma = GammaMarketClient()
+    modes = {
+        "per-object": lambda data: [gamma.parse_pydantic_market(m) for m in data],
+        "batch": lambda data: gamma.parse_pydantic_markets(data),
+        "trusted": lambda data: gamma.parse_pydantic_markets(data, trusted=True),
+    }
+
+    print(f"markets: {len(payload)}, best of {repeat}")
+    for name, parse in modes.items():
+        best = float("inf")
+        for _ in range(repeat):
+            # parse_pydantic_market mutates its input, give every run a fresh copy
+            data = json.loads(json.dumps(payload))
+            start = time.perf_counter()
+            parse(data)
+            best = min(best, time.perf_counter() - start)
+        per_market = best / len(payload) * 1e6
+        print(f"{name:>10}: {best * 1000:8.1f}ms ({per_market:.1f}us/market)")
+
+
+if __name__ == "__main__":
+    app()
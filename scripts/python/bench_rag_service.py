@@ -0,0 +1,67 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+import typer
+
+from scripts.python.standin import fake_embedding, fake_market, serve_embeddings
+
+app = typer.Typer()
+
+
+@app.command()
+def run(
+    n_documents: int = 20000,
+    n_queries: int = 500,
+    concurrency: int = 50,
+    latency: float = 0.02,
+    max_batch_size: int = 64,
+) -> None:
+    """
+    Fire concurrent queries at the resident RAG service, one query per embedding
+    call and micro-batched, against a local stand-in embedding server
+    """
+    server, url = serve_embeddings(latency)
+    os.environ["OPENAI_BASE_URL"] = url
+
+    from langchain_core.documents import Document
+
+    from agents.connectors.embeddings import BatchEmbedder
+    from agents.connectors.query_service import RAGQueryService
+    from agents.connectors.vectorstore import NumpyVectorStore
+
+    texts = [fake_market(i)["description"] for i in range(n_documents)]
+    store = NumpyVectorStore(
+        BatchEmbedder(),
+        [Document(page_content=text) for text in texts],
+        np.array([fake_embedding(text) for text in texts]),
+    )
+    queries = [f"Will event {i} happen?" for i in range(n_queries)]
+
+    async def fire(service: RAGQueryService) -> float:
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(text: str) -> None:
+            async with gate:
+                await service.query(text)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(text) for text in queries))
+        return time.perf_counter() - start
+
+    print(f"documents: {n_documents}, queries: {n_queries}, {concurrency} in flight")
+    for name, batch_size in (("unbatched", 1), ("batched", max_batch_size)):
+        service = RAGQueryService(store, max_batch_size=batch_size)
+        elapsed = asyncio.run(fire(service))
+        stats = service.stats()
+        print(
+            f"{name:>10}: {n_queries / elapsed:7.0f} queries/s, "
+            f"p50 {stats['p50_ms']:.1f}ms, p99 {stats['p99_ms']:.1f}ms, "
+            f"{stats['batches']} batches"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,75 @@
+import ast
+import inspect
+import os
+import statistics
+import subprocess
+import sys
+import textwrap
+
+import typer
+
+from scripts.python import cli
+
+app = typer.Typer()
+
+
+def command_setup(func) -> str:
+    """
+    The lazy imports and client getters a cli command runs before its real work,
+    as a snippet that can be timed in a fresh interpreter.
+    """
+    tree = ast.parse(textwrap.dedent(inspect.getsource(func)))
+    lines = [
+        ast.unparse(node)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+    getters = {
+        node.func.id
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id.startswith("get_")
+        and hasattr(cli, node.func.id)
+    }
+    lines += [f"cli.{getter}()" for getter in sorted(getters)]
+    return "; ".join(lines) or "pass"
+
+
+def timed_run(code: str, repeats: int) -> "tuple[float, str]":
+    program = (
+        "import time; start = time.perf_counter(); "
+        f"import scripts.python.cli as cli; {code}; "
+        "print(time.perf_counter() - start)"
+    )
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    times = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", program], capture_output=True, text=True, env=env
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        times.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(times), ""
+
+
+@app.command()
+def commands(repeats: int = 5) -> None:
+    """
+    Startup cost of the cli and of each command's first use of its clients, each
+    measured in a fresh interpreter
+    """
+    base, error = timed_run("pass", repeats)
+    print(f"{'import cli':<28} {base * 1000:8.1f}ms")
+    for command in cli.app.registered_commands:
+        name = command.name or command.callback.__name__.replace("_", "-")
+        elapsed, error = timed_run(command_setup(command.callback), repeats)
+        if elapsed is None:
+            print(f"{name:<28} {'-':>8}    ({error})")
+        else:
+            print(f"{name:<28} {elapsed * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    app()
@@ -1,17 +1,32 @@
+from functools import cache
+
 import typer
 from devtools import pprint
 
-from agents.polymarket.polymarket import Polymarket
-from agents.connectors.chroma import PolymarketRAG
-from agents.connectors.news import News
-from agents.application.trade import Trader
-from agents.application.executor import Executor
-from agents.application.creator import Creator
-
 app = typer.Typer()
-polymarket = Polymarket()
-newsapi_client = News()
-polymarket_rag = PolymarketRAG()
+
+
+# clients and their (heavy) imports are created on first use, so every command
+# only pays for what it touches
+@cache
+def get_polymarket():
+    from agents.polymarket.polymarket import Polymarket
+
+    return Polymarket()
+
+
+@cache
+def get_news():
+    from agents.connectors.news import News
+
+    return News()
+
+
+@cache
+def get_polymarket_rag():
+    from agents.connectors.chroma import PolymarketRAG
+
+    return PolymarketRAG()
 
 
 @app.command()
@@ -20,11 +35,15 @@ def get_all_markets(limit: int = 5, sort_by: str = "spread") -> None:
     Query Polymarket's markets
     """
     print(f"limit: int = {limit}, sort_by: str = {sort_by}")
-    markets = polymarket.get_all_markets()
-    markets = polymarket.filter_markets_for_trading(markets)
+    from agents.polymarket.table import MarketTable
+
+    markets = get_polymarket().get_all_markets()
+    table = MarketTable(markets)
+    table = table.take(table.active)
     if sort_by == "spread":
-        markets = sorted(markets, key=lambda x: x.spread, reverse=True)
-    markets = markets[:limit]
+        markets = table.select(table.top_k("spread", limit))
+    else:
+        markets = table.rows[:limit]
     pprint(markets)
 
 
@@ -33,7 +52,7 @@ def get_relevant_news(keywords: str) -> None:
     """
     Use NewsAPI to query the internet
     """
-    articles = newsapi_client.get_articles_for_cli_keywords(keywords)
+    articles = get_news().get_articles_for_cli_keywords(keywords)
     pprint(articles)
 
 
@@ -43,11 +62,15 @@ def get_all_events(limit: int = 5, sort_by: str = "number_of_markets") -> None:
     Query Polymarket's events
     """
     print(f"limit: int = {limit}, sort_by: str = {sort_by}")
-    events = polymarket.get_all_events()
-    events = polymarket.filter_events_for_trading(events)
+    from agents.polymarket.table import EventTable
+
+    events = get_polymarket().get_all_events()
+    table = EventTable(events)
+    table = table.take(table.tradeable())
     if sort_by == "number_of_markets":
-        events = sorted(events, key=lambda x: len(x.markets), reverse=True)
-    events = events[:limit]
+        events = table.select(table.top_k("number_of_markets", limit))
+    else:
+        events = table.rows[:limit]
     pprint(events)
 
 
@@ -56,7 +79,7 @@ def create_local_markets_rag(local_directory: str) -> None:
     """
     Create a local markets database for RAG
     """
-    polymarket_rag.create_local_markets_rag(local_directory=local_directory)
+    get_polymarket_rag().create_local_markets_rag(local_directory=local_directory)
 
 
 @app.command()
@@ -64,7 +87,7 @@ def query_local_markets_rag(vector_db_directory: str, query: str) -> None:
     """
     RAG over a local database of Polymarket's events
     """
-    response = polymarket_rag.query_local_markets_rag(
+    response = get_polymarket_rag().query_local_markets_rag(
         local_directory=vector_db_directory, query=query
     )
     pprint(response)
@@ -78,6 +101,8 @@ def ask_superforecaster(event_title: str, market_question: str, outcome: str) ->
     print(
         f"event: str = {event_title}, question: str = {market_question}, outcome (usually yes or no): str = {outcome}"
     )
+    from agents.application.executor import Executor
+
     executor = Executor()
     response = executor.get_superforecast(
         event_title=event_title, market_question=market_question, outcome=outcome
@@ -90,6 +115,8 @@ def create_market() -> None:
     """
     Format a request to create a market on Polymarket
     """
+    from agents.application.creator import Creator
+
     c = Creator()
     market_description = c.one_best_market()
     print(f"market_description: str = {market_description}")
@@ -100,6 +127,8 @@ def ask_llm(user_input: str) -> None:
     """
     Ask a question to the LLM and get a response.
     """
+    from agents.application.executor import Executor
+
     executor = Executor()
     response = executor.get_llm_response(user_input)
     print(f"LLM Response: {response}")
@@ -110,6 +139,8 @@ def ask_polymarket_llm(user_input: str) -> None:
     """
     What types of markets do you want trade?
     """
+    from agents.application.executor import Executor
+
     executor = Executor()
     response = executor.get_polymarket_llm(user_input=user_input)
     print(f"LLM + current markets&events response: {response}")
@@ -120,9 +151,35 @@ def run_autonomous_trader() -> None:
     """
     Let an autonomous system trade for you.
     """
+    from agents.application.trade import Trader
+
     trader = Trader()
     trader.one_best_trade()
 
 
+@app.command()
+def backtest(
+    markets_path: str,
+    prices_path: str,
+    holding_days: int = None,
+    slippage: float = 0.0,
+    trades_per_day: int = 1,
+) -> None:
+    """
+    Replay the one_best_trade strategy over recorded markets and daily prices,
+    with stub LLM and embeddings
+    """
+    from agents.application.backtest import Backtester, MarketHistory
+
+    history = MarketHistory.from_files(markets_path, prices_path)
+    backtester = Backtester(
+        history,
+        holding_days=holding_days,
+        slippage=slippage,
+        trades_per_day=trades_per_day,
+    )
+    pprint(backtester.run().stats)
+
+
 if __name__ == "__main__":
     app()
@@ -1,5 +1,6 @@
+import asyncio
 from typing import Union
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException
 
 app = FastAPI()
 
@@ -25,3 +26,40 @@ def read_market(market_id: int, q: Union[str, None] = None):
 
 
 # post new prompt
+
+
+# resident RAG over the local markets index (RAG_DB_DIRECTORY), loaded off the
+# event loop on the first /rag call, so the other routes never depend on it;
+# concurrent queries are micro-batched by the service
+_rag_service = None
+_rag_lock = asyncio.Lock()
+
+
+async def get_rag_service():
+    global _rag_service
+    async with _rag_lock:
+        if _rag_service is None:
+            from agents.connectors.query_service import RAGQueryService
+
+            try:
+                _rag_service = await asyncio.to_thread(RAGQueryService.from_env)
+            except Exception as e:
+                print(f"Could not load the RAG index: {e}")
+                raise HTTPException(status_code=503, detail="RAG index unavailable")
+    return _rag_service
+
+
+@app.get("/rag/query")
+async def rag_query(
+    q: str, k: Union[int, None] = None, service=Depends(get_rag_service)
+):
+    results = await service.query(q, k)
+    return [
+        {"page_content": doc.page_content, "metadata": doc.metadata, "score": score}
+        for doc, score in results
+    ]
+
+
+@app.get("/rag/stats")
+def rag_stats(service=Depends(get_rag_service)):
+    return service.stats()
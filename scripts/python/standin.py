@@ -0,0 +1,288 @@
+# local stand-in servers for benchmarking the agents without touching live services
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_market(market_id: int) -> dict:
+    return {
+        "id": str(market_id),
+        "question": f"Will market {market_id} resolve yes?",
+        "conditionId": f"0x{market_id:064x}",
+        "slug": f"market-{market_id}",
+        "endDate": "2030-01-01T00:00:00Z",
+        "description": f"This market resolves yes if event {market_id} happens.",
+        "outcomes": '["Yes", "No"]',
+        "outcomePrices": '["0.4", "0.6"]',
+        "clobTokenIds": f'["{market_id}1", "{market_id}2"]',
+        "active": True,
+        "closed": False,
+        "archived": False,
+        "funded": True,
+        "rewardsMinSize": 100,
+        "rewardsMaxSpread": 3.5,
+        "spread": round((market_id % 100) / 1000, 3),
+        "liquidity": str(market_id * 10),
+        "volume": str(market_id * 100),
+        "updatedAt": "2024-07-15T17:12:48.601056Z",
+        "clobRewards": [
+            {
+                "id": str(market_id),
+                "conditionId": f"0x{market_id:064x}",
+                "assetAddress": "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
+                "rewardsAmount": 0,
+                "rewardsDailyRate": 5,
+                "startDate": "2024-07-01",
+                "endDate": "2500-12-31",
+            }
+        ],
+        "events": [
+            {
+                "id": str(market_id // 10),
+                "ticker": f"event-{market_id // 10}",
+                "slug": f"event-{market_id // 10}",
+                "title": f"Event {market_id // 10}",
+                "active": True,
+                "closed": False,
+                "archived": False,
+                "liquidity": market_id * 10.0,
+                "volume": market_id * 100.0,
+                "tags": [
+                    {"id": "2", "label": "Politics", "slug": "politics"},
+                    {"id": "21", "label": "Crypto", "slug": "crypto"},
+                ],
+            }
+        ],
+    }
+
+
+class GammaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real api
+    disable_nagle_algorithm = True
+    markets: "list[dict]" = []
+    latency: float = 0.0
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        time.sleep(self.latency)
+
+        if url.path == "/markets":
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["100"])[0])
+            markets = self.markets
+            if "id" in query:
+                ids = set(query["id"])
+                markets = [m for m in markets if m["id"] in ids]
+            self.send_json(markets[offset : offset + limit])
+        elif url.path.startswith("/markets/"):
+            market_id = url.path.rsplit("/", 1)[1]
+            matches = [m for m in self.markets if m["id"] == market_id]
+            if matches:
+                self.send_json(matches[0])
+            else:
+                self.send_json({"error": "not found"}, status=404)
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+    def send_json(self, data, status: int = 200) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def fake_book(token_id: str, depth: int = 10) -> dict:
+    seed = int(token_id) % 40
+    mid = 0.3 + seed / 100
+    return {
+        "market": f"0x{seed:064x}",
+        "asset_id": token_id,
+        "hash": f"{seed:040x}",
+        "bids": [
+            {"price": f"{mid - 0.01 * (i + 1):.2f}", "size": f"{100 * (i + 1)}"}
+            for i in reversed(range(depth))
+        ],
+        "asks": [
+            {"price": f"{mid + 0.01 * (i + 1):.2f}", "size": f"{100 * (i + 1)}"}
+            for i in reversed(range(depth))
+        ],
+    }
+
+
+class ClobHandler(GammaHandler):
+    orders: dict = {}
+    lock = threading.Lock()
+    rejected_tokens: "set[str]" = set()
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        time.sleep(self.latency)
+        if url.path == "/book":
+            self.send_json(fake_book(query["token_id"][0]))
+        elif url.path == "/tick-size":
+            self.send_json({"minimum_tick_size": 0.01})
+        elif url.path == "/neg-risk":
+            self.send_json({"neg_risk": False})
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        body = self.read_json()
+        time.sleep(self.latency)
+        if url.path == "/auth/api-key":
+            self.send_json(
+                {"apiKey": "standin", "secret": "c3RhbmRpbg==", "passphrase": "standin"}
+            )
+        elif url.path == "/books":
+            self.send_json([fake_book(p["token_id"]) for p in body])
+        elif url.path == "/prices":
+            prices = {}
+            for p in body:
+                book = fake_book(p["token_id"])
+                side = book["asks"] if p["side"] == "BUY" else book["bids"]
+                prices.setdefault(p["token_id"], {})[p["side"]] = side[-1]["price"]
+            self.send_json(prices)
+        elif url.path == "/order":
+            order = body["order"]
+            if order["tokenId"] in self.rejected_tokens:
+                self.send_json({"error": "not enough balance / allowance"}, status=400)
+                return
+            with self.lock:
+                order_id = f"0x{len(self.orders) + 1:064x}"
+                self.orders[order_id] = order
+            self.send_json(
+                {"success": True, "orderID": order_id, "status": "live", "errorMsg": ""}
+            )
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+    def do_DELETE(self) -> None:
+        url = urlparse(self.path)
+        body = self.read_json()
+        time.sleep(self.latency)
+        if url.path == "/orders":
+            canceled, not_canceled = [], {}
+            with self.lock:
+                for order_id in body:
+                    if self.orders.pop(order_id, None) is not None:
+                        canceled.append(order_id)
+                    else:
+                        not_canceled[order_id] = "order not found"
+            self.send_json({"canceled": canceled, "not_canceled": not_canceled})
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+
+def fake_embedding(text: str, dimensions: int = 64) -> "list[float]":
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    return [((seed >> (i % 64)) & 0xFF) / 255 for i in range(dimensions)]
+
+
+class EmbeddingHandler(GammaHandler):
+    # an OpenAI-compatible POST /embeddings, `latency` per request plus
+    # `token_latency` per estimated input token, dropping every `fail_every`th
+    # connection without a response (or answering it with `fail_status`)
+    dimensions: int = 64
+    token_latency: float = 0.0
+    fail_every: int = 0
+    fail_status: int = 0
+    requests = None
+    lock = threading.Lock()
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"null")
+        if url.path != "/embeddings":
+            self.send_json({"error": "not found"}, status=404)
+            return
+        with self.lock:
+            self.requests.append(len(body["input"]))
+            count = len(self.requests)
+        tokens = sum(len(text) // 4 + 1 for text in body["input"])
+        time.sleep(self.latency + tokens * self.token_latency)
+        if self.fail_every and count % self.fail_every == 0:
+            if self.fail_status:
+                self.send_json({"error": "unavailable"}, status=self.fail_status)
+            else:
+                self.close_connection = True
+            return
+        self.send_json(
+            {
+                "object": "list",
+                "model": body["model"],
+                "data": [
+                    {
+                        "object": "embedding",
+                        "index": i,
+                        "embedding": fake_embedding(text, self.dimensions),
+                    }
+                    for i, text in enumerate(body["input"])
+                ],
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            }
+        )
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops connections when clients fan out
+    request_queue_size = 128
+
+
+def serve(handler_class, **attributes) -> "tuple[StandinServer, str]":
+    handler = type(handler_class.__name__, (handler_class,), attributes)
+    server = StandinServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+def serve_gamma(n_markets: int = 5000, latency: float = 0.05):
+    markets = [fake_market(i) for i in range(1, n_markets + 1)]
+    return serve(GammaHandler, markets=markets, latency=latency)
+
+
+def serve_clob(latency: float = 0.05, rejected_tokens: "set[str]" = ()):
+    # orders live in a dict shared by all handler threads
+    return serve(
+        ClobHandler,
+        latency=latency,
+        orders={},
+        lock=threading.Lock(),
+        rejected_tokens=set(rejected_tokens),
+    )
+
+
+def serve_embeddings(
+    latency: float = 0.05,
+    token_latency: float = 0.0,
+    fail_every: int = 0,
+    fail_status: int = 0,
+):
+    # the sizes of all requests received, for the benchmark to inspect
+    return serve(
+        EmbeddingHandler,
+        latency=latency,
+        token_latency=token_latency,
+        fail_every=fail_every,
+        fail_status=fail_status,
+        requests=[],
+        lock=threading.Lock(),
+    )
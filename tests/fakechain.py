@@ -0,0 +1,239 @@
+# an in-process JSON-RPC provider with just enough of an EVM chain for the
+# reads and approvals the agents make: ERC20 balances and allowances, ERC1155
+# operator approvals and Multicall3's aggregate3
+
+from collections import Counter
+
+from eth_abi import decode, encode
+from eth_account.typed_transactions import TypedTransaction
+from eth_utils import function_signature_to_4byte_selector, keccak, to_checksum_address
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from agents.polymarket.chain import MULTICALL3_ADDRESS
+
+BALANCE_OF = function_signature_to_4byte_selector("balanceOf(address)")
+ALLOWANCE = function_signature_to_4byte_selector("allowance(address,address)")
+IS_APPROVED_FOR_ALL = function_signature_to_4byte_selector(
+    "isApprovedForAll(address,address)"
+)
+APPROVE = function_signature_to_4byte_selector("approve(address,uint256)")
+SET_APPROVAL_FOR_ALL = function_signature_to_4byte_selector(
+    "setApprovalForAll(address,bool)"
+)
+AGGREGATE3 = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+
+# Polygon USDC, the conditional tokens contract and the exchange contracts that
+# need approvals, with just the view functions read from them
+USDC = "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174"
+CTF = "0x4D97DCd97eC945f40cF65F87097ACe5EA0476045"
+SPENDERS = [
+    "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E",
+    "0xC5d563A36AE78145C45a50134d48A1215220f80a",
+    "0xd91E80cF2E7be2e162c6513ceD06f1dD0dA35296",
+]
+ABI = [
+    {
+        "inputs": [{"name": "account", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"name": "owner", "type": "address"},
+            {"name": "spender", "type": "address"},
+        ],
+        "name": "allowance",
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+    {
+        "inputs": [
+            {"name": "account", "type": "address"},
+            {"name": "operator", "type": "address"},
+        ],
+        "name": "isApprovedForAll",
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
+
+class Reverted(Exception):
+    pass
+
+
+class FakeChainProvider(BaseProvider):
+    """
+    Contract state lives in plain dicts keyed by checksum addresses. Every
+    request is counted by method in `requests`, and every aggregate3 call in
+    `multicalls`. Transactions are mined on receipt, one block each; those sent
+    to a `failing` contract are mined with status 0 and change nothing.
+    """
+
+    def __init__(self, multicall: bool = True, chain_id: int = 137) -> None:
+        self.chain_id = chain_id
+        self.block = 100
+        self.multicall = multicall
+        self.fail_multicall = False
+        self.requests = Counter()
+        self.multicalls = 0
+        # keyed by (token, owner), (token, owner, spender), (token, owner, operator)
+        self.balances: "dict[tuple, int]" = {}
+        self.allowances: "dict[tuple, int]" = {}
+        self.approvals: "dict[tuple, bool]" = {}
+        self.reverting: "set[str]" = set()  # contracts whose calls revert
+        self.unreachable: "set[str]" = set()  # rpc methods that fail to connect
+        self.failing: "set[str]" = set()  # contracts whose transactions revert
+        self.failed: "set[str]" = set()  # hashes of reverted transactions
+        self.nonces = Counter()
+        self.transactions: "list[dict]" = []
+
+    def make_request(self, method, params) -> dict:
+        self.requests[method] += 1
+        if method in self.unreachable:
+            raise ConnectionError(f"{method}: connection refused")
+        try:
+            result = getattr(self, "rpc_" + method)(*params)
+        except Reverted:
+            return {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "error": {"code": 3, "message": "execution reverted"},
+            }
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    def isConnected(self) -> bool:
+        return True
+
+    def mine(self) -> None:
+        self.block += 1
+
+    # json-rpc methods
+
+    def rpc_eth_chainId(self) -> str:
+        return hex(self.chain_id)
+
+    def rpc_eth_blockNumber(self) -> str:
+        return hex(self.block)
+
+    def rpc_eth_getCode(self, address, block="latest") -> str:
+        if self.multicall and address.lower() == MULTICALL3_ADDRESS.lower():
+            return "0x01"
+        return "0x"
+
+    def rpc_eth_call(self, transaction, block="latest") -> str:
+        to = to_checksum_address(transaction["to"])
+        data = bytes.fromhex(transaction["data"][2:])
+        if to == to_checksum_address(MULTICALL3_ADDRESS):
+            return "0x" + self.aggregate3(data).hex()
+        return "0x" + self.call(to, data).hex()
+
+    def rpc_eth_getTransactionCount(self, address, block="latest") -> str:
+        return hex(self.nonces[to_checksum_address(address)])
+
+    def rpc_eth_estimateGas(self, transaction, block=None) -> str:
+        return hex(60000)
+
+    def rpc_eth_gasPrice(self) -> str:
+        return hex(30 * 10**9)
+
+    def rpc_eth_maxPriorityFeePerGas(self) -> str:
+        return hex(30 * 10**9)
+
+    def rpc_eth_getBlockByNumber(self, block, full=False) -> dict:
+        return {
+            "number": hex(self.block),
+            "hash": "0x" + keccak(self.block.to_bytes(32, "big")).hex(),
+            "baseFeePerGas": hex(10**9),
+            "gasLimit": hex(30_000_000),
+            "timestamp": hex(1_700_000_000 + self.block),
+            "transactions": [],
+        }
+
+    def rpc_eth_sendRawTransaction(self, raw) -> str:
+        raw = HexBytes(raw)
+        transaction = TypedTransaction.from_bytes(raw).as_dict()
+        sender = to_checksum_address(Web3().eth.account.recover_transaction(raw))
+        transaction["from"] = sender
+        self.transactions.append(transaction)
+        self.nonces[sender] += 1
+        to = to_checksum_address(transaction["to"])
+        tx_hash = "0x" + keccak(raw).hex()
+        if to in self.failing:
+            self.failed.add(tx_hash)
+        else:
+            self.execute(sender, to, bytes(transaction["data"]))
+        self.mine()
+        return tx_hash
+
+    def rpc_eth_getTransactionReceipt(self, tx_hash) -> dict:
+        return {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(self.block),
+            "blockHash": "0x" + "00" * 32,
+            "transactionIndex": "0x0",
+            "status": "0x0" if tx_hash in self.failed else "0x1",
+            "gasUsed": hex(60000),
+            "cumulativeGasUsed": hex(60000),
+            "logs": [],
+            "contractAddress": None,
+            "from": "0x" + "00" * 20,
+            "to": "0x" + "00" * 20,
+            "logsBloom": "0x" + "00" * 256,
+            "effectiveGasPrice": hex(10**9),
+            "type": "0x2",
+        }
+
+    # contracts
+
+    def call(self, to: str, data: bytes) -> bytes:
+        if to in self.reverting:
+            raise Reverted()
+        selector, args = data[:4], data[4:]
+        if selector == BALANCE_OF:
+            (owner,) = decode(["address"], args)
+            value = self.balances.get((to, to_checksum_address(owner)), 0)
+            return encode(["uint256"], [value])
+        if selector == ALLOWANCE:
+            owner, spender = map(
+                to_checksum_address, decode(["address", "address"], args)
+            )
+            return encode(["uint256"], [self.allowances.get((to, owner, spender), 0)])
+        if selector == IS_APPROVED_FOR_ALL:
+            owner, operator = map(
+                to_checksum_address, decode(["address", "address"], args)
+            )
+            return encode(["bool"], [self.approvals.get((to, owner, operator), False)])
+        raise Reverted()
+
+    def aggregate3(self, data: bytes) -> bytes:
+        self.multicalls += 1
+        if self.fail_multicall or data[:4] != AGGREGATE3:
+            raise Reverted()
+        (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+        results = []
+        for target, allow_failure, call_data in calls:
+            try:
+                results.append(
+                    (True, self.call(to_checksum_address(target), call_data))
+                )
+            except Reverted:
+                if not allow_failure:
+                    raise
+                results.append((False, b""))
+        return encode(["(bool,bytes)[]"], [results])
+
+    def execute(self, sender: str, to: str, data: bytes) -> None:
+        selector, args = data[:4], data[4:]
+        if selector == APPROVE:
+            spender, amount = decode(["address", "uint256"], args)
+            self.allowances[(to, sender, to_checksum_address(spender))] = amount
+        elif selector == SET_APPROVAL_FOR_ALL:
+            operator, approved = decode(["address", "bool"], args)
+            self.approvals[(to, sender, to_checksum_address(operator))] = approved
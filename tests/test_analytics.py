@@ -0,0 +1,122 @@
+import unittest
+
+import numpy as np
+from py_clob_client.clob_types import OrderBookSummary, OrderSummary
+
+from agents.polymarket.analytics import BookDepth
+from agents.polymarket.orderbook import BUY, SELL, L2Book
+
+
+def book(asset_id: str, bids=(), asks=()) -> OrderBookSummary:
+    # levels in the order the CLOB returns them: worst to best on both sides
+    return OrderBookSummary(
+        market="0xmarket",
+        asset_id=asset_id,
+        bids=[OrderSummary(price=p, size=s) for p, s in bids],
+        asks=[OrderSummary(price=p, size=s) for p, s in asks],
+        hash="0",
+    )
+
+
+# asks: 100 @ 0.50, 50 @ 0.51, 100 @ 0.52 -> 250 shares for 127.5 usdc
+# bids: 100 @ 0.48, 50 @ 0.47, 200 @ 0.46 -> 350 shares for 163.5 usdc
+BOOK = book(
+    "111",
+    bids=[("0.46", "200"), ("0.47", "50"), ("0.48", "100")],
+    asks=[("0.52", "100"), ("0.51", "50"), ("0.50", "100")],
+)
+EMPTY = book("222")
+
+
+class TestBookDepth(unittest.TestCase):
+    def depth(self, side: str) -> "dict[str, BookDepth]":
+        # summaries and incremental books give the same levels
+        return {
+            "summary": BookDepth([BOOK, EMPTY], side),
+            "l2": BookDepth(
+                [L2Book.from_summary(BOOK), L2Book.from_summary(EMPTY)], side
+            ),
+        }
+
+    def test_buy_partial_last_level(self):
+        for kind, depth in self.depth(BUY).items():
+            with self.subTest(book=kind):
+                # 50 + 25.5 usdc take the first two levels, 4.5 usdc of the third
+                estimate = depth.fill(80)
+                size = 150 + 4.5 / 0.52
+                self.assertAlmostEqual(estimate.size[0], size)
+                self.assertAlmostEqual(estimate.cost[0], 80)
+                self.assertAlmostEqual(estimate.vwap[0], 80 / size)
+                self.assertAlmostEqual(estimate.worst_price[0], 0.52)
+                self.assertAlmostEqual(estimate.slippage[0], 80 / size - 0.50)
+                self.assertTrue(estimate.complete[0])
+
+    def test_sell_partial_last_level(self):
+        for kind, depth in self.depth(SELL).items():
+            with self.subTest(book=kind):
+                estimate = depth.fill(120)
+                self.assertAlmostEqual(estimate.size[0], 120)
+                self.assertAlmostEqual(estimate.cost[0], 100 * 0.48 + 20 * 0.47)
+                self.assertAlmostEqual(estimate.vwap[0], 57.4 / 120)
+                self.assertAlmostEqual(estimate.worst_price[0], 0.47)
+                self.assertAlmostEqual(estimate.slippage[0], 0.48 - 57.4 / 120)
+                self.assertTrue(estimate.complete[0])
+
+    def test_amount_larger_than_the_book(self):
+        estimate = BookDepth([BOOK]).fill(500)
+        self.assertAlmostEqual(estimate.size[0], 250)
+        self.assertAlmostEqual(estimate.cost[0], 127.5)
+        self.assertAlmostEqual(estimate.vwap[0], 0.51)
+        self.assertAlmostEqual(estimate.worst_price[0], 0.52)
+        self.assertFalse(estimate.complete[0])
+
+        estimate = BookDepth([BOOK], SELL).fill(1000)
+        self.assertAlmostEqual(estimate.size[0], 350)
+        self.assertAlmostEqual(estimate.cost[0], 163.5)
+        self.assertAlmostEqual(estimate.worst_price[0], 0.46)
+        self.assertFalse(estimate.complete[0])
+
+    def test_shares_amount_for_buy(self):
+        estimate = BookDepth([BOOK]).fill(120, in_usdc=False)
+        self.assertAlmostEqual(estimate.size[0], 120)
+        self.assertAlmostEqual(estimate.cost[0], 100 * 0.50 + 20 * 0.51)
+
+    def test_empty_book(self):
+        for side in (BUY, SELL):
+            with self.subTest(side=side):
+                depth = BookDepth([EMPTY], side)
+                estimate = depth.fill(10)
+                self.assertEqual((estimate.size[0], estimate.cost[0]), (0.0, 0.0))
+                self.assertTrue(np.isnan(estimate.vwap[0]))
+                self.assertTrue(np.isnan(estimate.worst_price[0]))
+                self.assertFalse(estimate.complete[0])
+                self.assertTrue(np.isnan(depth.best_price()[0]))
+                shares, cost = depth.size_within_slippage(0.05)
+                self.assertEqual((shares[0], cost[0]), (0.0, 0.0))
+
+        estimate = BookDepth([]).fill(10)
+        self.assertEqual(len(estimate.size), 0)
+
+    def test_empty_book_next_to_a_full_one(self):
+        estimate = BookDepth([BOOK, EMPTY]).fill([80, 10])
+        self.assertAlmostEqual(estimate.cost[0], 80)
+        self.assertEqual(estimate.size[1], 0.0)
+        self.assertEqual(list(estimate.complete), [True, False])
+
+    def test_size_within_slippage(self):
+        shares, cost = BookDepth([BOOK, EMPTY]).size_within_slippage(0.015)
+        self.assertAlmostEqual(shares[0], 150)
+        self.assertAlmostEqual(cost[0], 75.5)
+        self.assertEqual((shares[1], cost[1]), (0.0, 0.0))
+
+        shares, cost = BookDepth([BOOK], SELL).size_within_slippage(0.015)
+        self.assertAlmostEqual(shares[0], 150)
+        self.assertAlmostEqual(cost[0], 48 + 23.5)
+
+        # only the best level
+        shares, cost = BookDepth([BOOK]).size_within_slippage(0.0)
+        self.assertEqual((shares[0], cost[0]), (100.0, 50.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import unittest
+from unittest import mock
+
+from eth_account import Account
+from web3 import Web3
+from web3.constants import MAX_INT
+
+from tests.fakechain import APPROVE, SET_APPROVAL_FOR_ALL, FakeChainProvider
+
+
+class TestInitApprovals(unittest.TestCase):
+    def setUp(self):
+        env = {"POLYGON_WALLET_PRIVATE_KEY": Account.create().key.hex()}
+        with mock.patch.dict(os.environ, env):
+            from agents.polymarket.polymarket import Polymarket
+
+            self.polymarket = Polymarket()
+        self.provider = FakeChainProvider()
+        self.polymarket.web3 = Web3(self.provider)
+        self.owner = self.polymarket.address
+        self.usdc = self.polymarket.usdc_address
+        self.ctf = self.polymarket.ctf_address
+        self.spenders = self.polymarket.approval_spenders
+        self.provider.nonces[self.owner] = 7
+
+    def sent(self) -> "list[tuple]":
+        """(nonce, contract, selector) of every transaction sent."""
+        return [
+            (tx["nonce"], Web3.to_checksum_address(tx["to"]), tx["data"][:4])
+            for tx in self.provider.transactions
+        ]
+
+    def assert_fully_approved(self):
+        self.polymarket.chain.invalidate()
+        state = self.polymarket.get_trading_state()
+        for spender in self.spenders:
+            self.assertEqual(state["allowances"][spender], int(MAX_INT, 0))
+            self.assertTrue(state["approved_for_all"][spender])
+
+    def test_sends_every_missing_approval_with_consecutive_nonces(self):
+        self.polymarket._init_approvals(True)
+
+        self.assertEqual(
+            self.sent(),
+            [
+                (7 + i, contract, selector)
+                for i, (contract, selector) in enumerate(
+                    [(self.usdc, APPROVE), (self.ctf, SET_APPROVAL_FOR_ALL)] * 3
+                )
+            ],
+        )
+        self.assert_fully_approved()
+
+    def test_skips_approvals_already_granted(self):
+        first, second, third = self.spenders
+        self.provider.allowances[(self.usdc, self.owner, first)] = int(MAX_INT, 0)
+        self.provider.allowances[(self.usdc, self.owner, second)] = 10**6
+        self.provider.approvals[(self.ctf, self.owner, first)] = True
+        self.provider.approvals[(self.ctf, self.owner, second)] = True
+
+        self.polymarket._init_approvals(True)
+
+        self.assertEqual(
+            self.sent(),
+            [
+                (7, self.usdc, APPROVE),
+                (8, self.usdc, APPROVE),
+                (9, self.ctf, SET_APPROVAL_FOR_ALL),
+            ],
+        )
+        self.assert_fully_approved()
+
+    def test_nothing_sent_when_all_approved(self):
+        for spender in self.spenders:
+            self.provider.allowances[(self.usdc, self.owner, spender)] = int(MAX_INT, 0)
+            self.provider.approvals[(self.ctf, self.owner, spender)] = True
+
+        self.polymarket._init_approvals(True)
+
+        self.assertEqual(self.sent(), [])
+        self.assertEqual(self.provider.requests["eth_getTransactionCount"], 0)
+
+    def test_reverted_reads_count_as_not_approved(self):
+        self.provider.reverting.add(self.usdc)
+        self.provider.reverting.add(self.ctf)
+
+        self.polymarket._init_approvals(True)
+
+        self.assertEqual(len(self.sent()), 6)
+
+    def test_reverted_approval_transactions_raise(self):
+        self.provider.failing.add(self.ctf)
+
+        with self.assertRaisesRegex(Exception, "Approval transactions reverted"):
+            self.polymarket._init_approvals(True)
+
+        # the USDC approvals went through and are not sent again
+        self.provider.transactions.clear()
+        self.provider.failing.clear()
+        self.polymarket._init_approvals(True)
+        self.assertEqual(
+            self.sent(), [(7 + 6 + i, self.ctf, SET_APPROVAL_FOR_ALL) for i in range(3)]
+        )
+        self.assert_fully_approved()
+
+
+if __name__ == "__main__":
+    unittest.main()
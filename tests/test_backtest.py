@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from agents.application.backtest import Backtester, MarketHistory, StubLLM
+from scripts.python.bench_backtest import write_history
+
+
+class TestBacktester(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = write_history(directory, n_markets=200, n_days=120, seed=1)
+            cls.history = MarketHistory.from_files(*paths)
+
+    def run_backtest(self, size: float = 0.1, **kwargs):
+        backtester = Backtester(
+            self.history,
+            llm=StubLLM(size=size),
+            filter_top=8,
+            trades_per_day=4,
+            holding_days=30,
+            slippage=0.01,
+            **kwargs,
+        )
+        return backtester.run()
+
+    def assert_consistent(self, result):
+        self.assertTrue((result.equity >= 0).all())
+        stats = result.stats
+        self.assertEqual(np.sign(stats["sharpe"]), np.sign(stats["total_return"]))
+        self.assertLessEqual(stats["max_drawdown"], 1.0)
+
+    def test_equity_stays_non_negative(self):
+        for size in (0.1, 0.5, 1.0):
+            with self.subTest(size=size):
+                self.assert_consistent(self.run_backtest(size=size))
+
+    def test_open_positions_worth_at_most_equity(self):
+        result = self.run_backtest(size=1.0, fee_rate_bps=100)
+        trades = result.trades
+        self.assertGreater(len(trades["day"]), 0)
+        yes = trades["side"] == "BUY"
+        for day in range(len(result.dates)):
+            held = (trades["day"] <= day) & (day < trades["close_day"])
+            price = self.history.prices[day, trades["market_index"]]
+            value = trades["shares"] * np.where(yes, price, 1 - price)
+            self.assertLessEqual(value[held].sum(), result.equity[day] + 1e-9)
+
+    def test_stops_once_equity_is_gone(self):
+        # all in on YES in a market that resolves NO
+        def respond(prompt):
+            return "price:0.99,\nsize:1.0,\nside:BUY,"
+
+        history = MarketHistory(
+            [{"id": 1, "question": "q", "closed": True, "outcomePrices": '["0","1"]'}],
+            np.arange(5),
+            np.array([[0.5], [0.4], [0.2], [np.nan], [np.nan]]),
+        )
+        backtester = Backtester(
+            history, llm=StubLLM(respond), filter_top=1, trades_per_day=1
+        )
+        result = backtester.run()
+        self.assertEqual(result.equity[-1], 0.0)
+        self.assertTrue((result.equity >= 0).all())
+        self.assertTrue(np.isfinite(result.returns).all())
+        self.assertLess(result.stats["total_return"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
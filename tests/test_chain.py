@@ -0,0 +1,97 @@
+import unittest
+
+from web3 import Web3
+
+from agents.polymarket.chain import ChainStateReader
+from tests.fakechain import ABI, CTF, SPENDERS, USDC, FakeChainProvider
+
+OWNER = "0x1111111111111111111111111111111111111111"
+
+
+class TestChainStateReader(unittest.TestCase):
+    def setUp(self):
+        self.provider = FakeChainProvider()
+        self.provider.balances[(USDC, OWNER)] = 25 * 10**6
+        self.provider.allowances[(USDC, OWNER, SPENDERS[0])] = 10**18
+        self.provider.approvals[(CTF, OWNER, SPENDERS[1])] = True
+        web3 = Web3(self.provider)
+        self.usdc = web3.eth.contract(address=USDC, abi=ABI)
+        self.ctf = web3.eth.contract(address=CTF, abi=ABI)
+        # check the block number on every read
+        self.reader = ChainStateReader(web3, block_time=0)
+
+    def functions(self) -> list:
+        return (
+            [self.usdc.functions.balanceOf(OWNER)]
+            + [self.usdc.functions.allowance(OWNER, s) for s in SPENDERS]
+            + [self.ctf.functions.isApprovedForAll(OWNER, s) for s in SPENDERS]
+        )
+
+    def expected(self, balance=25 * 10**6) -> list:
+        return [balance, 10**18, 0, 0, False, True, False]
+
+    def test_one_eth_call_per_batch(self):
+        self.assertEqual(self.reader.read(self.functions()), self.expected())
+        self.assertEqual(self.provider.requests["eth_call"], 1)
+        self.assertEqual(self.provider.multicalls, 1)
+
+    def test_cached_until_next_block(self):
+        self.reader.read(self.functions())
+        self.provider.balances[(USDC, OWNER)] = 30 * 10**6
+
+        # same block: served from the cache, stale value included
+        self.assertEqual(self.reader.read(self.functions()), self.expected())
+        self.assertEqual(self.provider.requests["eth_call"], 1)
+        self.assertEqual(self.reader.hits, 7)
+
+        self.provider.mine()
+        self.assertEqual(self.reader.read(self.functions()), self.expected(30 * 10**6))
+        self.assertEqual(self.provider.requests["eth_call"], 2)
+
+    def test_invalidate(self):
+        self.reader.read(self.functions())
+        self.reader.invalidate()
+        self.reader.read(self.functions())
+        self.assertEqual(self.provider.requests["eth_call"], 2)
+
+    def test_reverted_read_is_none(self):
+        self.provider.reverting.add(CTF)
+        results = self.reader.read(self.functions())
+        self.assertEqual(results[:4], self.expected()[:4])
+        self.assertEqual(results[4:], [None, None, None])
+        self.assertEqual(self.provider.requests["eth_call"], 1)
+
+    def test_network_errors_raise_and_are_not_cached(self):
+        for multicall in (True, False):
+            with self.subTest(multicall=multicall):
+                self.setUp()
+                self.provider.multicall = multicall
+                self.provider.unreachable.add("eth_call")
+                with self.assertRaises(ConnectionError):
+                    self.reader.read(self.functions())
+
+                self.provider.unreachable.clear()
+                self.assertEqual(self.reader.read(self.functions()), self.expected())
+
+    def test_reverted_read_is_none_without_multicall(self):
+        self.provider.multicall = False
+        self.provider.reverting.add(USDC)
+        results = self.reader.read(self.functions())
+        self.assertEqual(results[:4], [None] * 4)
+        self.assertEqual(results[4:], self.expected()[4:])
+
+    def test_falls_back_when_aggregate3_fails(self):
+        self.provider.fail_multicall = True
+        self.assertEqual(self.reader.read(self.functions()), self.expected())
+        # the failed aggregate3, then one call per read
+        self.assertEqual(self.provider.requests["eth_call"], 1 + 7)
+
+    def test_falls_back_without_multicall(self):
+        self.provider.multicall = False
+        self.assertEqual(self.reader.read(self.functions()), self.expected())
+        self.assertEqual(self.provider.requests["eth_call"], 7)
+        self.assertEqual(self.provider.multicalls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from langchain_core.documents import Document
+
+from agents.connectors.chroma import PolymarketRAG
+from agents.polymarket.snapshot import SnapshotStore
+
+
+class RecordingEmbeddings:
+    """Records every text that gets embedded."""
+
+    def __init__(self) -> None:
+        self.texts: "list[str]" = []
+
+    def embed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        self.texts += texts
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> "list[float]":
+        return [float(len(text)), 1.0]
+
+
+def docs(descriptions: "dict[int, str]") -> "list[Document]":
+    return [
+        Document(page_content=text, metadata={"id": doc_id, "source": "events.json"})
+        for doc_id, text in descriptions.items()
+    ]
+
+
+class TestUpdateIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = os.path.join(self.directory.name, "chroma")
+        self.embeddings = RecordingEmbeddings()
+        self.rag = PolymarketRAG(backend="chroma")
+        self.rag.get_embedding_function = lambda: self.embeddings
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_only_changed_documents_are_embedded(self):
+        descriptions = {1: "first event", 2: "second event", 3: "third event"}
+        self.rag.update_index(docs(descriptions), self.index, "events")
+        self.assertEqual(sorted(self.embeddings.texts), sorted(descriptions.values()))
+
+        self.embeddings.texts.clear()
+        descriptions[2] = "second event, now with more detail"
+        local_db = self.rag.update_index(docs(descriptions), self.index, "events")
+        self.assertEqual(self.embeddings.texts, [descriptions[2]])
+
+        stored = local_db.get()
+        self.assertEqual(sorted(stored["ids"]), ["1", "2", "3"])
+        self.assertIn(descriptions[2], stored["documents"])
+
+        self.embeddings.texts.clear()
+        self.rag.update_index(docs(descriptions), self.index, "events")
+        self.assertEqual(self.embeddings.texts, [])
+
+    def test_closed_entries_are_deleted(self):
+        self.rag.update_index(docs({1: "open", 2: "closing"}), self.index, "events")
+
+        store = SnapshotStore(path=os.path.join(self.directory.name, "snapshot.db"))
+        store.upsert(
+            "events",
+            [
+                {"id": 1, "active": True, "closed": False, "archived": False},
+                {"id": 2, "active": True, "closed": True, "archived": False},
+            ],
+        )
+        self.rag.gamma_client.snapshot_store = store
+        # a later call only passes a subset: 1 is kept, 2 is closed and removed
+        local_db = self.rag.update_index(docs({3: "new"}), self.index, "events")
+        self.assertEqual(sorted(local_db.get()["ids"]), ["1", "3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
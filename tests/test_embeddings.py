@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+
+import httpx
+import numpy as np
+
+from agents.connectors.embeddings import BatchEmbedder
+from agents.utils.ratelimit import RequestScheduler
+from agents.utils.transport import HttpTransport
+from scripts.python.standin import fake_embedding, serve_embeddings
+
+
+class CharacterEncoding:
+    """One token per character, so tests don't need tiktoken's encoding files."""
+
+    def encode(self, text: str, disallowed_special=()) -> "list[str]":
+        return list(text)
+
+    def decode(self, tokens: "list[str]") -> str:
+        return "".join(tokens)
+
+
+class TestBatchEmbedder(unittest.TestCase):
+    def setUp(self):
+        self.server, self.url = serve_embeddings(latency=0.0, fail_every=3)
+        self.transport = HttpTransport(scheduler=RequestScheduler())
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+
+    def embedder(self, **kwargs) -> BatchEmbedder:
+        return BatchEmbedder(
+            base_url=self.url, transport=self.transport, max_concurrency=1, **kwargs
+        )
+
+    def test_retries_dropped_requests_in_order(self):
+        texts = [f"market {i} " * 50 for i in range(20)]
+        embedder = self.embedder(max_batch_tokens=500)
+        vectors = embedder.embed_documents(texts)
+        self.assertEqual(vectors, [fake_embedding(text) for text in texts])
+        self.assertGreater(embedder.last_run["retries"], 0)
+
+    def test_awaited_from_other_loops(self):
+        embedder = self.embedder()
+        texts = [f"query {i}" for i in range(3)]
+        for _ in range(2):
+            # each asyncio.run is a new loop, the transport's client is reused
+            vectors = asyncio.run(embedder.aembed_documents(texts))
+            self.assertEqual(vectors, [fake_embedding(text) for text in texts])
+
+    def test_client_errors_are_not_retried(self):
+        embedder = BatchEmbedder(base_url=self.url + "/v2", transport=self.transport)
+        with self.assertRaises(httpx.HTTPStatusError):
+            embedder.embed_documents(["text"])
+        self.assertEqual(self.transport.scheduler.counters["status_404"], 1)
+
+    def test_server_errors_are_only_retried_by_the_scheduler(self):
+        server, url = serve_embeddings(latency=0.0, fail_every=1, fail_status=503)
+        scheduler = RequestScheduler(max_retries=2, backoff_base=0.01)
+        transport = HttpTransport(scheduler=scheduler)
+        embedder = BatchEmbedder(base_url=url, transport=transport)
+        try:
+            with self.assertRaises(httpx.HTTPStatusError):
+                embedder.embed_documents(["text"])
+            self.assertEqual(len(server.RequestHandlerClass.requests), 3)
+        finally:
+            transport.close()
+            server.shutdown()
+
+    def test_splits_texts_over_the_input_limit(self):
+        embedder = self.embedder(max_input_tokens=100)
+        embedder._encoding = CharacterEncoding()
+        long_text = "a" * 150 + "b" * 100
+        short, combined = embedder.embed_documents(["short", long_text])
+
+        self.assertEqual(short, fake_embedding("short"))
+        sizes = self.server.RequestHandlerClass.requests
+        self.assertEqual(sum(sizes), 4)  # "short" and three chunks
+        chunks = ["a" * 100, "a" * 50 + "b" * 50, "b" * 50]
+        mean = np.average(
+            [fake_embedding(chunk) for chunk in chunks], axis=0, weights=[100, 100, 50]
+        )
+        np.testing.assert_allclose(combined, mean / np.linalg.norm(mean))
+
+
+if __name__ == "__main__":
+    unittest.main()
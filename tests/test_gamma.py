@@ -0,0 +1,56 @@
+import unittest
+
+from agents.polymarket.gamma import GammaMarketClient, construct_trusted
+from agents.utils.objects import Market, PolymarketEvent, Tag
+from scripts.python.standin import fake_market
+
+
+class TestConstructTrusted(unittest.TestCase):
+    def test_same_as_model_construct(self):
+        values = {"id": "7", "label": "Politics", "slug": "politics"}
+        tag = construct_trusted(Tag, values)
+        self.assertEqual(tag, Tag.model_construct(**values))
+        self.assertEqual(tag.model_fields_set, {"id", "label", "slug"})
+        self.assertIsNone(tag._sync)
+
+    def test_private_attributes_are_usable(self):
+        event = construct_trusted(PolymarketEvent, {"id": "1", "title": "t"})
+        self.assertIsNone(event._sync)
+        event._sync = True
+        self.assertTrue(event._sync)
+        # each instance has its own private attributes
+        self.assertIsNone(construct_trusted(PolymarketEvent, {"id": "2"})._sync)
+
+    def test_unknown_keys_are_dropped(self):
+        values = {"id": 3, "question": "q", "notAField": 1}
+        market = construct_trusted(Market, values)
+        self.assertEqual(market, Market.model_construct(id=3, question="q"))
+
+
+class TestParseBatch(unittest.TestCase):
+    def setUp(self):
+        self.gamma = GammaMarketClient(transport=object())
+
+    def test_valid_page(self):
+        markets = self.gamma.parse_pydantic_markets([fake_market(i) for i in (1, 2)])
+        self.assertEqual([m.id for m in markets], [1, 2])
+        self.assertEqual(markets[0].outcomePrices, ["0.4", "0.6"])
+
+    def test_invalid_objects_are_skipped(self):
+        page = [fake_market(1), {"id": "not a number"}, fake_market(3)]
+        markets = self.gamma.parse_pydantic_markets(page)
+        self.assertEqual([m.id for m in markets], [1, 3])
+
+    def test_trusted_matches_validated_for_snapshots(self):
+        record = Market.model_validate(
+            self.gamma._decode_market_fields(fake_market(5))
+        ).model_dump()
+        (trusted,) = self.gamma.parse_pydantic_markets([record], trusted=True)
+        (validated,) = self.gamma.parse_pydantic_markets([record])
+        self.assertEqual(trusted.id, validated.id)
+        self.assertEqual(trusted.question, validated.question)
+        self.assertEqual(trusted.clobRewards[0].id, validated.clobRewards[0].id)
+
+
+if __name__ == "__main__":
+    unittest.main()
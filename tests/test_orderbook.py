@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from agents.polymarket.orderbook import BUY, SELL, OrderBookEngine
+
+FEED = os.path.join(os.path.dirname(__file__), "fixtures", "market_feed.jsonl")
+
+
+class TestOrderBookReplay(unittest.TestCase):
+    def test_replay_matches_snapshots(self):
+        engine = OrderBookEngine()
+        self.assertEqual(engine.replay(FEED, check_snapshots=True), 9)
+        self.assertEqual(engine.mismatches, [])
+
+        book = engine.books["111"]
+        self.assertEqual(book.best_bid(), (0.49, 70.0))
+        self.assertEqual(book.best_ask(), (0.52, 120.0))
+        self.assertEqual(book.depth(SELL), [(0.52, 120.0), (0.53, 10.0)])
+        self.assertEqual(book.hash, "a3")
+        self.assertEqual(engine.books["222"].depth(BUY), [(0.31, 25.0), (0.3, 10.0)])
+
+    def test_replay_reports_divergence(self):
+        with open(FEED) as feed:
+            lines = feed.readlines()
+        # drop the delta that removes the 0.51 ask, the next snapshot of 111
+        # no longer matches the local book
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as out:
+            out.writelines(lines[:2] + lines[3:])
+        try:
+            engine = OrderBookEngine()
+            engine.replay(out.name, check_snapshots=True)
+        finally:
+            os.remove(out.name)
+        self.assertEqual(engine.mismatches, [{"asset_id": "111", "timestamp": "1005"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
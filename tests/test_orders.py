@@ -0,0 +1,77 @@
+import os
+import unittest
+from unittest import mock
+
+from eth_account import Account
+from py_clob_client.clob_types import OrderArgs
+
+from scripts.python.standin import serve_clob
+
+REJECTED = {"1003", "1007"}
+
+
+class TestPlaceOrders(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server, url = serve_clob(latency=0.0, rejected_tokens=REJECTED)
+        env = {
+            "CLOB_API_URL": url,
+            "POLYGON_WALLET_PRIVATE_KEY": Account.create().key.hex(),
+        }
+        with mock.patch.dict(os.environ, env):
+            from agents.polymarket.polymarket import Polymarket
+
+            cls.polymarket = Polymarket()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.server.RequestHandlerClass.orders.clear()
+
+    def test_place_and_cancel(self):
+        orders = [
+            OrderArgs(token_id=str(1000 + i), price=0.5, size=10, side="BUY")
+            for i in range(10)
+        ]
+        results = self.polymarket.place_orders(orders, max_workers=4)
+
+        self.assertEqual([r["order"] for r in results], orders)
+        failed = {r["order"].token_id for r in results if not r["success"]}
+        self.assertEqual(failed, REJECTED)
+        self.assertTrue(all(r["error"] for r in results if not r["success"]))
+
+        placed = [r["response"]["orderID"] for r in results if r["success"]]
+        self.assertEqual(len(placed), 8)
+        self.assertEqual(len(self.server.RequestHandlerClass.orders), 8)
+
+        cancelled = self.polymarket.cancel_orders(placed + ["0xunknown"], batch_size=3)
+        self.assertEqual(sorted(cancelled["canceled"]), sorted(placed))
+        self.assertEqual(list(cancelled["not_canceled"]), ["0xunknown"])
+        self.assertEqual(self.server.RequestHandlerClass.orders, {})
+
+    def test_signed_like_create_order(self):
+        args = OrderArgs(token_id="2001", price=0.37, size=12.5, side="SELL")
+        self.polymarket.place_orders([args])
+
+        (posted,) = self.server.RequestHandlerClass.orders.values()
+        expected = self.polymarket.client.create_order(args).dict()
+        # the salt is random, and the signature covers it
+        for order in (posted, expected):
+            del order["salt"], order["signature"]
+        self.assertEqual(posted, expected)
+
+    def test_invalid_price_is_reported_per_order(self):
+        orders = [
+            OrderArgs(token_id="3001", price=1.5, size=10, side="BUY"),
+            OrderArgs(token_id="3002", price=0.5, size=10, side="BUY"),
+        ]
+        bad, good = self.polymarket.place_orders(orders)
+        self.assertFalse(bad["success"])
+        self.assertTrue(bad["error"].startswith("signing failed"))
+        self.assertTrue(good["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
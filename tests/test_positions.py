@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+
+from agents.polymarket.positions import Position, PositionLedger
+from agents.utils.objects import Trade
+
+US = "0xAbC0000000000000000000000000000000000001"
+THEM = "0x2222222222222222222222222222222222222222"
+
+
+def trade(trade_id, match_time, side="BUY", size=10, price=0.5, **fields) -> dict:
+    return {
+        "id": trade_id,
+        "taker_order_id": f"0x{trade_id}",
+        "market": "0xmarket",
+        "asset_id": "111",
+        "side": side,
+        "size": str(size),
+        "fee_rate_bps": "0",
+        "price": str(price),
+        "status": "CONFIRMED",
+        "match_time": str(match_time),
+        "last_update": str(match_time),
+        "outcome": "Yes",
+        "maker_address": THEM,
+        "owner": "owner",
+        "transaction_hash": "0xhash",
+        "bucket_index": "0",
+        "maker_orders": [],
+        "type": "TAKER",
+        **fields,
+    }
+
+
+def maker_order(address, size, price, side="SELL") -> dict:
+    return {
+        "order_id": "0xmaker",
+        "maker_address": address,
+        "matched_amount": str(size),
+        "price": str(price),
+        "asset_id": "111",
+        "owner": "owner",
+        "outcome": "Yes",
+        "fee_rate_bps": "0",
+        "side": side,
+    }
+
+
+class TestPosition(unittest.TestCase):
+    def test_open_and_add(self):
+        position = Position("111")
+        position.apply("BUY", 10, 0.40)
+        position.apply("BUY", 30, 0.60)
+        self.assertEqual(position.size, 40)
+        self.assertAlmostEqual(position.avg_price, 0.55)
+        self.assertEqual(position.realized_pnl, 0.0)
+
+    def test_reduce_realizes_against_average_entry(self):
+        position = Position("111")
+        position.apply("BUY", 40, 0.55)
+        position.apply("SELL", 10, 0.75, fee=0.05)
+        self.assertEqual(position.size, 30)
+        self.assertAlmostEqual(position.avg_price, 0.55)
+        self.assertAlmostEqual(position.realized_pnl, 10 * 0.20 - 0.05)
+        self.assertAlmostEqual(position.fees, 0.05)
+        self.assertAlmostEqual(position.unrealized_pnl(0.65), 30 * 0.10)
+
+    def test_flip_reopens_at_the_fill_price(self):
+        position = Position("111")
+        position.apply("BUY", 10, 0.50)
+        position.apply("SELL", 25, 0.40)
+        self.assertEqual(position.size, -15)
+        self.assertAlmostEqual(position.avg_price, 0.40)
+        self.assertAlmostEqual(position.realized_pnl, -1.0)
+        # short: profits when the price falls
+        self.assertAlmostEqual(position.unrealized_pnl(0.30), 1.5)
+
+    def test_close_leaves_no_dust(self):
+        position = Position("111")
+        for size in (0.1, 0.2):
+            position.apply("BUY", size, 0.5)
+        position.apply("SELL", 0.3, 0.6)
+        self.assertEqual(position.size, 0.0)
+        self.assertEqual(position.avg_price, 0.0)
+        self.assertAlmostEqual(position.realized_pnl, 0.03)
+
+
+class TestPositionLedger(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "positions.json")
+        self.ledger = PositionLedger(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_taker_fill(self):
+        self.assertTrue(self.ledger.apply_trade(trade(1, 100), US))
+        position = self.ledger.positions["111"]
+        self.assertEqual((position.size, position.avg_price), (10, 0.5))
+
+    def test_maker_fill_is_ours_not_the_takers(self):
+        # someone bought 10 from our resting sell of 4 and another maker's 6
+        record = trade(
+            1,
+            100,
+            maker_orders=[maker_order(US.lower(), 4, 0.55), maker_order(THEM, 6, 0.5)],
+        )
+        for value in (record, Trade(**record)):
+            with self.subTest(type=type(value).__name__):
+                ledger = PositionLedger(self.path)
+                ledger.apply_trade(value, US)
+                position = ledger.positions["111"]
+                self.assertEqual(position.size, -4)
+                self.assertAlmostEqual(position.avg_price, 0.55)
+
+    def test_failed_trades_are_skipped(self):
+        self.assertFalse(self.ledger.apply_trade(trade(1, 100, status="FAILED"), US))
+        self.assertEqual(self.ledger.open_positions(), [])
+        self.assertEqual(self.ledger.cursor, 0)
+
+    def test_cursor_dedupes_across_reload(self):
+        first = [trade(1, 100), trade(2, 100, side="SELL", size=4, price=0.7)]
+        self.assertEqual(self.ledger.apply_trades(first, US), 2)
+        self.ledger.save()
+
+        ledger = PositionLedger.load(self.path)
+        # the same page again plus one new trade at the cursor time, one after
+        again = first + [trade(3, 100, size=2), trade(4, 101, size=1)]
+        self.assertEqual(ledger.apply_trades(again, US), 2)
+        position = ledger.positions["111"]
+        self.assertEqual(position.size, 10 - 4 + 2 + 1)
+        self.assertAlmostEqual(position.realized_pnl, 4 * 0.2)
+        self.assertEqual((ledger.cursor, ledger.cursor_ids), (101, {"4"}))
+
+    def test_summary(self):
+        self.ledger.apply_trades([trade(1, 100), trade(2, 101, side="SELL", size=10)])
+        self.ledger.apply_fill("222", "BUY", 5, 0.2)
+        summary = self.ledger.summary({"222": 0.4})
+        self.assertEqual(summary["positions"], 1)
+        self.assertAlmostEqual(summary["unrealized_pnl"], 1.0)
+        self.assertAlmostEqual(summary["exposure"], 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from agents.connectors.query_service import RAGQueryService
+from scripts.python import server
+
+
+class StubEmbeddings:
+    """Records the texts of every embedding call, one dimension per text."""
+
+    def __init__(self) -> None:
+        self.calls: "list[list[str]]" = []
+
+    async def aembed_documents(self, texts: "list[str]") -> "list[list[float]]":
+        self.calls.append(list(texts))
+        await asyncio.sleep(0)
+        return [[float(len(text))] for text in texts]
+
+
+class StubStore:
+    """Answers each query vector with its own value as the document, k times."""
+
+    def __init__(self) -> None:
+        self.embedding_function = StubEmbeddings()
+        self.searches: "list[int]" = []
+
+    def __len__(self) -> int:
+        return 10
+
+    def similarity_search_by_vectors_with_score(self, vectors, k: int) -> list:
+        self.searches.append(len(vectors))
+        return [[(vector[0], float(i)) for i in range(k)] for vector in vectors]
+
+
+class TestRAGQueryService(unittest.TestCase):
+    def query_all(self, service: RAGQueryService, texts: "list[str]", k=None):
+        async def run():
+            return await asyncio.gather(*(service.query(text, k) for text in texts))
+
+        return asyncio.run(run())
+
+    def test_concurrent_queries_share_one_batch(self):
+        store = StubStore()
+        service = RAGQueryService(store, k=2, max_wait=0.05)
+        texts = ["a", "bb", "ccc", "dddd"]
+        results = self.query_all(service, texts)
+
+        self.assertEqual(store.embedding_function.calls, [texts])
+        self.assertEqual(store.searches, [4])
+        self.assertEqual(results, [[(len(t), 0.0), (len(t), 1.0)] for t in texts])
+        stats = service.stats()
+        self.assertEqual((stats["queries"], stats["batches"]), (4, 1))
+
+    def test_batches_are_capped(self):
+        store = StubStore()
+        service = RAGQueryService(store, max_batch_size=3, max_wait=0.05)
+        self.query_all(service, [str(i) for i in range(7)])
+        self.assertEqual([len(c) for c in store.embedding_function.calls], [3, 3, 1])
+
+    def test_per_query_k(self):
+        service = RAGQueryService(StubStore(), k=1, max_wait=0.05)
+
+        async def run():
+            return await asyncio.gather(service.query("a"), service.query("b", k=3))
+
+        short, long = asyncio.run(run())
+        self.assertEqual((len(short), len(long)), (1, 3))
+
+    def test_errors_reach_every_query_in_the_batch(self):
+        store = StubStore()
+
+        async def fail(texts):
+            raise RuntimeError("embedding failed")
+
+        store.embedding_function.aembed_documents = fail
+        service = RAGQueryService(store, max_wait=0.05)
+
+        async def run():
+            return await asyncio.gather(
+                service.query("a"), service.query("b"), return_exceptions=True
+            )
+
+        errors = asyncio.run(run())
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        server._rag_service = None
+        self.client = TestClient(server.app)
+
+    def tearDown(self):
+        server._rag_service = None
+
+    def test_other_routes_work_without_a_rag_index(self):
+        with mock.patch.object(
+            RAGQueryService, "from_env", side_effect=RuntimeError("no index")
+        ):
+            self.assertEqual(self.client.get("/").status_code, 200)
+            self.assertEqual(self.client.get("/rag/query?q=x").status_code, 503)
+            self.assertEqual(self.client.get("/rag/stats").status_code, 503)
+
+    def test_rag_service_loaded_once_on_first_call(self):
+        with mock.patch.object(
+            RAGQueryService, "from_env", return_value=RAGQueryService(StubStore())
+        ) as from_env:
+            self.assertEqual(self.client.get("/rag/stats").status_code, 200)
+            self.assertEqual(self.client.get("/rag/stats").json()["documents"], 10)
+        self.assertEqual(from_env.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from agents.utils.ratelimit import HostSlots, RequestScheduler
+
+
+class InFlight:
+    """Counts the requests inside their slot and the peak reached."""
+
+    def __init__(self) -> None:
+        self.now = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self) -> None:
+        with self._lock:
+            self.now += 1
+            self.peak = max(self.peak, self.now)
+
+    def exit(self) -> None:
+        with self._lock:
+            self.now -= 1
+
+
+class TestHostSlots(unittest.TestCase):
+    def test_cap_is_shared_by_threads_and_event_loops(self):
+        scheduler = RequestScheduler(max_concurrency=3)
+        in_flight = InFlight()
+
+        def sync_requests():
+            for _ in range(10):
+                with scheduler.slot("example.com"):
+                    in_flight.enter()
+                    time.sleep(0.002)
+                    in_flight.exit()
+
+        async def async_request():
+            async with scheduler.async_slot("example.com"):
+                in_flight.enter()
+                await asyncio.sleep(0.002)
+                in_flight.exit()
+
+        async def async_requests():
+            await asyncio.gather(*(async_request() for _ in range(30)))
+
+        threads = [threading.Thread(target=sync_requests) for _ in range(3)]
+        threads += [
+            threading.Thread(target=asyncio.run, args=(async_requests(),))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(in_flight.peak, 3)
+        self.assertEqual(scheduler.stats()["requests"], 3 * 10 + 2 * 30)
+        self.assertEqual(scheduler._host_slots("example.com").free, 3)
+
+    def test_waiters_are_woken_in_order(self):
+        slots = HostSlots(1)
+        order = []
+
+        async def request(i):
+            await slots.acquire_async()
+            order.append(i)
+            await asyncio.sleep(0)
+            slots.release()
+
+        async def run():
+            await asyncio.gather(*(request(i) for i in range(5)))
+
+        asyncio.run(run())
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+        self.assertEqual(slots.free, 1)
+
+    def test_cancelled_waiters_do_not_leak_slots(self):
+        slots = HostSlots(1)
+
+        async def run():
+            await slots.acquire_async()
+            first = asyncio.create_task(slots.acquire_async())
+            second = asyncio.create_task(slots.acquire_async())
+            await asyncio.sleep(0)
+            first.cancel()
+            # the slot is handed to the cancelled waiter, which passes it on
+            slots.release()
+            await asyncio.wait_for(second, 1)
+            self.assertTrue(first.cancelled())
+
+            third = asyncio.create_task(slots.acquire_async())
+            await asyncio.sleep(0)
+            slots.release()
+            await asyncio.sleep(0)
+            # cancelled after the hand-over, before the waiter ran
+            third.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await third
+
+        asyncio.run(run())
+        self.assertEqual(slots.free, 1)
+
+    def test_too_many_releases(self):
+        slots = HostSlots(1)
+        with self.assertRaises(ValueError):
+            slots.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import time
+import unittest
+
+from agents.polymarket.gamma import GammaMarketClient
+from agents.utils.ratelimit import RequestScheduler
+from agents.utils.stream import iter_json_array
+from agents.utils.transport import HttpTransport
+from scripts.python.standin import fake_market, serve_gamma
+
+ITEMS = [
+    {"id": "1", "question": "Will a ] close, or [ open, this?", "tags": [1, [2]]},
+    'a bare "quoted" string, with ] and , and \\',
+    {"nested": {"deep": [{"x": "}"}]}, "unicode": "café ☃"},
+    12.5e3,
+    -7,
+    True,
+    None,
+    [],
+    {},
+]
+
+
+def split(text: str, size: int) -> "list[str]":
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class TestIterJsonArray(unittest.TestCase):
+    def test_any_chunking(self):
+        document = json.dumps(ITEMS, indent=1)
+        for size in (1, 2, 3, 7, 64, len(document)):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_json_array(split(document, size))), ITEMS)
+
+    def test_escapes_split_across_chunks(self):
+        document = json.dumps(['a\\"]', "b"])
+        for cut in range(1, len(document)):
+            chunks = [document[:cut], "", document[cut:]]
+            self.assertEqual(list(iter_json_array(chunks)), ['a\\"]', "b"])
+
+    def test_empty_array(self):
+        for chunks in (["[]"], ["  [", "  ", "]  "], ["[", "]"]):
+            self.assertEqual(list(iter_json_array(chunks)), [])
+
+    def test_items_are_yielded_before_the_array_ends(self):
+        items = iter_json_array(iter(['[{"a": 1}, {"b"', ": 2}"]))
+        self.assertEqual(next(items), {"a": 1})
+        self.assertEqual(next(items), {"b": 2})
+        with self.assertRaises(ValueError):
+            next(items)
+
+    def test_not_an_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(['{"a": 1}']))
+
+    def test_large_item_is_linear(self):
+        item = {"description": "x" * 200_000, "values": list(range(20_000))}
+        document = json.dumps([item, item])
+
+        def elapsed(chunk_size: int) -> float:
+            start = time.perf_counter()
+            self.assertEqual(len(list(iter_json_array(split(document, chunk_size)))), 2)
+            return time.perf_counter() - start
+
+        # 1k-character chunks mean hundreds of chunks per item; rescanning the
+        # item from its start on every chunk would make this far slower
+        self.assertLess(elapsed(1024), 20 * elapsed(len(document)) + 0.5)
+
+
+class TestIterMarkets(unittest.TestCase):
+    def test_pages_through_the_stream(self):
+        server, url = serve_gamma(n_markets=25, latency=0.0)
+        transport = HttpTransport(scheduler=RequestScheduler())
+        try:
+            gamma = GammaMarketClient(gamma_url=url, transport=transport)
+            markets = list(gamma.iter_markets(page_size=10))
+            self.assertEqual(markets, [fake_market(i) for i in range(1, 26)])
+
+            parsed = list(gamma.iter_markets(parse_pydantic=True, page_size=10))
+            self.assertEqual([m.id for m in parsed], list(range(1, 26)))
+        finally:
+            transport.close()
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from agents.utils.tracing import Tracer
+
+
+class TestTracer(unittest.TestCase):
+    def test_durations_are_bounded(self):
+        tracer = Tracer(window=100)
+        for i in range(1, 1001):
+            tracer.record("request", i / 1000)
+
+        stats = tracer.spans["request"]
+        self.assertEqual(len(stats.recent), 100)
+        self.assertEqual(stats.count, 1000)
+        self.assertAlmostEqual(stats.total, sum(range(1, 1001)) / 1000)
+        # percentiles come from the last 100 spans: 0.901 .. 1.0
+        self.assertEqual(min(stats.recent), 0.901)
+
+    def test_summary(self):
+        tracer = Tracer(window=10)
+        for duration in (0.1, 0.2, 0.3):
+            tracer.record("stage fetch", duration)
+        with self.assertRaises(ValueError):
+            with tracer.span("stage parse"):
+                raise ValueError
+        tracer.count("rpc.requests", 3)
+
+        lines = tracer.summary().splitlines()
+        fetch = next(line for line in lines if line.startswith("stage fetch"))
+        self.assertEqual(
+            fetch.split()[2:], ["3", "0.600", "200.0", "200.0", "300.0", "0"]
+        )
+        parse = next(line for line in lines if line.startswith("stage parse"))
+        self.assertEqual(parse.split()[-1], "1")
+        self.assertIn("rpc.requests", lines[-1])
+
+        tracer.reset()
+        self.assertEqual(tracer.spans, {})
+
+
+if __name__ == "__main__":
+    unittest.main()